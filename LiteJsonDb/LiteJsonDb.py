@@ -1,15 +1,26 @@
 import os
+import csv
+import time
+import hashlib
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+import threading
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
 from .handler import (
-    Encryption, DatabaseOperations, DataManipulation
+    Encryption, DatabaseOperations, DataManipulation, Indexing
 )
+from .handler.serializer import resolve_serializer
+from .handler.compression import resolve_compression
+from .handler.observers import ObserverDispatcher
+from .handler.method import _shared
+from .handler.query import Query
 from .modules import (
-    CSVExporter, search_data, BackupToTelegram
+    CSVExporter, read_rows, search_data, iter_search, BackupToTelegram
 )
 from .utility import (
     convert_to_datetime, get_or_default, key_exists_or_add, normalize_keys,
-    flatten_json, filter_data, sort_data, hash_password, check_password,
+    flatten_json, unflatten_json, filter_data, sort_data, hash_password, check_password,
     sanitize_output, pretty_print
 )
 
@@ -25,12 +36,12 @@ def setup_logging(enable_log):
     if enable_log:
         logging.basicConfig(filename=os.path.join(DATABASE_DIR, 'LiteJsonDb.log'), level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class JsonDB(Encryption, DatabaseOperations, DataManipulation):
+class JsonDB(Encryption, DatabaseOperations, DataManipulation, Indexing):
     """
     A lightweight JSON database with encryption, backup, and utility functions.
 
     This class combines functionalities for handling JSON database operations,
-    including encryption, data manipulation, and utility functions.
+    including encryption, data manipulation, secondary indexes, and utility functions.
 
     Args:
         filename (str): The name of the JSON database file. Defaults to "db.json".
@@ -40,72 +51,389 @@ class JsonDB(Encryption, DatabaseOperations, DataManipulation):
         crypted (bool): Enables encryption for the database if set to True. Defaults to False.
         encryption_method (str): The encryption method to use ('base64' or 'fernet'). Defaults to 'base64'.
         encryption_key (Optional[str]): The encryption key to use (required for fernet). Defaults to None.
+        kdf_iterations (int): PBKDF2 iterations for fernet keys, stored with a random salt in the database
+            itself. Derived keys are cached per process, so reopening a database is instant. Defaults to 480000.
+        storage (str): The storage mode ('file' rewrites the whole file on each save, 'wal' appends
+            each mutation to a log and compacts it in the background, 'sharded' keeps each top-level
+            collection in its own file under a directory named after the database). Defaults to 'file'.
+        wal_compact_bytes (int): In 'wal' mode, compact once the log reaches this size. Defaults to 4 MB.
+        wal_compact_ratio (float): In 'wal' mode, compact once the log is this many times larger than the snapshot. Defaults to 1.0.
+        background_compaction (bool): In 'wal' mode, write compacted snapshots from a background thread. Defaults to True.
+        durability (str): When changes reach the disk: 'sync' (on every write), 'interval' (from a background
+            thread every `flush_interval` ms or after `flush_every` mutations) or 'manual' (on flush()/close()). Defaults to 'sync'.
+        flush_interval (int): In 'interval' mode, milliseconds between flushes. Defaults to 1000.
+        flush_every (int): In 'interval' mode, flush as soon as this many mutations are waiting (0 disables it). Defaults to 1000.
+        fsync (bool): Call os.fsync after each write for power-loss durability. Defaults to False.
+        serializer (str): The on-disk encoding: 'json' (pretty, the classic format), 'compact' (JSON without
+            indentation), 'orjson' or 'msgpack' (fall back to 'compact' when not installed). Existing files
+            are always detected on load, whatever serializer wrote them. Defaults to 'json'.
+        lazy (bool): With storage='sharded', load each collection the first time it is accessed instead of
+            at startup; db.unload() frees collections again. Defaults to False.
+        value_index (bool): Maintain an inverted index of every stored value so search_data answers
+            in time proportional to the matches instead of walking the whole database. Defaults to False.
+        chunk_records (int): With crypted=True, each collection is encrypted separately and collections
+            larger than this are split into chunks of this many records, so a save only re-encrypts
+            the chunks that changed. Defaults to 10000.
+        read_only_views (bool): Make get_db, get_data and get_subcollection return read-only views
+            (no copy, nothing can be changed through them) unless view=False or copy=True is passed. Defaults to False.
+        observer_delivery (str): How observers are called: 'sync' (in the writing thread, during the write),
+            'thread' (from a background queue) or 'asyncio' (scheduled on an event loop, coroutines allowed). Defaults to 'sync'.
+        observer_coalesce (float): With 'thread' or 'asyncio' delivery, changes of the same key made within
+            this many seconds are delivered once, with the latest value. Defaults to 0.0.
+        observer_loop (Optional[asyncio.AbstractEventLoop]): The event loop of the 'asyncio' delivery.
+            Defaults to the running loop.
+        change_feed (bool): Keep a persistent feed of every change (sequence number, action, path and
+            new value) next to the database, read incrementally with db.changes(since=seq). Defaults to False.
+        feed_retention (Optional[int]): Number of changes the feed keeps (None keeps them all). Defaults to 10000.
+        feed_max_age (Optional[float]): Drop changes older than this many seconds from the feed. Defaults to None.
+        multiprocess (bool): Share the database file between processes (e.g. several web workers). Writes hold
+            an inter-process lock, start from the latest saved data and replace the file atomically; reads reload
+            the file only when its inode, size or mtime changed. Needs storage='file' and durability='sync'. Defaults to False.
+        lock_timeout (Optional[float]): Seconds to wait for the inter-process lock before raising TimeoutError
+            (None waits forever). Defaults to 10.0.
+        backup_generations (int): With auto_backup, keep this many backup generations instead of the single
+            backup file; restore any of them with db.restore_backup(generation). Defaults to 1.
+        backup_max_age (Optional[float]): Drop backup generations older than this many seconds. Defaults to None.
+        backup_interval (float): Back up at most once every this many seconds instead of on every save
+            (pending changes are backed up on close()). Defaults to 0 (60 with storage='wal' or 'sharded',
+            where a generation means reading the whole database).
+        backup_delta (bool): Store each generation as the chunks that changed since the previous ones,
+            instead of a full copy. Defaults to False.
+        compression (Optional[str]): Compress the database file, its shards and backups on disk: 'gzip'
+            (stdlib), 'zstd' or 'lz4' (faster; fall back to 'gzip' when not installed). Compressed and
+            uncompressed files are told apart by their magic bytes, so existing files keep loading.
+            The mutation log and the change feed stay plain. Defaults to None.
+        Backup generations are skipped when the content didn't change since the latest one.
+        With backup generations and change_feed, db.restore(at=seq_or_time) recovers the database as it
+        was at any change or moment still covered by the feed.
 
     """
     def __init__(self, filename="db.json", backup_filename="db_backup.json", 
-                 enable_log=False, auto_backup=False, crypted=False, encryption_method='base64', encryption_key: Optional[str] = None):
+                 enable_log=False, auto_backup=False, crypted=False, encryption_method='base64', encryption_key: Optional[str] = None,
+                 kdf_iterations=480000,
+                 storage='file', wal_compact_bytes=4 * 1024 * 1024, wal_compact_ratio=1.0, background_compaction=True,
+                 durability='sync', flush_interval=1000, flush_every=1000, fsync=False, serializer='json',
+                 lazy=False, value_index=False, chunk_records=10000, read_only_views=False,
+                 observer_delivery='sync', observer_coalesce=0.0, observer_loop=None,
+                 change_feed=False, feed_retention=10000, feed_max_age=None,
+                 multiprocess=False, lock_timeout=10.0,
+                 backup_generations=1, backup_max_age=None, backup_interval=0, backup_delta=False,
+                 compression=None):
         if encryption_method not in ['base64', 'fernet']:
             raise ValueError(f"\033[90m#bugs\033[0m Unknown encryption method: '{encryption_method}'!")
+        if storage not in ['file', 'wal', 'sharded']:
+            raise ValueError(f"\033[90m#bugs\033[0m Unknown storage mode: '{storage}'!")
+        if durability not in ['sync', 'interval', 'manual']:
+            raise ValueError(f"\033[90m#bugs\033[0m Unknown durability policy: '{durability}'!")
+        if lazy and storage != 'sharded':
+            raise ValueError("\033[90m#bugs\033[0m Lazy loading needs storage='sharded'!")
+        if multiprocess and (storage != 'file' or durability != 'sync'):
+            raise ValueError("\033[90m#bugs\033[0m multiprocess=True needs storage='file' and durability='sync'!")
+        if multiprocess and change_feed:
+            raise ValueError("\033[90m#bugs\033[0m The change feed can't be shared between processes yet; use multiprocess or change_feed!")
+        if not isinstance(backup_generations, int) or backup_generations < 1:
+            raise ValueError("\033[90m#bugs\033[0m backup_generations must be at least 1!")
+        if feed_retention is not None and feed_retention < 0:
+            raise ValueError("\033[90m#bugs\033[0m feed_retention must be a positive number or None!")
+        if observer_delivery not in ObserverDispatcher.MODES:
+            raise ValueError(f"\033[90m#bugs\033[0m Unknown observer delivery: '{observer_delivery}'!")
+        if observer_delivery == 'asyncio' and observer_loop is None:
+            try:
+                observer_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                raise ValueError("\033[90m#bugs\033[0m observer_delivery='asyncio' needs observer_loop (or a running event loop)!")
+        serializer = resolve_serializer(serializer)
+        compression = resolve_compression(compression)
 
         self.filename = os.path.join(DATABASE_DIR, filename)
         self.backup_filename = os.path.join(DATABASE_DIR, backup_filename)
         self.enable_log = enable_log
         self.auto_backup = auto_backup
         self.crypted = crypted
+        self.read_only_views = read_only_views
         self.encryption_method = encryption_method
         self.db = {}
         self.observers = {}
         self.csv_exporter = CSVExporter(DATABASE_DIR)
+        self._telegram_bots: Dict[Tuple, BackupToTelegram] = {}  # One HTTP session per destination and options
+        self._telegram_thread: Optional[threading.Thread] = None
+        self._telegram_stop = threading.Event()
         setup_logging(self.enable_log)
-        Encryption.__init__(self, encryption_method, encryption_key) 
-        DatabaseOperations.__init__(self, enable_log, auto_backup)
-        DataManipulation.__init__(self)
+        Encryption.__init__(self, encryption_method, encryption_key, kdf_iterations)
+        DatabaseOperations.__init__(self, enable_log, auto_backup, storage, wal_compact_bytes,
+                                    wal_compact_ratio, background_compaction, durability,
+                                    flush_interval, flush_every, fsync, serializer, lazy, chunk_records,
+                                    change_feed, feed_retention, feed_max_age, multiprocess, lock_timeout,
+                                    backup_generations, backup_max_age, backup_interval, backup_delta,
+                                    compression)
+        DataManipulation.__init__(self, observer_delivery, observer_coalesce, observer_loop)
+        Indexing.__init__(self, value_index)
         self._load_db()
+        self._load_index_definitions()
 
-    def backup_to_telegram(self, token: str, chat_id: str):
+    def backup_to_telegram(self, token: str, chat_id: str, **options: Any) -> bool:
         """
          Sends the database backup to a specified Telegram chat.
 
+         The backup is a single file holding the whole database (unsaved changes included,
+         whatever the storage mode), compressed and split into numbered parts if it is too big
+         for one upload. Nothing is written to disk, and writers only wait while the data is
+         serialized; compression and upload run without any lock.
+
          Args:
              token (str): The Telegram bot token.
              chat_id (str): The Telegram chat ID.
+             **options: BackupToTelegram options: api_base, compression, part_size, retries, backoff, timeout.
+
+         Returns:
+             bool: True if the backup was sent.
         """
-        self._save_db()
-        telegram_bot = BackupToTelegram(token=token, chat_id=chat_id)
         try:
-            telegram_bot.backup_to_telegram(self.filename)
+            telegram_bot = self._telegram_bot(token, chat_id, options)
+            return telegram_bot.send_backup(self._export_payload(), os.path.basename(self.filename))
         except Exception as e:
             print(f"\033[90m#bugs\033[0m Telegram backup took a wrong turn! Error: {e}")
             if self.enable_log:
                 logging.error(f"Error sending backup to Telegram: {e}")
+            return False
+
+    def _telegram_bot(self, token: str, chat_id: str, options: Dict[str, Any]) -> BackupToTelegram:
+        """
+        Returns the BackupToTelegram for a destination, reusing its HTTP session across backups.
+        """
+        key = (token, str(chat_id), tuple(sorted(options.items())))
+        telegram_bot = self._telegram_bots.get(key)
+        if telegram_bot is None:
+            telegram_bot = self._telegram_bots[key] = BackupToTelegram(token=token, chat_id=chat_id, **options)
+        return telegram_bot
+
+    def schedule_telegram_backup(self, token: str, chat_id: str, every: float = 3600, **options: Any) -> None:
+        """
+         Sends a backup to Telegram every `every` seconds from a background thread, skipping
+         the rounds where the database didn't change since the last backup sent.
+         Writers are never held up by the upload. Calling it again replaces the schedule;
+         cancel_telegram_backup() or close() stops it.
+
+         Example:
+             db.schedule_telegram_backup("your_token", "your_chat_id", every=6 * 3600)
+
+         Args:
+             token (str): The Telegram bot token.
+             chat_id (str): The Telegram chat ID.
+             every (float): Seconds between two backups. Defaults to 3600.
+             **options: BackupToTelegram options: api_base, compression, part_size, retries, backoff, timeout.
+        """
+        if every <= 0:
+            print("\033[91m#bugs\033[0m every must be a positive number of seconds.")
+            return
+        self.cancel_telegram_backup()
+        telegram_bot = self._telegram_bot(token, chat_id, options)
+        self._telegram_stop = threading.Event()
+        self._telegram_thread = threading.Thread(target=self._telegram_loop, args=(telegram_bot, every, self._telegram_stop),
+                                                 name="LiteJsonDb-telegram", daemon=True)
+        self._telegram_thread.start()
+
+    def cancel_telegram_backup(self) -> None:
+        """
+         Stops the scheduled Telegram backups (an upload in progress is finished first).
+        """
+        if self._telegram_thread is not None:
+            self._telegram_stop.set()
+            self._telegram_thread.join()
+            self._telegram_thread = None
+
+    def _telegram_loop(self, telegram_bot: BackupToTelegram, every: float, stop: threading.Event) -> None:
+        """
+        Background thread body of schedule_telegram_backup.
+        """
+        last_sent = None  # Hash of the last backup sent
+        while not stop.wait(every):
+            try:
+                payload = self._export_payload()
+                digest = hashlib.sha256(payload).hexdigest()
+                if digest == last_sent:
+                    continue
+                if telegram_bot.send_backup(payload, os.path.basename(self.filename)):
+                    last_sent = digest
+            except Exception as e:
+                print(f"\033[91m#bugs\033[0m Scheduled Telegram backup failed: {e}")
+                if self.enable_log:
+                    logging.error(f"Scheduled Telegram backup failed: {e}")
 
-    def export_to_csv(self, data_key: Optional[str] = None):
+    def close(self) -> None:
+        """
+         Stops the scheduled Telegram backups, then saves and closes the database (see DatabaseOperations.close).
+        """
+        self.cancel_telegram_backup()
+        super().close()
+        for telegram_bot in self._telegram_bots.values():
+            telegram_bot.close()
+        self._telegram_bots.clear()
+
+    def export_to_csv(self, data_key: Optional[str] = None, flatten: bool = True, discover_headers: bool = True,
+                      compress: bool = False, chunk_size: int = 1000, id_field: Optional[str] = None,
+                      typed: bool = False):
         """
          Exports the database or a specified collection to a CSV file.
 
+         Rows are streamed straight from the data, so memory stays flat whatever the
+         collection size. Writes wait until the export is done.
+
+         Args:
+              data_key (Optional[str]): If provided, exports only the data under this key. If None, exports the full database.
+              flatten (bool): Turn nested dicts into dotted columns ("address.city"). Defaults to True.
+              discover_headers (bool): Scan every row first so records with extra fields get their columns.
+                  If False, the first row's columns are used. Defaults to True.
+              compress (bool): Write a gzipped file (".csv.gz"). Defaults to False.
+              chunk_size (int): Number of rows written at once. Defaults to 1000.
+              id_field (Optional[str]): Also write each record's key in this column. Defaults to None.
+              typed (bool): Write cells so bulk_import reads back their exact types (numbers, booleans,
+                  null and number-like strings as JSON). Defaults to False (plain cells).
+        """
+        self._export(data_key, "csv", "CSV", flatten=flatten, discover_headers=discover_headers,
+                     compress=compress, chunk_size=chunk_size, id_field=id_field, typed=typed)
+
+    def export_to_ndjson(self, data_key: Optional[str] = None, compress: bool = False,
+                         chunk_size: int = 1000, id_field: Optional[str] = None):
+        """
+         Exports the database or a specified collection to an NDJSON file (one JSON record per line).
+
          Args:
               data_key (Optional[str]): If provided, exports only the data under this key. If None, exports the full database.
+              compress (bool): Write a gzipped file (".ndjson.gz"). Defaults to False.
+              chunk_size (int): Number of lines written at once. Defaults to 1000.
+              id_field (Optional[str]): Also store each record's key in this field. Defaults to None.
+        """
+        self._export(data_key, "ndjson", "NDJSON", compress=compress, chunk_size=chunk_size, id_field=id_field)
+
+    def _export(self, data_key: Optional[str], extension: str, label: str, **options: Any):
         """
+         Helper method shared by the exports: picks the data, writes the file and reports.
+        """
+        export = self.csv_exporter.export if extension == "csv" else self.csv_exporter.export_ndjson
         if data_key:
-            if data_key in self.db:
-                data = self.db[data_key]
-                csv_path = self.csv_exporter.export(data, f"{data_key}_export.csv")
-                if csv_path:
-                    print(f"🎉 Hooray! CSV exported to: {csv_path}")
+            self._ensure_loaded(data_key)
+            with self._read_lock:
+                if data_key in self.db:
+                    path = export(self.db[data_key], f"{data_key}_export.{extension}", **options)
                 else:
-                    print(f"\033[90m#bugs\033[0m Could not export '{data_key}' to CSV!")
-            else:
+                    path = None
+            if path is None:
                  print(f"\033[90m#bugs\033[0m Key '{data_key}' not found, is it hiding? Tip: Double-check it!")
-        else:
-            if self.db:
-                csv_path = self.csv_exporter.export(self.db, "full_database_export.csv")
-                if csv_path:
-                    print(f"🎉 Full database exported to: {csv_path}")
-                else:
-                    print("\033[90m#bugs\033[0m Database export failed. It's shy!")
+            elif path:
+                print(f"🎉 Hooray! {label} exported to: {path}")
             else:
+                print(f"\033[90m#bugs\033[0m Could not export '{data_key}' to {label}!")
+        else:
+            self._load_all()
+            with self._read_lock:
+                path = export(self.db, f"full_database_export.{extension}", **options) if self.db else None
+            if path is None:
                 print("\033[90m#bugs\033[0m Database is empty, ghost town vibes!")
+            elif path:
+                print(f"🎉 Full database exported to: {path}")
+            else:
+                print("\033[90m#bugs\033[0m Database export failed. It's shy!")
 
+    def bulk_import(self, collection: str, source: Union[str, Iterable[Dict[str, Any]]], id_field: Optional[str] = None,
+                    on_conflict: str = 'skip', chunk_size: int = 10000) -> Optional[Dict[str, Any]]:
+        """
+         Imports many records into a subcollection at once.
+
+         Records are validated chunk by chunk with validate_rows and applied in a single
+         batch, so the whole import ends with one backup and one save (and rolls back if
+         it fails halfway). Rows that don't validate are skipped and reported.
+
+         Example:
+             db.bulk_import("users", "database/users_export.csv", id_field="id", on_conflict="merge")
+
+         Args:
+             collection (str): The subcollection to import into.
+             source (Union[str, Iterable[Dict[str, Any]]]): An iterable of dicts, or the path of a .csv,
+                 .ndjson or .jsonl file (optionally .gz), e.g. one written by export_to_csv(typed=True)/export_to_ndjson.
+             id_field (Optional[str]): The field holding each record's ID (it is taken out of the record).
+                 If None, IDs are numbered after the existing records. Defaults to None.
+             on_conflict (str): What to do when an ID already exists: 'skip' it, 'replace' the record
+                 or 'merge' the new fields into it. Defaults to 'skip'.
+             chunk_size (int): Number of records validated at once. Defaults to 10000.
+            Returns:
+                Optional[Dict[str, Any]]: The import report (imported, replaced, merged, skipped, rejected
+                (row number, reason) pairs, seconds and rows_per_second), or None if the source couldn't be read.
+            Raises:
+                ValueError: If the conflict policy is unknown.
+        """
+        if on_conflict not in ['skip', 'replace', 'merge']:
+            raise ValueError(f"\033[90m#bugs\033[0m Unknown conflict policy: '{on_conflict}'!")
+        report = {"imported": 0, "replaced": 0, "merged": 0, "skipped": 0, "rejected": []}
+        started = time.perf_counter()
+        self._ensure_loaded(collection)
+        try:
+            rows = read_rows(source) if isinstance(source, str) else iter(source)
+            with self.batch():
+                if collection not in self.db:
+                    self._before_change([collection])
+                    self.db[collection] = {}
+                    self._commit_change([collection])  # Kept even if no row turns out valid
+                records = self.db[collection]
+                if not isinstance(records, dict):
+                    print(f"\033[91m#bugs\033[0m '{collection}' isn't a subcollection, can't import into it.")
+                    return None
+                next_id = len(records) + 1
+                row_number = 0
+                while True:
+                    chunk = list(islice(rows, max(chunk_size, 1)))
+                    if not chunk:
+                        break
+                    valid, rejected = self.validate_rows(chunk)
+                    report["rejected"].extend((row_number + position + 1, reason) for position, reason in rejected)
+                    for position in valid:
+                        record = chunk[position]
+                        if id_field is None:
+                            while str(next_id) in records:
+                                next_id += 1
+                            item_id = str(next_id)
+                        else:
+                            item_id = record.get(id_field)
+                            if isinstance(item_id, bool) or not isinstance(item_id, (str, int)):
+                                report["rejected"].append((row_number + position + 1, f"missing or invalid '{id_field}'"))
+                                continue
+                            record = {k: v for k, v in record.items() if k != id_field}
+                            item_id = str(item_id)
+                        if item_id in records:
+                            if on_conflict == 'skip':
+                                report["skipped"] += 1
+                                continue
+                            report["merged" if on_conflict == 'merge' else "replaced"] += 1
+                        else:
+                            report["imported"] += 1
+                        self._before_change([collection, item_id])
+                        if on_conflict == 'merge' and isinstance(records.get(item_id), dict):
+                            self._merge_dicts(records[item_id], record)
+                        else:
+                            records[item_id] = record
+                        if self.observers or self._feed is not None:
+                            self.notify_observers("bulk_import", f"{collection}/{item_id}", records[item_id])
+                        self._commit_change([collection, item_id])
+                    row_number += len(chunk)
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"\033[91m#bugs\033[0m Import into '{collection}' failed, nothing was changed: {e}")
+            return None
+
+        report["rejected"].sort()
+        report["seconds"] = time.perf_counter() - started
+        written = report["imported"] + report["replaced"] + report["merged"]
+        report["rows_per_second"] = written / report["seconds"] if report["seconds"] else 0.0
+        print(f"🎉 Imported {written} records into '{collection}' in {report['seconds']:.2f}s "
+              f"({report['rows_per_second']:.0f} records/s).")
+        if report["rejected"]:
+            row, reason = report["rejected"][0]
+            print(f"\033[90m#info\033[0m {len(report['rejected'])} rows rejected (row {row}: {reason}).")
+        if self.enable_log:
+            logging.info(f"Bulk import into {collection}: {written} written, {report['skipped']} skipped, "
+                         f"{len(report['rejected'])} rejected")
+        return report
+
+    @_shared
     def search_data(self, value: Any, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Searches for a value within the database.
@@ -117,7 +445,16 @@ class JsonDB(Encryption, DatabaseOperations, DataManipulation):
                 Optional[Dict[str, Any]]: Returns the matching dictionary or None if not found.
         """
         try:
-            result = search_data(self.db, value, key)
+            if key:
+                self._ensure_loaded(key)
+            else:
+                self._load_all()
+            if self._value_index is not None and (not key or isinstance(self.db.get(key), dict)):
+                result = self._search_value_index(value, key)
+                if not result:
+                    print(f"\033[90m#info\033[0m Value '{value}' not found.")
+            else:
+                result = search_data(self.db, value, key)
             if result:
                 return result
             else:
@@ -127,6 +464,45 @@ class JsonDB(Encryption, DatabaseOperations, DataManipulation):
             print(f"\033[90m#bugs\033[0m Search party got lost! Error: {e}")
             return None
 
+    def iter_search(self, value: Any, key: Optional[str] = None, limit: Optional[int] = None,
+                    predicate: Optional[Callable[[Any], bool]] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Searches for a value lazily, yielding matches as they are found.
+
+        Unlike search_data, nothing is collected up front: stop iterating (or pass `limit`)
+        to end the search early. Dicts inside lists are searched too.
+
+        Example:
+            first = next(db.iter_search("Aliou", key="users"), None)
+
+         Args:
+             value (Any): The value to search for.
+             key (Optional[str]): If provided, searches only within the values associated with this key.
+             limit (Optional[int]): Stop after this many matches.
+             predicate (Optional[Callable[[Any], bool]]): An extra test the matching values must pass.
+            Yields:
+                Tuple[str, Any]: (path, value) pairs. Don't change the database while iterating.
+        """
+        if key:
+            self._ensure_loaded(key)
+        else:
+            self._load_all()
+        yield from iter_search(self.db, value, key, limit, predicate)
+
+    def query(self, collection: str) -> Query:
+        """
+        Starts a declarative query over the records of a subcollection.
+
+        Example:
+            db.query("users").where(age__gte=18, country="SN").order_by("-score").limit(50).fields("name", "score")
+
+         Args:
+             collection (str): The subcollection to query.
+            Returns:
+                Query: A lazy query; iterate it for (item ID, record) pairs, or call all(), first(), count() or explain().
+        """
+        return Query(self, collection)
+
     @staticmethod
     def call_utility_function(func_name, *args, **kwargs):
         """
@@ -147,6 +523,7 @@ class JsonDB(Encryption, DatabaseOperations, DataManipulation):
             'key_exists_or_add': key_exists_or_add,
             'normalize_keys': normalize_keys,
             'flatten_json': flatten_json,
+            'unflatten_json': unflatten_json,
             'filter_data': filter_data,
             'sort_data': sort_data,
             'hash_password': hash_password,
@@ -218,6 +595,17 @@ class JsonDB(Encryption, DatabaseOperations, DataManipulation):
         """
         return JsonDB.call_utility_function('flatten_json', data)
 
+    @staticmethod
+    def unflatten_json(data):
+        """
+        Wrapper for the utility function unflatten_json
+        Args:
+            data(Any): The flat json data (dotted keys) to nest again
+        Returns:
+            Any: Result of unflatten_json utility function
+        """
+        return JsonDB.call_utility_function('unflatten_json', data)
+
     @staticmethod
     def filter_data(data, condition):
         """
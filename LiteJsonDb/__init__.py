@@ -1,8 +1,9 @@
 from .LiteJsonDb import JsonDB
-from .handler import Encryption, DatabaseOperations, DataManipulation
-from .modules import CSVExporter, search_data, BackupToTelegram
+from .asyncdb import AsyncJsonDB
+from .handler import Encryption, DatabaseOperations, DataManipulation, Indexing
+from .modules import CSVExporter, search_data, iter_search, BackupToTelegram
 from .utility import (
     convert_to_datetime, get_or_default, key_exists_or_add, normalize_keys,
-    flatten_json, filter_data, sort_data, hash_password, check_password,
+    flatten_json, unflatten_json, filter_data, sort_data, hash_password, check_password,
     sanitize_output, pretty_print
 )
\ No newline at end of file
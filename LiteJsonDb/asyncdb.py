@@ -0,0 +1,237 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+from .LiteJsonDb import JsonDB
+from .handler.query import Query
+
+class AsyncJsonDB:
+    """
+    asyncio front end of JsonDB, for FastAPI, aiogram and other event-loop programs.
+
+    Reads are served straight from memory, without awaiting. Writes, and everything
+    that touches the disk or the cipher (saves, backups, encryption, exports and
+    Telegram uploads), run off the event loop:
+    - Mutations run one after the other, in issue order, on a dedicated writer thread.
+    - Saving is left to a single flush task. Writes made while it runs are saved
+      by its next round, so a burst of concurrent writes costs one save, not one per write.
+
+    Example:
+        db = await AsyncJsonDB.open("db.json")
+        await db.set_data("users/1", {"name": "Aliou"})
+        print(db.get_data("users/1"))
+        await db.close()
+
+    Args:
+        *args: Positional arguments of JsonDB.
+        durable (bool): Make write coroutines return only once their change is saved.
+            If False, they return as soon as the change is in memory and the save follows
+            in the background (call flush() or close() to wait for it). Defaults to True.
+        **kwargs: Keyword arguments of JsonDB. `durability` is managed by AsyncJsonDB
+            and can't be passed.
+    """
+    def __init__(self, *args: Any, durable: bool = True, **kwargs: Any):
+        if 'durability' in kwargs:
+            raise ValueError("\033[90m#bugs\033[0m AsyncJsonDB saves through its own flush task; don't pass durability!")
+        self.durable = durable
+        self.sync = JsonDB(*args, durability='manual', **kwargs)  # The wrapped database
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LiteJsonDb-async")
+        self._flush_task: Optional[asyncio.Task] = None
+        self._dirty = False  # A change was applied after the running flush round started
+
+    @classmethod
+    async def open(cls, *args: Any, durable: bool = True, **kwargs: Any) -> "AsyncJsonDB":
+        """
+        Opens the database without blocking the loop (loading and decrypting run on a thread).
+
+        With observer_delivery='asyncio', observers are delivered on the calling loop.
+
+        Returns:
+            AsyncJsonDB: The opened database.
+        """
+        loop = asyncio.get_running_loop()
+        if kwargs.get('observer_delivery') == 'asyncio':
+            kwargs.setdefault('observer_loop', loop)
+        return await loop.run_in_executor(None, functools.partial(cls, *args, durable=durable, **kwargs))
+
+    async def __aenter__(self) -> "AsyncJsonDB":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    # ==================================================
+    #                WRITES
+    # --------------------------------------------------
+    # ==================================================
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs `func(db, *args, **kwargs)` on the writer thread, with the wrapped JsonDB,
+        then saves like any other write. Use it for batches and other multi-step changes.
+
+        Example:
+            def add_all(db, users):
+                with db.batch():
+                    for i, user in enumerate(users):
+                        db.set_subcollection("users", str(i), user)
+
+            await adb.run(add_all, users)
+
+        Returns:
+            Any: What `func` returned.
+        """
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._writer, functools.partial(func, self.sync, *args, **kwargs))
+        self._dirty = True
+        flush = self._schedule_flush()
+        if self.durable:
+            await asyncio.shield(flush)
+        return result
+
+    async def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        return await self.run(lambda db: getattr(db, name)(*args, **kwargs))
+
+    async def set_data(self, key: str, value: Optional[Any] = None) -> None:
+        """Async version of JsonDB.set_data."""
+        await self._call("set_data", key, value)
+
+    async def edit_data(self, key: str, value: Any) -> None:
+        """Async version of JsonDB.edit_data."""
+        await self._call("edit_data", key, value)
+
+    async def remove_data(self, key: str) -> None:
+        """Async version of JsonDB.remove_data."""
+        await self._call("remove_data", key)
+
+    async def set_subcollection(self, collection_name: str, item_id: str, value: Any) -> None:
+        """Async version of JsonDB.set_subcollection."""
+        await self._call("set_subcollection", collection_name, item_id, value)
+
+    async def edit_subcollection(self, collection_name: str, item_id: str, value: Any) -> None:
+        """Async version of JsonDB.edit_subcollection."""
+        await self._call("edit_subcollection", collection_name, item_id, value)
+
+    async def remove_subcollection(self, collection_name: str, item_id: Optional[str] = None) -> None:
+        """Async version of JsonDB.remove_subcollection."""
+        await self._call("remove_subcollection", collection_name, item_id)
+
+    async def bulk_import(self, collection: str, source: Union[str, Iterable[Dict[str, Any]]], **options: Any) -> Optional[Dict[str, Any]]:
+        """Async version of JsonDB.bulk_import (the file is read on the writer thread too)."""
+        return await self._call("bulk_import", collection, source, **options)
+
+    async def create_index(self, collection: str, field: str, kind: str = 'hash') -> None:
+        """Async version of JsonDB.create_index."""
+        await self._call("create_index", collection, field, kind)
+
+    async def drop_index(self, collection: str, field: str) -> None:
+        """Async version of JsonDB.drop_index."""
+        await self._call("drop_index", collection, field)
+
+    # ==================================================
+    #                SAVING
+    # --------------------------------------------------
+    # ==================================================
+
+    def _schedule_flush(self) -> "asyncio.Task":
+        """
+        Returns the pending flush task, starting one if none is running.
+        """
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_rounds())
+        return self._flush_task
+
+    async def _flush_rounds(self) -> None:
+        """
+        Saves until no write happened during the last save (one save for a whole burst of writes).
+        """
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            self._dirty = False
+            await loop.run_in_executor(self._writer, self.sync.flush)
+
+    async def flush(self) -> None:
+        """
+        Waits until every change made so far is saved.
+        """
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    async def close(self) -> None:
+        """
+        Saves pending changes, closes the wrapped database and stops the writer thread.
+        """
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.sync.close)
+        self._writer.shutdown(wait=True)
+
+    # ==================================================
+    #                OFF-LOOP TASKS
+    # --------------------------------------------------
+    # ==================================================
+
+    async def backup_to_telegram(self, token: str, chat_id: str, **options: Any) -> bool:
+        """
+        Async version of JsonDB.backup_to_telegram (the backup holds the changes not saved yet,
+        and compression and upload run on a thread).
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.sync.backup_to_telegram, token, chat_id, **options))
+
+    def schedule_telegram_backup(self, token: str, chat_id: str, every: float = 3600, **options: Any) -> None:
+        """Same as JsonDB.schedule_telegram_backup (backups are sent from their own thread)."""
+        self.sync.schedule_telegram_backup(token, chat_id, every, **options)
+
+    async def export_to_csv(self, data_key: Optional[str] = None, **options: Any) -> None:
+        """Async version of JsonDB.export_to_csv (the file is written on a thread)."""
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.sync.export_to_csv, data_key, **options))
+
+    async def export_to_ndjson(self, data_key: Optional[str] = None, **options: Any) -> None:
+        """Async version of JsonDB.export_to_ndjson (the file is written on a thread)."""
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.sync.export_to_ndjson, data_key, **options))
+
+    # ==================================================
+    #                READS (from memory, no await)
+    # --------------------------------------------------
+    # ==================================================
+
+    def key_exists(self, key: str) -> bool:
+        """Same as JsonDB.key_exists."""
+        return self.sync.key_exists(key)
+
+    def get_data(self, key: str, view: Optional[bool] = None, copy: bool = False) -> Optional[Any]:
+        """Same as JsonDB.get_data."""
+        return self.sync.get_data(key, view, copy)
+
+    def get_db(self, raw: bool = False, view: Optional[bool] = None, copy: bool = False) -> Union[Dict[str, Any], str]:
+        """Same as JsonDB.get_db."""
+        return self.sync.get_db(raw, view, copy)
+
+    def get_subcollection(self, collection_name: str, item_id: Optional[str] = None,
+                          view: Optional[bool] = None, copy: bool = False) -> Optional[Any]:
+        """Same as JsonDB.get_subcollection."""
+        return self.sync.get_subcollection(collection_name, item_id, view, copy)
+
+    def search_data(self, value: Any, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Same as JsonDB.search_data."""
+        return self.sync.search_data(value, key)
+
+    def find_by(self, collection: str, field: str, value: Any) -> Dict[str, Any]:
+        """Same as JsonDB.find_by."""
+        return self.sync.find_by(collection, field, value)
+
+    def range_by(self, collection: str, field: str, **options: Any) -> Dict[str, Any]:
+        """Same as JsonDB.range_by."""
+        return self.sync.range_by(collection, field, **options)
+
+    def query(self, collection: str) -> Query:
+        """Same as JsonDB.query."""
+        return self.sync.query(collection)
+
+    def add_observer(self, key: str, observer_func: Callable) -> None:
+        """Same as JsonDB.add_observer."""
+        self.sync.add_observer(key, observer_func)
+
+    def remove_observer(self, key: str, observer_func: Callable) -> None:
+        """Same as JsonDB.remove_observer."""
+        self.sync.remove_observer(key, observer_func)
@@ -1,3 +1,10 @@
 from .encrypt import Encryption
 from .db_operations import DatabaseOperations
 from .method import DataManipulation
+from .indexing import Indexing
+from .views import ReadOnlyDict, ReadOnlyList
+from .observers import ObserverTrie, ObserverDispatcher
+from .changefeed import ChangeFeed
+from .filelock import InterProcessLock
+from .rwlock import ReadWriteLock
+from .backups import BackupGenerations
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+from typing import Any, Dict, List, Optional
+from .compression import write_compressed, read_compressed, compress, decompress
+
+# Gear table of the rolling hash that cuts long lines: one fixed pseudo-random value per byte.
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([value])).digest()[:4], 'big') for value in range(256)]
+
+class BackupGenerations:
+    """
+    Keeps several generations of database backups in a directory, instead of a single copy.
+
+    - Retention: the newest `keep` generations are kept, and generations older than
+      `max_age` seconds are dropped (the newest one always stays).
+    - Deduplication: a backup is skipped when the content hash matches the latest generation.
+    - Scheduling: with `interval`, a backup is taken at most once every `interval` seconds.
+    - Delta backups: with `delta`, each generation is cut into content-defined chunks
+      (on line boundaries, and inside long lines where a rolling hash of the last 32 bytes
+      says so, so an edit only changes the chunks around it) and only the
+      chunks the store doesn't hold yet are written; unchanged chunks are shared with
+      the previous generations.
+
+    The directory holds an `index.json` listing the generations, `gen-<id>.bak` files
+    for full generations and a `chunks/` directory for delta generations. Generations hold
+    the serialized database as stored on disk, so they are encrypted if the database is.
+    With `compression`, generation files and chunks (each one on its own) are compressed.
+    """
+    INDEX = "index.json"
+    FORMAT = "ljdb-backups"
+    CHUNK_MIN = 4 * 1024  # No content-defined cut before this many bytes
+    CHUNK_MAX = 256 * 1024  # Always cut after this many bytes
+    CUT_MASK = 0xFFF00000  # A rolling hash with these bits clear is a cut (about one in 4 KB)
+
+    def __init__(self, directory: str, keep: int = 5, max_age: Optional[float] = None,
+                 interval: float = 0.0, delta: bool = False, fsync: bool = False, compression: str = 'none'):
+        """
+        Initializes the BackupGenerations store.
+
+        Args:
+            directory (str): The directory holding the generations.
+            keep (int, optional): Number of generations to keep. Defaults to 5.
+            max_age (Optional[float], optional): Drop generations older than this many seconds. Defaults to None.
+            interval (float, optional): Minimum number of seconds between two backups (0 backs up on every save). Defaults to 0.0.
+            delta (bool, optional): Store generations as chunks shared with the previous ones. Defaults to False.
+            fsync (bool, optional): Force the backups to stable storage. Defaults to False.
+            compression (str, optional): The codec backups are written with (see compression.py). Defaults to 'none'.
+        """
+        self.directory = directory
+        self.chunk_directory = os.path.join(directory, "chunks")
+        self.keep = max(int(keep), 1)
+        self.max_age = max_age
+        self.interval = interval
+        self.delta = delta
+        self.fsync = fsync
+        self.compression = compression
+        self.index_path = os.path.join(directory, self.INDEX)
+        self.generations: List[Dict[str, Any]] = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                self.generations = json.load(file)["generations"]
+        self.pending = False  # Saves happened since the last backup
+
+    def due(self) -> bool:
+        """
+        Checks whether the backup interval has elapsed since the last generation.
+        """
+        if not self.generations or not self.interval:
+            return True
+        return time.time() - self.generations[-1]["time"] >= self.interval
+
+    def add(self, payload: bytes, seq: Optional[int] = None) -> Optional[int]:
+        """
+        Stores a new generation, unless its content matches the latest one.
+
+        Args:
+            payload (bytes): The serialized database.
+            seq (Optional[int], optional): The change feed sequence number the content is at,
+                used by point-in-time recovery. Defaults to None.
+
+        Returns:
+            Optional[int]: The new generation number, or None if the content didn't change.
+        """
+        self.pending = False
+        digest = hashlib.sha256(payload).hexdigest()
+        if self.generations and self.generations[-1]["hash"] == digest:
+            latest = self.generations[-1]
+            if seq is not None and latest.get("seq") != seq:
+                # Same content, later in the feed: replays can start from here.
+                latest["seq"], latest["time"] = seq, time.time()
+                self._write_index()
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        number = self.generations[-1]["generation"] + 1 if self.generations else 1
+        entry: Dict[str, Any] = {"generation": number, "time": time.time(), "hash": digest, "size": len(payload)}
+        if seq is not None:
+            entry["seq"] = seq
+        if self.delta:
+            os.makedirs(self.chunk_directory, exist_ok=True)
+            entry["chunks"] = []
+            for chunk in self._split(payload):
+                name = hashlib.sha256(chunk).hexdigest()
+                path = os.path.join(self.chunk_directory, name)
+                if not os.path.exists(path):
+                    self._write(path, compress(chunk, self.compression))
+                entry["chunks"].append(name)
+        else:
+            entry["file"] = f"gen-{number:06d}.bak"
+            self._write(os.path.join(self.directory, entry["file"]), payload, self.compression)
+        self.generations.append(entry)
+        self._prune()
+        self._write_index()
+        return number
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Returns the kept generations, oldest first (generation, time, size, kind and seq).
+        """
+        return [{"generation": entry["generation"], "time": entry["time"], "size": entry["size"],
+                 "kind": "delta" if "chunks" in entry else "full", "seq": entry.get("seq")}
+                for entry in self.generations]
+
+    def find(self, generation: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns the entry of a generation (the latest one if None; -1, -2... count from the latest).
+        """
+        if not self.generations:
+            return None
+        if generation is None:
+            return self.generations[-1]
+        if generation < 0:
+            return self.generations[generation] if -generation <= len(self.generations) else None
+        for entry in self.generations:
+            if entry["generation"] == generation:
+                return entry
+        return None
+
+    def read(self, entry: Dict[str, Any]) -> bytes:
+        """
+        Reads the content of a generation back, checking its hash.
+
+        Args:
+            entry (Dict[str, Any]): The generation entry (see find()).
+
+        Returns:
+            bytes: The serialized database.
+
+        Raises:
+            ValueError: If the stored content doesn't match the recorded hash.
+        """
+        if "chunks" in entry:
+            parts = []
+            for name in entry["chunks"]:
+                with open(os.path.join(self.chunk_directory, name), 'rb') as file:
+                    parts.append(decompress(file.read()))
+            payload = b"".join(parts)
+        else:
+            with open(os.path.join(self.directory, entry["file"]), 'rb') as file:
+                payload = read_compressed(file)
+        if hashlib.sha256(payload).hexdigest() != entry["hash"]:
+            raise ValueError(f"\033[91m#bugs\033[0m Backup generation {entry['generation']} is corrupted.")
+        return payload
+
+    def _split(self, payload: bytes) -> List[bytes]:
+        """
+        Cuts the payload into content-defined chunks: after a line whose CRC ends with
+        five zero bits (once the chunk is CHUNK_MIN long), or at CHUNK_MAX bytes.
+        Lines longer than CHUNK_MIN (compact, orjson and msgpack payloads are one long
+        line) are cut by _cut_line first. Inserting or removing data only changes the
+        chunk it falls in.
+        """
+        chunks = []
+        current: List[bytes] = []
+        size = 0
+        lines = payload.split(b"\n")
+        for position, line in enumerate(lines):
+            if position < len(lines) - 1:
+                line += b"\n"
+            if len(line) > self.CHUNK_MIN:
+                if current:
+                    chunks.append(b"".join(current))
+                    current, size = [], 0
+                *pieces, line = self._cut_line(line)
+                chunks.extend(pieces)
+            current.append(line)
+            size += len(line)
+            if size >= self.CHUNK_MAX or (size >= self.CHUNK_MIN and not zlib.crc32(line) & 31):
+                chunks.append(b"".join(current))
+                current, size = [], 0
+        if current:
+            chunks.append(b"".join(current))
+        return [chunk for chunk in chunks if chunk]
+
+    def _cut_line(self, line: bytes) -> List[bytes]:
+        """
+        Cuts a long line where a gear rolling hash of its last 32 bytes has the CUT_MASK
+        bits clear, at least CHUNK_MIN and at most CHUNK_MAX bytes after the previous cut.
+        Only the bytes after CHUNK_MIN (and the 32 before, to fill the window) are hashed.
+        """
+        pieces = []
+        view = memoryview(line)
+        start = 0
+        mask = self.CUT_MASK
+        while len(line) - start > self.CHUNK_MIN:
+            cut = min(start + self.CHUNK_MAX, len(line))
+            rolling = 0
+            for byte in view[start + self.CHUNK_MIN - 32:start + self.CHUNK_MIN]:
+                rolling = ((rolling << 1) + _GEAR[byte]) & 0xFFFFFFFF
+            for position, byte in enumerate(view[start + self.CHUNK_MIN:cut], start + self.CHUNK_MIN):
+                if not rolling & mask:
+                    cut = position
+                    break
+                rolling = ((rolling << 1) + _GEAR[byte]) & 0xFFFFFFFF
+            pieces.append(line[start:cut])
+            start = cut
+        pieces.append(line[start:])
+        return pieces
+
+    def _prune(self) -> None:
+        """
+        Applies the retention policy and deletes what no kept generation uses anymore.
+        """
+        kept = self.generations[-self.keep:]
+        if self.max_age is not None:
+            oldest = time.time() - self.max_age
+            kept = [entry for entry in kept[:-1] if entry["time"] >= oldest] + kept[-1:]
+        dropped = [entry for entry in self.generations if entry not in kept]
+        self.generations = kept
+        if not dropped:
+            return
+        used = {name for entry in kept for name in entry.get("chunks", ())}
+        for entry in dropped:
+            paths = [os.path.join(self.chunk_directory, name) for name in entry.get("chunks", ()) if name not in used]
+            if "file" in entry:
+                paths.append(os.path.join(self.directory, entry["file"]))
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _write_index(self) -> None:
+        self._write(self.index_path, json.dumps({"format": self.FORMAT, "generations": self.generations}).encode('utf-8'))
+
+    def _write(self, path: str, payload: bytes, compression: str = 'none') -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as file:
+            write_compressed(file, payload, compression)
+            if self.fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
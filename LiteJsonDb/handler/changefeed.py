@@ -0,0 +1,285 @@
+import os
+import time
+import json
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+class ChangeFeed:
+    """
+    Persistent feed of the committed mutations, for consumers that follow the database incrementally.
+
+    Every entry has a monotonic sequence number (`seq`), the time of the change, the
+    action ("set_data", "remove_subcollection", ...), the changed path and its new value
+    (None for removals). Entries are buffered in memory and appended to a file next to
+    the database when the database is saved. Sequence numbers never go back, even after
+    the feed is trimmed, so a consumer only has to remember the last `seq` it handled.
+
+    The file starts with a small plain JSON header (`{"format": "ljdb-changes", "next_seq": N}`)
+    followed by one entry per line: its sequence number in plain text, a space, then the encoded
+    entry (lines written by older versions have no number). The byte offset of every
+    INDEX_EVERY-th entry is kept in memory, so readers seek straight to the entries they
+    ask for and skip the older ones without decoding them.
+    """
+    FORMAT = "ljdb-changes"
+    INDEX_EVERY = 256
+
+    def __init__(self, path: str, encode: Callable[[Dict[str, Any]], str], decode: Callable[[str], Dict[str, Any]],
+                 retention: Optional[int] = 10000, max_age: Optional[float] = None):
+        """
+        Initializes the ChangeFeed and reads where the stored feed ends.
+
+        Args:
+            path (str): The path of the feed file.
+            encode (Callable): Turns an entry into a single line of text (encrypted if the database is).
+            decode (Callable): Turns a line of text back into an entry.
+            retention (Optional[int], optional): Keep at most this many entries (None keeps them all). Defaults to 10000.
+            max_age (Optional[float], optional): Drop entries older than this many seconds (None keeps them). Defaults to None.
+        """
+        self.path = path
+        self.encode = encode
+        self.decode = decode
+        self.retention = retention
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []  # Lines not written yet
+        self._stored = 0  # Entries in the file
+        self._index: List[Tuple[int, int]] = []  # (seq, byte offset) of every INDEX_EVERY-th stored entry
+        self._size = 0  # Bytes in the file
+        self._signature: Optional[Tuple[int, int]] = None  # (inode, size) of the file the index describes
+        self.next_seq = 1
+        last = self._scan()
+        if last is not None:
+            try:
+                self.next_seq = max(self.next_seq, self._decode_line(last)["seq"] + 1)
+            except Exception as e:
+                print(f"\033[91m#bugs\033[0m Unreadable last change feed entry in '{self.path}': {e}")
+
+    def _is_header(self, line: str) -> bool:
+        return line.startswith('{"format"') and self.FORMAT in line
+
+    @staticmethod
+    def _split(line: str) -> Tuple[Optional[int], str]:
+        """
+        Splits a stored line into its sequence number (None for lines without one) and its encoded entry.
+        """
+        head, space, rest = line.partition(' ')
+        if space and head.isdigit():
+            return int(head), rest
+        return None, line
+
+    def _decode_line(self, line: str) -> Dict[str, Any]:
+        return self.decode(self._split(line)[1])
+
+    def _scan(self) -> Optional[str]:
+        """
+        Counts and indexes the stored entries (without decoding them) and returns the last line.
+        """
+        self._stored, self._index, self._size, self._signature = 0, [], 0, None
+        last = None
+        if not os.path.exists(self.path):
+            return last
+        with open(self.path, 'rb') as file:
+            for raw in file:
+                offset, self._size = self._size, self._size + len(raw)
+                line = raw.decode('utf-8').strip()
+                if not line:
+                    continue
+                if self._is_header(line):
+                    self.next_seq = max(self.next_seq, json.loads(line)["next_seq"])
+                    continue
+                self._stored_line(self._split(line)[0], offset)
+                last = line
+            self._signature = (os.fstat(file.fileno()).st_ino, self._size)
+        return last
+
+    def _sync(self) -> None:
+        """
+        Rebuilds the index if the file isn't the one it describes (another process appended to it or trimmed it).
+        """
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_ino, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature != self._signature:
+            self._scan()
+
+    def _stored_line(self, seq: Optional[int], offset: int) -> None:
+        """
+        Counts an entry written to the file at `offset`, indexing it if it is due.
+        """
+        if seq is not None and self._stored % self.INDEX_EVERY == 0:
+            self._index.append((seq, offset))
+        self._stored += 1
+
+    def _seek(self, since: int) -> int:
+        """
+        Returns the offset of the last indexed entry not newer than `since` (0 if there is none):
+        every entry before it is older and doesn't need to be read.
+        """
+        low, high = 0, len(self._index)
+        while low < high:
+            middle = (low + high) // 2
+            if self._index[middle][0] <= since:
+                low = middle + 1
+            else:
+                high = middle
+        return self._index[low - 1][1] if low else 0
+
+    def _lines(self, since: int) -> Iterator[str]:
+        """
+        Yields the stored and buffered lines that may hold entries newer than `since`,
+        skipping the numbered ones that don't without decoding them.
+        """
+        self._sync()
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as file:
+                file.seek(self._seek(since))
+                for raw in file:
+                    line = raw.decode('utf-8').strip()
+                    if not line or self._is_header(line):
+                        continue
+                    seq = self._split(line)[0]
+                    if seq is None or seq > since:
+                        yield line
+        for line in list(self._buffer):
+            if self._split(line)[0] > since:
+                yield line
+
+    def append(self, action: str, key: str, value: Any) -> int:
+        """
+        Adds a change to the feed. The value is encoded right away, so later in-place edits don't leak into it.
+
+        Args:
+            action (str): The mutator that made the change.
+            key (str): The changed path.
+            value (Any): The new value (None for removals).
+
+        Returns:
+            int: The sequence number of the entry.
+        """
+        with self._lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            entry = {"seq": seq, "time": time.time(), "action": action, "path": key, "value": value}
+            self._buffer.append(f"{seq} {self.encode(entry)}")
+            return seq
+
+    def flush(self, fsync: bool = False) -> None:
+        """
+        Appends the buffered entries to the feed file, trimming it when it outgrows the retention policy.
+
+        Args:
+            fsync (bool, optional): Force the entries to stable storage. Defaults to False.
+        """
+        with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            chunk = [(line + "\n").encode('utf-8') for line in lines]
+            self._sync()
+            with open(self.path, 'ab') as file:
+                file.write(b"".join(chunk))
+                if fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+                inode = os.fstat(file.fileno()).st_ino
+            for line, raw in zip(lines, chunk):
+                self._stored_line(self._split(line)[0], self._size)
+                self._size += len(raw)
+            self._signature = (inode, self._size)
+            # Trimming rewrites the file, so let it grow by half the retention first (amortized O(1) per entry).
+            if self.retention is not None and self._stored > self.retention + max(self.retention // 2, 100):
+                self._trim()
+
+    def trim(self) -> None:
+        """
+        Drops the entries that fall outside the retention policy (count and age) now.
+        """
+        with self._lock:
+            self._trim()
+
+    def _trim(self) -> None:
+        entries = self._read_file()
+        if self.max_age is not None:
+            oldest = time.time() - self.max_age
+            entries = [(entry, line) for entry, line in entries if entry["time"] >= oldest]
+        if self.retention is not None:
+            entries = entries[-self.retention:] if self.retention else []
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write((json.dumps({"format": self.FORMAT, "next_seq": self.next_seq}) + "\n").encode('utf-8'))
+            self._stored, self._index, self._size = 0, [], file.tell()
+            for entry, line in entries:
+                if self._split(line)[0] is None:
+                    line = f"{entry['seq']} {line}"  # Number the entries written by older versions
+                raw = (line + "\n").encode('utf-8')
+                file.write(raw)
+                self._stored_line(entry["seq"], self._size)
+                self._size += len(raw)
+            inode = os.fstat(file.fileno()).st_ino
+        os.replace(tmp_path, self.path)
+        self._signature = (inode, self._size)
+
+    def _read_file(self) -> List[Any]:
+        """
+        Returns the (entry, line) pairs stored in the feed file, skipping unreadable lines.
+        """
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line or self._is_header(line):
+                    continue
+                try:
+                    entries.append((self._decode_line(line), line))
+                except Exception as e:
+                    print(f"\033[91m#bugs\033[0m Skipping unreadable change feed entry in '{self.path}': {e}")
+        return entries
+
+    def stream(self, since: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the stored entries whose sequence number is greater than `since`, oldest first,
+        reading the file one line at a time from the closest indexed entry instead of loading
+        it (the age limit isn't applied). The feed is locked until the iteration ends.
+
+        Args:
+            since (int, optional): The last sequence number not to yield. Defaults to 0.
+
+        Yields:
+            Dict[str, Any]: The entries (seq, time, action, path, value).
+        """
+        with self._lock:
+            for line in self._lines(since):
+                entry = self._decode_line(line)
+                if entry["seq"] > since:
+                    yield entry
+
+    def read(self, since: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the retained entries whose sequence number is greater than `since`, oldest first.
+        Only the entries after `since` are decoded, and reading stops once `limit` are found.
+
+        Args:
+            since (int, optional): The last sequence number the reader has seen. Defaults to 0 (everything retained).
+            limit (Optional[int], optional): Return at most this many entries. Defaults to None.
+
+        Returns:
+            List[Dict[str, Any]]: The entries (seq, time, action, path, value).
+        """
+        oldest = time.time() - self.max_age if self.max_age is not None else None
+        changes = []
+        with self._lock:
+            for line in self._lines(since):
+                if limit is not None and len(changes) >= limit:
+                    break
+                try:
+                    entry = self._decode_line(line)
+                except Exception as e:
+                    print(f"\033[91m#bugs\033[0m Skipping unreadable change feed entry in '{self.path}': {e}")
+                    continue
+                if entry["seq"] > since and (oldest is None or entry["time"] >= oldest):
+                    changes.append(entry)
+        return changes
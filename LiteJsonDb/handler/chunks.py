@@ -0,0 +1,169 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+class EncryptedChunks:
+    """
+    Encrypted container format: the database is stored as a list of separately
+    encrypted chunks instead of one big token.
+
+    Each top-level collection is one chunk, except dict collections larger than
+    `chunk_records`, whose records are split into chunks of that many records.
+    The ciphertext of every chunk is cached, and a mutation only drops the cached
+    ciphertext of the chunk it touched, so saving after a one-record update only
+    encrypts that record's chunk. Chunks are encrypted and decrypted on a thread pool.
+
+    The container is a plain object (`{"format": "ljdb-chunks", "version": 1, "chunks": [...]}`);
+    collection names and record IDs only appear inside the encrypted chunks.
+    """
+    FORMAT = "ljdb-chunks"
+
+    def __init__(self, encrypt: Callable[[Any], str], decrypt: Callable[[str], Any],
+                 chunk_records: int = 10000, workers: Optional[int] = None):
+        """
+        Initializes the EncryptedChunks cache.
+
+        Args:
+            encrypt (Callable): Encrypts a JSON value into a token.
+            decrypt (Callable): Decrypts a token back into the JSON value.
+            chunk_records (int, optional): Records per chunk in large collections. Defaults to 10000.
+            workers (Optional[int], optional): Thread pool size (None lets Python choose). Defaults to None.
+        """
+        self.encrypt = encrypt
+        self.decrypt = decrypt
+        self.chunk_records = max(int(chunk_records), 1)
+        self.workers = workers
+        # collection -> {"members": list of record ID lists (None for a whole-collection chunk),
+        #                "tokens": cached ciphertext per chunk (None once stale), "where": record ID -> chunk}
+        self._state: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def is_container(cls, data: Any) -> bool:
+        """
+        Checks whether stored data is an encrypted container.
+        """
+        return isinstance(data, dict) and data.get("format") == cls.FORMAT and isinstance(data.get("chunks"), list)
+
+    def reset(self) -> None:
+        """
+        Forgets every cached ciphertext.
+        """
+        self._state.clear()
+
+    def invalidate(self, keys: List[str]) -> None:
+        """
+        Marks the chunk holding the value at `keys` as changed.
+
+        Args:
+            keys (List[str]): The path of the value that changed.
+        """
+        state = self._state.get(keys[0])
+        if state is None:
+            return
+        if len(keys) == 1 or state["members"] is None:
+            if len(keys) == 1:
+                del self._state[keys[0]]
+            else:
+                state["tokens"][0] = None
+            return
+        item_id = keys[1]
+        chunk = state["where"].get(item_id)
+        if chunk is None:
+            # A new record goes at the end, like in the dict, so the chunk order stays the record order.
+            members = state["members"]
+            if not members or len(members[-1]) >= self.chunk_records:
+                members.append([])
+                state["tokens"].append(None)
+            chunk = len(members) - 1
+            members[chunk].append(item_id)
+            state["where"][item_id] = chunk
+        state["tokens"][chunk] = None
+        state["stale"].add(item_id)
+
+    def _plan(self, name: str, collection: Any) -> Dict[str, Any]:
+        """
+        Returns the chunk layout of a collection, rebuilding it if it doesn't match the data anymore.
+        """
+        state = self._state.get(name)
+        if state is not None and state["members"] is not None:
+            # Drop removed records (only the ones a mutation touched can be gone).
+            for item_id in state["stale"]:
+                if item_id not in collection and item_id in state["where"]:
+                    chunk = state["where"].pop(item_id)
+                    state["members"][chunk].remove(item_id)
+            state["stale"] = set()
+            if not isinstance(collection, dict) or len(state["where"]) != len(collection):
+                state = None
+        elif state is not None and isinstance(collection, dict) and len(collection) > self.chunk_records:
+            state = None  # Grew past the chunk size: split it
+        if state is None:
+            if isinstance(collection, dict) and len(collection) > self.chunk_records:
+                ids = list(collection)
+                members = [ids[i:i + self.chunk_records] for i in range(0, len(ids), self.chunk_records)]
+                where = {item_id: chunk for chunk, chunk_ids in enumerate(members) for item_id in chunk_ids}
+                state = {"members": members, "tokens": [None] * len(members), "where": where, "stale": set()}
+            else:
+                state = {"members": None, "tokens": [None], "where": {}, "stale": set()}
+            self._state[name] = state
+        return state
+
+    def encode(self, db: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the container for the database, encrypting only the chunks that changed.
+
+        Args:
+            db (Dict[str, Any]): The database.
+
+        Returns:
+            Dict[str, Any]: The container to store.
+        """
+        for name in [name for name in self._state if name not in db]:
+            del self._state[name]
+        stale = []  # (state, chunk index, plaintext)
+        layout = []
+        for name, collection in db.items():
+            state = self._plan(name, collection)
+            for chunk, members in enumerate(state["members"] or [None]):
+                layout.append((state, chunk))
+                if state["tokens"][chunk] is None:
+                    if members is None:
+                        plain = {"c": name, "v": collection}
+                    else:
+                        plain = {"c": name, "r": {item_id: collection[item_id] for item_id in members}}
+                    stale.append((state, chunk, plain))
+        tokens = self._map(self.encrypt, [plain for _, _, plain in stale])
+        for (state, chunk, _), token in zip(stale, tokens):
+            state["tokens"][chunk] = token
+        return {"format": self.FORMAT, "version": 1, "chunks": [state["tokens"][chunk] for state, chunk in layout]}
+
+    def decode(self, container: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Decrypts a container back into the database and caches its ciphertexts.
+
+        Args:
+            container (Dict[str, Any]): The stored container.
+
+        Returns:
+            Dict[str, Any]: The database.
+        """
+        self.reset()
+        tokens = container["chunks"]
+        db: Dict[str, Any] = {}
+        for token, plain in zip(tokens, self._map(self.decrypt, tokens)):
+            name = plain["c"]
+            if "v" in plain:
+                db[name] = plain["v"]
+                self._state[name] = {"members": None, "tokens": [token], "where": {}, "stale": set()}
+                continue
+            records = db.setdefault(name, {})
+            records.update(plain["r"])
+            state = self._state.setdefault(name, {"members": [], "tokens": [], "where": {}, "stale": set()})
+            state["where"].update(dict.fromkeys(plain["r"], len(state["members"])))
+            state["members"].append(list(plain["r"]))
+            state["tokens"].append(token)
+        return db
+
+    def _map(self, func: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        if len(items) < 2:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(func, items))
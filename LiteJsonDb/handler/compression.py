@@ -0,0 +1,153 @@
+import io
+import gzip
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:  # Optional faster codec
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # Optional faster codec
+    lz4_frame = None
+
+COMPRESSIONS = ('none', 'gzip', 'zstd', 'lz4')
+
+# Compressed files are recognized by the magic bytes of their codec, so a database
+# can switch compression (or go back to none) and every older file keeps loading.
+_MAGIC = (
+    (b"\x1f\x8b", 'gzip'),
+    (b"\x28\xb5\x2f\xfd", 'zstd'),
+    (b"\x04\x22\x4d\x18", 'lz4'),
+)
+_PACKAGES = {'zstd': 'zstandard', 'lz4': 'lz4'}
+
+BLOCK_SIZE = 1024 * 1024  # Payloads are fed to the compressor in blocks of this size
+
+def resolve_compression(name: Optional[str]) -> str:
+    """
+    Checks a compression name and falls back to gzip (stdlib) when the optional
+    library it needs isn't installed.
+
+    Args:
+        name (Optional[str]): The requested codec (None means no compression).
+
+    Returns:
+        str: The codec that will actually be used.
+
+    Raises:
+        ValueError: If the codec is unknown.
+    """
+    if name is None:
+        return 'none'
+    if name not in COMPRESSIONS:
+        raise ValueError(f"\033[90m#bugs\033[0m Unknown compression: '{name}'!")
+    if (name == 'zstd' and zstandard is None) or (name == 'lz4' and lz4_frame is None):
+        print(f"\033[90m#info\033[0m '{name}' isn't installed, falling back to gzip. Tip: pip install {_PACKAGES[name]}")
+        return 'gzip'
+    return name
+
+def detect_compression(head: bytes) -> str:
+    """
+    Detects the codec of a stored file from its first bytes.
+
+    Args:
+        head (bytes): At least the first 4 bytes of the file.
+
+    Returns:
+        str: The codec name ('none' for uncompressed files).
+    """
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return 'none'
+
+def write_compressed(file: BinaryIO, payload: bytes, compression: str) -> None:
+    """
+    Writes a payload to an open binary file, compressing it on the way: the payload
+    is streamed through the compressor block by block, so no compressed copy of it is
+    built in memory.
+
+    Args:
+        file (BinaryIO): The destination file.
+        payload (bytes): The data to write.
+        compression (str): A codec returned by resolve_compression.
+    """
+    if compression == 'none':
+        file.write(payload)
+        return
+    if compression == 'gzip':
+        # mtime=0 keeps the output identical for identical content (backup deduplication relies on it).
+        writer = gzip.GzipFile(fileobj=file, mode='wb', compresslevel=6, mtime=0)
+    elif compression == 'zstd':
+        writer = zstandard.ZstdCompressor(level=3).stream_writer(file, closefd=False)
+    else:
+        writer = lz4_frame.LZ4FrameFile(file, mode='wb')
+    with writer:
+        view = memoryview(payload)
+        for start in range(0, len(view), BLOCK_SIZE):
+            writer.write(view[start:start + BLOCK_SIZE])
+
+def read_compressed(file: BinaryIO) -> bytes:
+    """
+    Reads an open binary file to the end, decompressing it on the way if its
+    magic bytes say it is compressed.
+
+    Args:
+        file (BinaryIO): The source file, positioned at its start.
+
+    Returns:
+        bytes: The decompressed content.
+
+    Raises:
+        ValueError: If the file needs a codec that isn't installed.
+    """
+    head = file.read(4)
+    compression = detect_compression(head)
+    if compression == 'none':
+        return head + file.read()
+    file.seek(-len(head), io.SEEK_CUR)
+    if compression == 'gzip':
+        with gzip.GzipFile(fileobj=file, mode='rb') as reader:
+            return reader.read()
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("\033[91m#bugs\033[0m This file was saved with zstd compression. Tip: pip install zstandard")
+        with zstandard.ZstdDecompressor().stream_reader(file, closefd=False) as reader:
+            return b"".join(iter(lambda: reader.read(BLOCK_SIZE), b""))
+    if lz4_frame is None:
+        raise ValueError("\033[91m#bugs\033[0m This file was saved with lz4 compression. Tip: pip install lz4")
+    with lz4_frame.LZ4FrameFile(file, mode='rb') as reader:
+        return reader.read()
+
+def read_file(path: str) -> bytes:
+    """
+    Reads a whole file, decompressing it if needed.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        bytes: The decompressed content.
+    """
+    with open(path, 'rb') as file:
+        return read_compressed(file)
+
+def compress(payload: bytes, compression: str) -> bytes:
+    """
+    Compresses a payload in memory (for small blobs such as backup chunks).
+    """
+    if compression == 'none':
+        return payload
+    buffer = io.BytesIO()
+    write_compressed(buffer, payload, compression)
+    return buffer.getvalue()
+
+def decompress(raw: bytes) -> bytes:
+    """
+    Decompresses a blob written by compress() (uncompressed blobs are returned as they are).
+    """
+    if detect_compression(raw[:4]) == 'none':
+        return raw
+    return read_compressed(io.BytesIO(raw))
@@ -1,8 +1,31 @@
 import os
-import json
+import atexit
 import shutil
 import logging
-from typing import Any, Dict, Optional
+import weakref
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from .wal import WriteAheadLog
+from .shards import ShardStore
+from .chunks import EncryptedChunks
+from .changefeed import ChangeFeed
+from .filelock import InterProcessLock
+from .backups import BackupGenerations
+from .serializer import encode_payload, decode_payload, fast_dumps, fast_loads
+from .compression import write_compressed, read_compressed
+
+def _flush_at_exit(db_ref: "weakref.ref") -> None:
+    """
+    atexit hook: flushes a database that still has unsaved changes when the interpreter exits.
+    """
+    db = db_ref()
+    if db is not None:
+        try:
+            db.close()
+        except Exception as e:
+            print(f"\033[91m#bugs\033[0m Could not flush the database on exit: {e}")
 
 class DatabaseOperations:
     """
@@ -10,79 +33,895 @@ class DatabaseOperations:
 
     This class provides methods to manage the database file, including loading data from the file,
     saving data to the file, creating backups, and restoring from backups.
+
+    Three storage modes are available:
+        - 'file': every save rewrites the whole JSON file (the classic behavior).
+        - 'wal': every mutation is appended as a small record to a log next to the
+          snapshot, and the log is folded into a fresh snapshot (compaction) once it
+          grows past a size or ratio threshold.
+        - 'sharded': each top-level collection lives in its own file under a
+          directory named after the database, and saves and backups only touch
+          the collections that changed.
+
+    Three durability policies decide when changes reach the disk:
+        - 'sync': every mutation is saved before the call returns (the classic behavior).
+        - 'interval': a background thread flushes unsaved changes every `flush_interval`
+          milliseconds, or as soon as `flush_every` mutations are waiting.
+        - 'manual': changes are only saved by `flush()` or `close()`.
+    In the last two modes, pending changes are also flushed when the interpreter exits.
     """
-    def __init__(self, enable_log: bool = False, auto_backup: bool = False):
+    # Backup generations hold the whole database, which the 'wal' and 'sharded' modes never
+    # write on a save: there they are taken at most this often unless backup_interval says otherwise.
+    GENERATION_INTERVAL = 60.0
+    def __init__(self, enable_log: bool = False, auto_backup: bool = False, storage: str = 'file',
+                 wal_compact_bytes: int = 4 * 1024 * 1024, wal_compact_ratio: float = 1.0,
+                 background_compaction: bool = True, durability: str = 'sync',
+                 flush_interval: int = 1000, flush_every: int = 1000, fsync: bool = False,
+                 serializer: str = 'json', lazy: bool = False, chunk_records: int = 10000,
+                 change_feed: bool = False, feed_retention: Optional[int] = 10000, feed_max_age: Optional[float] = None,
+                 multiprocess: bool = False, lock_timeout: Optional[float] = 10.0,
+                 backup_generations: int = 1, backup_max_age: Optional[float] = None,
+                 backup_interval: float = 0.0, backup_delta: bool = False, compression: str = 'none'):
         """
         Initializes the DatabaseOperations class.
 
         Args:
             enable_log (bool, optional): Whether to enable logging. Defaults to False.
             auto_backup (bool, optional): Whether to enable automatic backups. Defaults to False.
+            storage (str, optional): The storage mode ('file', 'wal' or 'sharded'). Defaults to 'file'.
+            wal_compact_bytes (int, optional): Compact once the log reaches this size in bytes. Defaults to 4 MB.
+            wal_compact_ratio (float, optional): Compact once the log is this many times larger
+                than the snapshot. Defaults to 1.0.
+            background_compaction (bool, optional): Write the compacted snapshot from a background
+                thread instead of the calling one. Defaults to True.
+            durability (str, optional): When changes are saved ('sync', 'interval' or 'manual'). Defaults to 'sync'.
+            flush_interval (int, optional): In 'interval' mode, milliseconds between background flushes. Defaults to 1000.
+            flush_every (int, optional): In 'interval' mode, flush right away once this many mutations
+                are waiting (0 disables it). Defaults to 1000.
+            fsync (bool, optional): Call os.fsync after each write so saved data survives a power loss. Defaults to False.
+            serializer (str, optional): The on-disk encoding ('json', 'compact', 'orjson' or 'msgpack'),
+                already resolved by serializer.resolve_serializer. Defaults to 'json'.
+            lazy (bool, optional): In 'sharded' mode, only load a collection the first time it is
+                accessed. Defaults to False.
+            chunk_records (int, optional): In an encrypted snapshot, collections larger than this are
+                split into chunks of this many records. Defaults to 10000.
+            change_feed (bool, optional): Keep a persistent feed of the changes, read with changes(). Defaults to False.
+            feed_retention (Optional[int], optional): Number of feed entries kept (None keeps them all). Defaults to 10000.
+            feed_max_age (Optional[float], optional): Drop feed entries older than this many seconds. Defaults to None.
+            multiprocess (bool, optional): Share the database file with other processes: every write holds
+                an inter-process lock and starts from their latest save. Defaults to False.
+            lock_timeout (Optional[float], optional): Seconds to wait for the inter-process lock (None waits forever).
+                Defaults to 10.0.
+            backup_generations (int, optional): Number of backup generations to keep. Defaults to 1 (the single backup file).
+            backup_max_age (Optional[float], optional): Drop backup generations older than this many seconds. Defaults to None.
+            backup_interval (float, optional): Back up at most once every this many seconds instead of on every save.
+                Defaults to 0.0 (GENERATION_INTERVAL with 'wal' or 'sharded' storage and backup generations).
+            backup_delta (bool, optional): Store each generation as the chunks that changed since the previous ones. Defaults to False.
+            compression (str, optional): The codec the database and its backups are written with ('none', 'gzip',
+                'zstd' or 'lz4'), already resolved by compression.resolve_compression. Defaults to 'none'.
         """
         self.enable_log = enable_log
         self.auto_backup = auto_backup
+        self.storage = storage
+        self.wal_compact_bytes = wal_compact_bytes
+        self.wal_compact_ratio = wal_compact_ratio
+        self.background_compaction = background_compaction
+        self._pending_changes: List[str] = []
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._snapshot_size = 0
+        self._wal = None
+        if self.storage == 'wal':
+            self._wal = WriteAheadLog(self.filename + ".wal", self._encode_change, self._decode_change)
+        self._shards = None
+        self._backup_shards = None
+        self._shard_files: Dict[str, str] = {}  # Collection name -> shard file, as listed in the manifest
+        self._shards_since_backup = set()  # Shards written since the last backup
+        self._backup_synced = False  # Whether the backup directory mirrors every shard yet
+        self.lazy = lazy
+        self._unloaded = set()  # Collections listed in the manifest but not loaded yet (lazy mode)
+        if self.storage == 'sharded':
+            self._shards = ShardStore(os.path.splitext(self.filename)[0], compression)
+            self._backup_shards = ShardStore(os.path.splitext(self.backup_filename)[0], compression)
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.serializer = serializer
+        self.compression = compression
+        self._chunks = EncryptedChunks(self._encrypt, self._decrypt, chunk_records)
+        self._process_lock = InterProcessLock(self.filename + ".lock", lock_timeout) if multiprocess else None
+        self._file_signature: Optional[Tuple[int, int, int]] = None  # (inode, size, mtime) of the file we last loaded or saved
+        self._generation = 0  # Generation counter of the lock file when we last loaded or saved
+        self._backups = None  # Generation store; None keeps the classic single backup file
+        if auto_backup and (backup_generations > 1 or backup_max_age or backup_interval or backup_delta):
+            if not backup_interval and self.storage != 'file':
+                backup_interval = self.GENERATION_INTERVAL
+            self._backups = BackupGenerations(os.path.splitext(self.backup_filename)[0] + ".generations",
+                                              backup_generations, backup_max_age, backup_interval, backup_delta, fsync,
+                                              compression)
+        self._feed = None
+        if change_feed:
+            self._feed = ChangeFeed(self.filename + ".changes", self._encode_change, self._decode_change,
+                                    feed_retention, feed_max_age)
+        self._unsaved_changes = 0
+        self._saving = False  # A save is running under a downgraded (read) hold
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_stop = threading.Event()
+        if self.durability != 'sync':
+            atexit.register(_flush_at_exit, weakref.ref(self))
 
     def _load_db(self) -> None:
         """
         Loads the database from the JSON file, or creates a new one if it doesn't exist.
+
+        The file format (pretty JSON, compact JSON or a binary serializer) is detected
+        from its header, and compression from its magic bytes, so files written with
+        any serializer or codec (or none) keep loading.
+        In 'wal' mode, the logged mutations are replayed on top of the snapshot.
+        In 'sharded' mode, every collection listed in the manifest is loaded.
         """
+        if self.storage == 'sharded':
+            self._load_shards()
+            return
         if not os.path.exists(self.filename):
             try:
-                with open(self.filename, 'w') as file:
-                    json.dump({}, file)
+                with open(self.filename, 'wb') as file:
+                    write_compressed(file, encode_payload(self.serializer, {}), self.compression)
                 if self.enable_log:
                     logging.info(f"Database file created: {self.filename}")
             except OSError as e:
                 print(f"\033[91m#bugs\033[0m Unable to create database file: {e}")
                 raise
         try:
-            with open(self.filename, 'r') as file:
-                data = json.load(file)
-                if self.crypted and data:
-                    self.db = self._decrypt(data)
-                else:
-                    self.db = data
+            with open(self.filename, 'rb') as file:
+                signature = self._signature(file.fileno())
+                raw = read_compressed(file)
+            self.db = self._decode_snapshot(decode_payload(raw))
+            self._snapshot_size = len(raw)
+            if self._process_lock is not None:
+                self._file_signature = signature
+                self._generation = self._process_lock.generation()
             if self.enable_log:
                 logging.info(f"Database loaded from: {self.filename}")
-        except (OSError, json.JSONDecodeError) as e:
+        except (OSError, ValueError) as e:
             print(f"\033[91m#bugs\033[0m Unable to load database file: {e}")
             raise
 
+        if self.storage == 'wal':
+            interrupted = os.path.exists(self._wal.compacting_path)
+            replayed = 0
+            for path in (self._wal.compacting_path, self._wal.path):
+                for record in self._wal.read(path):
+                    self._apply_change(record)
+                    replayed += 1
+            if self.enable_log and replayed:
+                logging.info(f"Replayed {replayed} logged changes from: {self._wal.path}")
+            if interrupted:
+                # A previous compaction never finished; fold everything into a snapshot now.
+                self._compact_wal(wait=True)
+
+    def _serialize_db(self) -> bytes:
+        """
+        Serializes the current database into the bytes stored in the snapshot file.
+        Collections lazy loading hasn't loaded are read from their shards for the occasion
+        and stay unloaded.
+        """
+        self._refresh()
+        data = self.db
+        if self._unloaded:
+            data = {name: self._decode_shard(name, self._shards.read(filename)) if name in self._unloaded else self.db[name]
+                    for name, filename in self._shard_files.items() if name in self._unloaded or name in self.db}
+            data.update((name, value) for name, value in self.db.items() if name not in data)
+        if self.crypted:
+            data = self._chunks.encode(data)
+        return encode_payload(self.serializer, data)
+
+    def _export_payload(self) -> bytes:
+        """
+        Returns the whole database as a single snapshot file would hold it, unsaved changes
+        included, without writing anything. In 'file' storage with nothing left to save and no
+        save in progress, the file is read as it is (compressed or not) and writers aren't held
+        up at all; otherwise they only wait while the data is serialized (after any running save).
+        """
+        file = None
+        with self._read_lock:
+            if (self.storage == 'file' and not self._unsaved_changes and not self._saving
+                    and os.path.exists(self.filename)):
+                file = open(self.filename, 'rb')  # A save replaces the file, so this handle keeps a consistent copy
+        if file is not None:
+            with file:
+                return file.read()
+        with self._write_lock:
+            return self._serialize_db()
+
+    def _decode_snapshot(self, data: Any) -> Dict[str, Any]:
+        """
+        Turns the stored snapshot back into the database: an encrypted container (decrypted
+        chunk by chunk, its ciphertexts kept for the next save), a single encrypted token
+        (older format) or plain data. Ciphertexts written with another salt or cost aren't
+        kept, so the next save re-encrypts every chunk with the current key.
+        """
+        self._chunks.reset()
+        if self.crypted and EncryptedChunks.is_container(data):
+            self._kdf_stale = False
+            data = self._chunks.decode(data)
+            if self._kdf_stale:
+                self._chunks.reset()
+            return data
+        if self.crypted and isinstance(data, str):
+            return self._decrypt(data)
+        return data
+
+    def _write_snapshot(self, payload: bytes) -> None:
+        """
+        Atomically replaces the snapshot file with the given payload.
+
+        Args:
+            payload (bytes): The serialized database.
+        """
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, 'wb') as file:
+            write_compressed(file, payload, self.compression)
+            self._fsync(file)
+        os.replace(tmp_filename, self.filename)
+        self._snapshot_size = len(payload)
+
     def _save_db(self) -> None:
         """
         Saves the database to the JSON file.
+
+        In 'wal' mode, only the pending mutation records are appended to the log,
+        and a compaction is triggered when the log grows too large.
+        In 'sharded' mode, only the collections that changed are rewritten.
         """
+        if self.storage == 'sharded':
+            try:
+                self._save_shards()
+                if self.enable_log:
+                    logging.info(f"Database shards saved to {self._shards.directory}")
+            except OSError as e:
+                print(f"\033[91m#bugs\033[0m Could not save database: {e}")
+                raise
+            self._backup_generation()
+            return
+        self._dirty_shards.clear()
+        if self.storage == 'wal':
+            try:
+                if self._pending_changes:
+                    self._wal.append(self._pending_changes, self.fsync)
+                    self._pending_changes = []
+                if self._wal_needs_compaction():
+                    self._compact_wal()
+            except OSError as e:
+                print(f"\033[91m#bugs\033[0m Could not append to the database log: {e}")
+                raise
+            self._backup_generation()
+            return
         try:
-            data = self.db if not self.crypted else self._encrypt(self.db)
-            with open(self.filename, 'w') as file:
-                json.dump(data, file, indent=4)
+            payload = self._serialize_db()
+            self._write_snapshot(payload)
+            if self._process_lock is not None:
+                self._generation = self._process_lock.bump()
+                self._file_signature = self._signature()
             if self.enable_log:
                 logging.info(f"Database saved to {self.filename}")
         except OSError as e:
             print(f"\033[91m#bugs\033[0m Could not save database: {e}")
             raise
-    
+        self._backup_generation(payload)
+
+    def _fsync(self, file) -> None:
+        """
+        Forces a written file to stable storage when fsync is enabled.
+        """
+        if self.fsync:
+            file.flush()
+            os.fsync(file.fileno())
+
+    # ==================================================
+    #                MULTI-PROCESS ACCESS
+    # --------------------------------------------------
+    # ==================================================
+
+    def _signature(self, fileno: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+        """
+        Returns the (inode, size, mtime) of the database file, which changes whenever it is replaced.
+        """
+        try:
+            st = os.fstat(fileno) if fileno is not None else os.stat(self.filename)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _reload(self) -> None:
+        """
+        Reloads the database another process saved, with its indexes.
+        """
+        self._load_db()
+        self._rebuild_indexes()
+        if self.enable_log:
+            logging.info(f"Database reloaded after a change by another process: {self.filename}")
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """
+        Holds the inter-process lock for a write (no-op unless multiprocess=True).
+
+        The outermost acquisition reloads the database first if another process saved it
+        since we last loaded or saved it, so the write starts from the latest data and
+        the save that follows, still under the lock, can't overwrite anyone's update.
+        """
+        if self._process_lock is None:
+            yield
+            return
+        if self._process_lock.acquire():
+            try:
+                if self._process_lock.generation() != self._generation or self._signature() != self._file_signature:
+                    self._reload()
+            except BaseException:
+                self._process_lock.release()
+                raise
+        try:
+            yield
+        finally:
+            self._process_lock.release()
+
+    def _refresh(self) -> None:
+        """
+        Before a read, reloads the database if another process replaced the file.
+
+        Only the file's inode, size and mtime are compared (one stat call), so
+        nothing is parsed unless the file actually changed.
+        """
+        if self._process_lock is None or self._process_lock.depth:
+            return
+        if self._signature() == self._file_signature:
+            return
+        with self._write_lock:
+            if not self._process_lock.depth and self._signature() != self._file_signature:
+                self._reload()
+
+    # ==================================================
+    #                DURABILITY
+    # --------------------------------------------------
+    # ==================================================
+
+    def _persist(self) -> None:
+        """
+        Backs up and saves a committed change, or defers it according to the durability policy.
+        """
+        if self.durability == 'sync':
+            self._save_due = True  # Saved by _mutating once the mutation is complete
+            return
+        self._unsaved_changes += 1
+        if self.durability == 'interval':
+            if self.flush_every and self._unsaved_changes >= self.flush_every:
+                self.flush()
+            elif self._flusher is None or not self._flusher.is_alive():
+                self._flusher_stop.clear()
+                self._flusher = threading.Thread(target=self._flush_loop, name="LiteJsonDb-flusher", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        """
+        Background thread body for the 'interval' durability policy.
+        """
+        while not self._flusher_stop.wait(self.flush_interval / 1000):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"\033[91m#bugs\033[0m Background flush failed: {e}")
+                if self.enable_log:
+                    logging.error(f"Background flush failed: {e}")
+
+    def flush(self) -> None:
+        """
+        Writes every unsaved change to disk (backup included). Does nothing if nothing changed.
+        """
+        downgraded = False
+        self._write_lock.acquire()
+        try:
+            unsaved = self._unsaved_changes
+            if not unsaved:
+                return
+            self._unsaved_changes = 0
+            self._saving = True
+            # Readers may go on while we write to disk (the save only reads the data).
+            downgraded = self._rw_lock.downgrade()
+            try:
+                self._backup_db()
+                self._save_db()
+            except BaseException:
+                self._unsaved_changes += unsaved  # Still unsaved: the next flush (or close) retries
+                raise
+            self._flush_feed()
+        finally:
+            self._saving = False
+            if downgraded:
+                self._read_lock.release()
+            else:
+                self._write_lock.release()
+
+    def close(self) -> None:
+        """
+        Stops the background flusher, flushes unsaved changes, waits for a running compaction
+        and delivers the observer events still queued.
+        """
+        if self._flusher is not None:
+            self._flusher_stop.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        self._flush_feed()
+        if self._backups is not None and self._backups.pending:
+            with self._write_lock:
+                self._backup_generation(final=True)
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        self._dispatcher.close()
+
+    # ==================================================
+    #                CHANGE FEED
+    # --------------------------------------------------
+    # ==================================================
+
+    def _flush_feed(self) -> None:
+        """
+        Writes the buffered change feed entries to disk (no-op without a feed).
+        """
+        if self._feed is not None:
+            try:
+                self._feed.flush(self.fsync)
+            except OSError as e:
+                print(f"\033[91m#bugs\033[0m Could not write the change feed: {e}")
+                if self.enable_log:
+                    logging.error(f"Could not write the change feed: {e}")
+
+    def changes(self, since: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the changes committed after sequence number `since`, oldest first.
+
+        Each change is a dict with `seq`, `time`, `action`, `path` and `value` (None for removals).
+        A consumer remembers the `seq` of the last change it handled and passes it back next time.
+        If changes it never saw were already trimmed by the retention policy, a message tells it
+        to re-read the whole database.
+
+        Example:
+            seq = db.last_seq()
+            ...
+            for change in db.changes(since=seq):
+                seq = change["seq"]
+
+        Args:
+            since (int, optional): The last sequence number already handled. Defaults to 0.
+            limit (Optional[int], optional): Return at most this many changes. Defaults to None.
+
+        Returns:
+            List[Dict[str, Any]]: The changes (empty if the feed is disabled).
+        """
+        if self._feed is None:
+            print("\033[91m#bugs\033[0m The change feed is disabled. Open the database with JsonDB(change_feed=True).")
+            return []
+        entries = self._feed.read(since, limit)
+        first = entries[0]["seq"] if entries else self._feed.next_seq
+        if since and first > since + 1:
+            print(f"\033[90m#info\033[0m Changes {since + 1} to {first - 1} were trimmed from the feed; re-read the database to catch up.")
+        return entries
+
+    def last_seq(self) -> int:
+        """
+        Returns the sequence number of the latest change (0 if nothing changed yet or the feed is disabled).
+        """
+        return self._feed.next_seq - 1 if self._feed is not None else 0
+
+    # ==================================================
+    #                WRITE-AHEAD LOG
+    # --------------------------------------------------
+    # ==================================================
+
+    def _encode_change(self, record: Dict[str, Any]) -> str:
+        """
+        Encodes a mutation record as a single log line (encrypted if the database is).
+        """
+        if self.crypted:
+            return self._encrypt(record)
+        return fast_dumps(record)
+
+    def _decode_change(self, line: str) -> Dict[str, Any]:
+        """
+        Decodes a log line back into a mutation record.
+        """
+        if self.crypted and not line.startswith('{'):
+            return self._decrypt(line)
+        return fast_loads(line)
+
+    def _record_change(self, keys: List[str]) -> None:
+        """
+        Records the new state of the value at `keys` so it can be appended to the log.
+
+        The value is captured now (not at save time) so later in-place edits can't leak
+        into an earlier record. A missing value is recorded as a deletion.
+
+        Args:
+            keys (List[str]): The path of the value that changed.
+        """
+        if self.storage != 'wal':
+            return
+        data = self.db
+        for k in keys:
+            if isinstance(data, dict) and k in data:
+                data = data[k]
+            else:
+                self._pending_changes.append(self._encode_change({"op": "del", "path": keys}))
+                return
+        self._pending_changes.append(self._encode_change({"op": "set", "path": keys, "value": data}))
+
+    def _apply_change(self, record: Dict[str, Any]) -> None:
+        """
+        Applies a logged mutation record to the in-memory database.
+
+        Args:
+            record (Dict[str, Any]): The record to apply.
+        """
+        keys = record["path"]
+        self._chunks.invalidate(keys)
+        data = self.db
+        if record["op"] == "set":
+            for k in keys[:-1]:
+                data = data.setdefault(k, {})
+            data[keys[-1]] = record["value"]
+        elif record["op"] == "del":
+            for k in keys[:-1]:
+                if not isinstance(data, dict) or k not in data:
+                    return
+                data = data[k]
+            if isinstance(data, dict):
+                data.pop(keys[-1], None)
+
+    def _wal_needs_compaction(self) -> bool:
+        """
+        Checks whether the log has grown past the configured thresholds.
+        """
+        log_size = self._wal.size()
+        if log_size >= self.wal_compact_bytes:
+            return True
+        # Don't compact tiny databases on every write just because the ratio is met.
+        return log_size >= 64 * 1024 and log_size >= self.wal_compact_ratio * self._snapshot_size
+
+    def _compact_wal(self, wait: bool = False) -> None:
+        """
+        Folds the log into a fresh snapshot.
+
+        The database is serialized in the calling thread so the snapshot is consistent;
+        writing it to disk happens in a background thread unless `wait` is True or
+        background compaction is disabled.
+
+        Args:
+            wait (bool, optional): Block until the new snapshot is on disk. Defaults to False.
+        """
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            if not wait:
+                return
+            self._compaction_thread.join()
+        if self._pending_changes:
+            self._wal.append(self._pending_changes, self.fsync)
+            self._pending_changes = []
+        payload = self._serialize_db()
+        self._wal.rotate()
+        if wait or not self.background_compaction:
+            self._finish_compaction(payload)
+        else:
+            self._compaction_thread = threading.Thread(target=self._finish_compaction, args=(payload,), name="LiteJsonDb-compaction")
+            self._compaction_thread.start()
+
+    def _finish_compaction(self, payload: bytes) -> None:
+        """
+        Writes the compacted snapshot and drops the log it replaces.
+
+        Args:
+            payload (bytes): The serialized database.
+        """
+        try:
+            self._write_snapshot(payload)
+            self._wal.discard_compacted()
+            if self.enable_log:
+                logging.info(f"Database log compacted into {self.filename}")
+        except OSError as e:
+            # The rotated log is kept, so the next load or compaction will pick it up again.
+            print(f"\033[91m#bugs\033[0m Log compaction failed: {e}")
+            if self.enable_log:
+                logging.error(f"Log compaction failed: {e}")
+
+    def compact(self) -> None:
+        """
+        Forces a compaction of the mutation log into the snapshot (no-op in 'file' mode)
+        and waits for it to finish.
+        """
+        if self.storage == 'wal':
+            with self._write_lock:
+                self._compact_wal(wait=True)
+
+    # ==================================================
+    #                SHARDED STORAGE
+    # --------------------------------------------------
+    # ==================================================
+
+    def _load_shards(self) -> None:
+        """
+        Loads every collection listed in the shard manifest.
+
+        If there is no manifest yet but a single-file database exists, it is split
+        into shards (the original file is left untouched).
+        """
+        try:
+            if self._shards.exists():
+                self._shard_files = self._shards.read_manifest()
+                self.db = {}
+                if self.lazy:
+                    self._unloaded = set(self._shard_files)
+                else:
+                    for name, filename in self._shard_files.items():
+                        self.db[name] = self._decode_shard(name, self._shards.read(filename))
+                if self.enable_log:
+                    logging.info(f"Database loaded from shards in: {self._shards.directory}")
+                return
+            self.db = {}
+            self._shard_files = {}
+            if os.path.exists(self.filename):
+                with open(self.filename, 'rb') as file:
+                    self.db = self._decode_snapshot(decode_payload(read_compressed(file)))
+                print(f"\033[90m#info\033[0m Splitting '{self.filename}' into shards in '{self._shards.directory}'.")
+            self._dirty_shards.update(self.db)
+            self._save_shards()
+            if self.enable_log:
+                logging.info(f"Database shards created in: {self._shards.directory}")
+        except (OSError, ValueError) as e:
+            print(f"\033[91m#bugs\033[0m Unable to load database shards: {e}")
+            raise
+
+    def _ensure_loaded(self, name: str) -> None:
+        """
+        Loads a collection from its shard if lazy loading hasn't done it yet.
+
+        Args:
+            name (str): The top-level collection name.
+        """
+        self._refresh()
+        if name not in self._unloaded:
+            return
+        with self._write_lock:
+            if name in self._unloaded:
+                try:
+                    self.db[name] = self._decode_shard(name, self._shards.read(self._shard_files[name]))
+                except (OSError, ValueError) as e:
+                    print(f"\033[91m#bugs\033[0m Unable to load collection '{name}': {e}")
+                    raise
+                self._unloaded.discard(name)
+                self._index_values([name])
+                if self.enable_log:
+                    logging.info(f"Collection loaded: {name}")
+
+    def _load_all(self) -> None:
+        """
+        Loads every collection lazy loading hasn't loaded yet.
+        """
+        self._refresh()
+        for name in list(self._unloaded):
+            self._ensure_loaded(name)
+
+    def unload(self, collection: Optional[str] = None) -> None:
+        """
+        Drops a collection (or every collection) from memory in lazy mode.
+        It will be read again from its shard on next access. Unsaved changes are flushed first.
+
+        Args:
+            collection (Optional[str], optional): The collection to unload. Defaults to None (all of them).
+        """
+        if not self.lazy:
+            print("\033[91m#bugs\033[0m unload() needs lazy=True and storage='sharded'.")
+            return
+        with self._write_lock:
+            if self._batch_depth:
+                print("\033[91m#bugs\033[0m Can't unload collections inside a batch.")
+                return
+            if self._dirty_shards:
+                self.flush()
+                if self._dirty_shards:
+                    self._save_db()
+            names = [collection] if collection is not None else list(self.db)
+            for name in names:
+                if name in self.db and name in self._shard_files:
+                    self._unindex_values([name])
+                    del self.db[name]
+                    self._unloaded.add(name)
+
+    def _decode_shard(self, name: str, raw: bytes) -> Any:
+        """
+        Parses a shard file into the collection it holds. A shard encrypted with another
+        salt or cost is marked dirty, so the next save re-keys it.
+        """
+        data = decode_payload(raw)
+        if not (self.crypted and isinstance(data, str)):
+            return data
+        self._kdf_stale = False
+        data = self._decrypt(data)
+        if self._kdf_stale:
+            self._dirty_shards.add(name)
+        return data
+
+    def _save_shards(self) -> None:
+        """
+        Rewrites the dirty shards, then the manifest if the set of collections changed.
+        Shards of removed collections are deleted once the manifest no longer lists them.
+        """
+        dirty, self._dirty_shards = self._dirty_shards, set()
+        removed = []
+        manifest_changed = not self._shards.exists()
+        for name in dirty:
+            if name in self.db:
+                filename = self._shard_files.get(name)
+                if filename is None:
+                    filename = self._shard_files[name] = ShardStore.shard_filename(name)
+                    manifest_changed = True
+                data = self.db[name] if not self.crypted else self._encrypt(self.db[name])
+                self._shards.write(filename, encode_payload(self.serializer, data), self.fsync)
+            elif name in self._shard_files:
+                removed.append(self._shard_files.pop(name))
+                manifest_changed = True
+        if manifest_changed:
+            self._shards.write_manifest(self._shard_files, self.fsync)
+        for filename in removed:
+            self._shards.remove(filename)
+        self._shards_since_backup.update(dirty)
+
+    def _backup_shards_db(self) -> None:
+        """
+        Brings the backup directory in line with the shards currently on disk.
+
+        The first backup of a session copies every shard; after that, only the shards
+        about to be rewritten and the ones written since the last backup are copied.
+        """
+        if self._backup_synced:
+            names = self._dirty_shards | self._shards_since_backup
+            filenames = [self._shard_files[name] for name in names if name in self._shard_files]
+        else:
+            filenames = list(self._shard_files.values())
+        self._shards.copy_to(self._backup_shards, filenames)
+        self._shards_since_backup = set()
+        self._backup_synced = True
+
+    # ==================================================
+    #                BACKUP & RESTORE
+    # --------------------------------------------------
+    # ==================================================
+
     def _backup_db(self) -> None:
         """
-        Creates a backup of the database.
+        Creates a backup of the database (generations are taken after the save instead, see _backup_generation).
         """
-        if self.auto_backup:
+        if self.auto_backup and self._backups is None:
             try:
+                if self.storage == 'sharded':
+                    self._backup_shards_db()
+                    if self.enable_log:
+                        logging.info(f"Backup created: {self._backup_shards.directory}")
+                    return
                 shutil.copy(self.filename, self.backup_filename)
+                if self.storage == 'wal':
+                    self._backup_wal()
                 if self.enable_log:
                     logging.info(f"Backup created: {self.backup_filename}")
             except OSError as e:
                 print(f"\033[91m#bugs\033[0m Unable to create backup: {e}")
                 raise
 
-    def _restore_db(self) -> None:
+    def _backup_wal(self) -> None:
+        """
+        Copies the mutation log next to the backup so the backup holds the full state.
+        """
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            self._compaction_thread.join()
+            shutil.copy(self.filename, self.backup_filename)
+        backup_wal = self.backup_filename + ".wal"
+        if os.path.exists(self._wal.path):
+            shutil.copy(self._wal.path, backup_wal)
+        elif os.path.exists(backup_wal):
+            os.remove(backup_wal)
+
+    def _backup_generation(self, payload: Optional[bytes] = None, final: bool = False) -> None:
+        """
+        Adds a backup generation after a save, if one is due and the content changed.
+
+        Args:
+            payload (Optional[bytes], optional): The snapshot just written ('file' mode); serialized here otherwise.
+            final (bool, optional): Back up the changes left since the last generation, whatever the interval. Defaults to False.
+        """
+        if self._backups is None:
+            return
+        if final:
+            if not self._backups.pending:
+                return
+        else:
+            self._backups.pending = True
+            if not self._backups.due():
+                return
+        try:
+            if payload is None:
+                if self.storage == 'file':
+                    with open(self.filename, 'rb') as file:
+                        payload = read_compressed(file)
+                else:
+                    payload = self._serialize_db()
+            number = self._backups.add(payload, self._feed.next_seq - 1 if self._feed is not None else None)
+            if number is not None and self.enable_log:
+                logging.info(f"Backup generation {number} created in {self._backups.directory}")
+        except OSError as e:
+            print(f"\033[91m#bugs\033[0m Unable to create backup: {e}")
+            raise
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """
+        Lists the backup generations, oldest first.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per generation (generation, time, size, kind),
+                or an empty list if only the classic single backup is kept.
+        """
+        if self._backups is None:
+            return []
+        return self._backups.list()
+
+    def restore_backup(self, generation: Optional[int] = None) -> None:
+        """
+        Restores the database from a backup and saves it as the current state.
+
+        Args:
+            generation (Optional[int], optional): The generation to restore (see list_backups();
+                -1 is the latest, -2 the one before...). Defaults to None (the latest backup).
+        """
+        with self._write_lock, self._exclusive():
+            if self._batch_depth:
+                print("\033[91m#bugs\033[0m Can't restore a backup inside a batch.")
+                return
+            self._restore_db(generation)
+
+    def _restore_db(self, generation: Optional[int] = None) -> None:
         """
         Restores the database from backup.
+
+        Args:
+            generation (Optional[int], optional): The backup generation to restore when
+                generations are kept. Defaults to None (the latest).
         """
+        if self._backups is not None:
+            entry = self._backups.find(generation)
+            if entry is None:
+                print(f"\033[91m#bugs\033[0m Backup generation {generation} not found. Use db.list_backups() to see the ones kept.")
+                return
+            try:
+                self._restore_generation(entry)
+            except (OSError, ValueError) as e:
+                print(f"\033[91m#bugs\033[0m Unable to restore database: {e}")
+                raise
+            return
+        if generation is not None:
+            print("\033[91m#bugs\033[0m Only one backup is kept. Open the database with backup_generations > 1 to pick generations.")
+            return
+        if self.storage == 'sharded':
+            self._restore_shards()
+            return
         if os.path.exists(self.backup_filename):
             try:
+                if self.storage == 'wal' and self._compaction_thread is not None:
+                    self._compaction_thread.join()
                 shutil.copy(self.backup_filename, self.filename)
+                if self.storage == 'wal':
+                    self._pending_changes = []
+                    self._wal.clear()
+                    if os.path.exists(self.backup_filename + ".wal"):
+                        shutil.copy(self.backup_filename + ".wal", self._wal.path)
                 self._load_db()
+                self._rebuild_indexes()
                 if self.enable_log:
                     logging.info(f"Database restored from backup: {self.backup_filename}")
             except OSError as e:
@@ -91,4 +930,164 @@ class DatabaseOperations:
         else:
             print("\033[91m#bugs\033[0m No backup file found.")
             if self.enable_log:
-                logging.error("No backup file found to restore.")
\ No newline at end of file
+                logging.error("No backup file found to restore.")
+
+    def _restore_generation(self, entry: Dict[str, Any]) -> None:
+        """
+        Replaces the database with a backup generation, in memory and on disk.
+
+        Args:
+            entry (Dict[str, Any]): The generation entry.
+        """
+        raw = self._backups.read(entry)
+        self._replace_db(self._decode_snapshot(decode_payload(raw)), raw)
+        self._record_restore(entry.get("seq"))
+        if self.enable_log:
+            logging.info(f"Database restored from backup generation {entry['generation']}")
+
+    def _replace_db(self, restored: Dict[str, Any], payload: Optional[bytes] = None) -> None:
+        """
+        Makes `restored` the database, in memory and on disk, dropping unsaved changes.
+
+        Args:
+            restored (Dict[str, Any]): The new content (decoded with _decode_snapshot, so the chunk cache matches it).
+            payload (Optional[bytes], optional): Its serialized form, if already known. Defaults to None.
+        """
+        if self.storage == 'sharded':
+            self._dirty_shards.update(set(self._shard_files) | set(restored))
+            self._unloaded = set()
+            self.db = restored
+            self._save_shards()
+        else:
+            if self.storage == 'wal':
+                if self._compaction_thread is not None:
+                    self._compaction_thread.join()
+                self._pending_changes = []
+                self._wal.clear()
+            self.db = restored
+            self._write_snapshot(payload if payload is not None else self._serialize_db())
+            self._dirty_shards.clear()
+            if self._process_lock is not None:
+                self._generation = self._process_lock.bump()
+                self._file_signature = self._signature()
+        self._unsaved_changes = 0
+        self._rebuild_indexes()
+
+    def _record_restore(self, seq: Optional[int]) -> None:
+        """
+        Adds a "restore" entry to the change feed (its value tells which change the database
+        went back to) and a backup generation at that entry, so later recoveries never replay across it.
+        """
+        if self._feed is None:
+            return
+        self._feed.append("restore", "", {"seq": seq})
+        self._flush_feed()
+        if self._backups is not None:
+            self._backups.add(self._serialize_db(), self._feed.next_seq - 1)
+
+    def restore(self, at: Union[int, float, datetime]) -> Optional[int]:
+        """
+        Point-in-time recovery: rebuilds the database as it was at a given change or time,
+        by replaying the change feed onto the closest earlier backup generation, then saves it.
+
+        The feed is streamed from disk, so the replay doesn't hold the history in memory.
+        Needs backup generations and the change feed, e.g.
+        JsonDB(auto_backup=True, backup_generations=10, change_feed=True).
+
+        Example:
+            db.restore(at=1200)                                  # just after change 1200
+            db.restore(at=time.time() - 3600)                    # as it was an hour ago
+            db.restore(at=datetime(2024, 5, 1, 9, 30))
+
+        Args:
+            at (Union[int, float, datetime]): An int is a change sequence number (see last_seq());
+                a float (Unix time) or a datetime is a point in time.
+
+        Returns:
+            Optional[int]: The sequence number of the last change the restored database includes,
+                or None if it couldn't be restored.
+        """
+        if self._backups is None or self._feed is None:
+            print("\033[91m#bugs\033[0m Point-in-time recovery needs backup generations and the change feed: "
+                  "JsonDB(auto_backup=True, backup_generations=10, change_feed=True).")
+            return None
+        by_seq = isinstance(at, int) and not isinstance(at, bool)
+        target = at.timestamp() if isinstance(at, datetime) else at
+        with self._write_lock, self._exclusive():
+            if self._batch_depth:
+                print("\033[91m#bugs\033[0m Can't restore inside a batch.")
+                return None
+            self._flush_feed()
+            last = self._feed.next_seq - 1
+            if by_seq and not 0 <= target <= last:
+                print(f"\033[91m#bugs\033[0m Change {target} doesn't exist (the latest is {last}). Pass a float or a datetime to restore a point in time.")
+                return None
+            candidates = [entry for entry in self._backups.generations
+                          if entry.get("seq") is not None and (entry["seq"] if by_seq else entry["time"]) <= target]
+            if not candidates:
+                print(f"\033[91m#bugs\033[0m No backup generation was taken before {at}; it can't be restored.")
+                return None
+            entry = candidates[-1]
+            changes = self._feed.stream(entry["seq"])
+            try:
+                first = next(changes, None)
+                if entry["seq"] < last and (first is None or first["seq"] != entry["seq"] + 1):
+                    print(f"\033[91m#bugs\033[0m The change feed no longer holds the changes after backup generation "
+                          f"{entry['generation']}; keep more of them with feed_retention.")
+                    return None
+                current = self.db
+                self.db = self._decode_snapshot(decode_payload(self._backups.read(entry)))
+                seq = entry["seq"]
+                try:
+                    change = first
+                    while change is not None and (change["seq"] if by_seq else change["time"]) <= target:
+                        if change["action"] == "restore":
+                            raise ValueError(f"change {change['seq']} is an earlier restore")
+                        keys = change["path"].split('/')
+                        if change["action"].startswith("remove_"):
+                            self._apply_change({"op": "del", "path": keys})
+                        else:
+                            self._apply_change({"op": "set", "path": keys, "value": change["value"]})
+                        seq = change["seq"]
+                        change = next(changes, None)
+                except BaseException:
+                    self.db = current
+                    self._chunks.reset()
+                    raise
+            except (OSError, ValueError) as e:
+                print(f"\033[91m#bugs\033[0m Unable to restore database: {e}")
+                raise
+            finally:
+                changes.close()
+            try:
+                self._replace_db(self.db)
+                self._record_restore(seq)
+            except OSError as e:
+                print(f"\033[91m#bugs\033[0m Unable to restore database: {e}")
+                raise
+            if self.enable_log:
+                logging.info(f"Database restored to change {seq} from backup generation {entry['generation']}")
+            return seq
+
+    def _restore_shards(self) -> None:
+        """
+        Restores the shards (and their manifest) from the backup directory.
+        """
+        if not self._backup_shards.exists():
+            print("\033[91m#bugs\033[0m No backup file found.")
+            if self.enable_log:
+                logging.error("No backup shards found to restore.")
+            return
+        try:
+            backup_files = self._backup_shards.read_manifest()
+            self._backup_shards.copy_to(self._shards, backup_files.values())
+            for filename in set(self._shard_files.values()) - set(backup_files.values()):
+                self._shards.remove(filename)
+            self._dirty_shards.clear()
+            self._load_db()
+            self._rebuild_indexes()
+            if self.enable_log:
+                logging.info(f"Database restored from backup: {self._backup_shards.directory}")
+        except OSError as e:
+            print(f"\033[91m#bugs\033[0m Unable to restore database: {e}")
+            raise
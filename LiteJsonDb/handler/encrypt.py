@@ -1,10 +1,50 @@
+import os
 import base64
-import json
+import hashlib
 import logging
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, Optional, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from .serializer import fast_dumps, fast_loads
+
+# Fernet payloads start with this header, followed by "<iterations>$<salt>$" and the token,
+# so each database carries its own random salt and key derivation cost.
+FERNET_HEADER = "$ljdb-fernet$"
+DEFAULT_KDF_ITERATIONS = 480000
+_LEGACY_SALT = b"ThisIsASalt"  # Salt of the payloads written before the header existed
+
+# Keys derived in this process, shared by every database opened with the same password,
+# salt and cost. Keyed by a hash of the password so the password itself isn't kept here.
+_KEY_CACHE: Dict[Tuple[bytes, bytes, int], Fernet] = {}
+_KEY_CACHE_LOCK = threading.Lock()
+
+def derive_fernet(password: str, salt: bytes, iterations: int) -> Fernet:
+    """
+    Derives a Fernet key from a password with PBKDF2-HMAC-SHA256, once per process.
+
+    Args:
+        password (str): The encryption key given by the user.
+        salt (bytes): The database salt.
+        iterations (int): The PBKDF2 iteration count.
+
+    Returns:
+        Fernet: A Fernet instance for the derived key.
+    """
+    cache_key = (hashlib.sha256(password.encode('utf-8')).digest(), salt, iterations)
+    with _KEY_CACHE_LOCK:
+        fernet = _KEY_CACHE.get(cache_key)
+        if fernet is None:
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=iterations,
+            )
+            key = base64.urlsafe_b64encode(kdf.derive(password.encode('utf-8')))
+            fernet = _KEY_CACHE[cache_key] = Fernet(key)
+        return fernet
 
 class Encryption:
     """
@@ -14,18 +54,25 @@ class Encryption:
     base64 encoding or Fernet symmetric encryption. It supports key derivation
     for Fernet using PBKDF2HMAC.
     """
-    def __init__(self, encryption_method: str = 'base64', encryption_key: Optional[str] = None):
+    def __init__(self, encryption_method: str = 'base64', encryption_key: Optional[str] = None,
+                 kdf_iterations: int = DEFAULT_KDF_ITERATIONS):
         """
         Initializes the Encryption class.
 
+        The Fernet key isn't derived here: it depends on the salt and cost stored in the
+        database, so it is derived (or taken from the process-wide cache) on first use.
+
         Args:
             encryption_method (str, optional): The encryption method to use ('base64' or 'fernet').
                 Defaults to 'base64'.
             encryption_key (Optional[str], optional): The encryption key to use (required for 'fernet').
                 Defaults to None.
+            kdf_iterations (int, optional): PBKDF2 iterations used when writing a 'fernet' database.
+                Lower is faster to open, higher is harder to brute-force. Defaults to 480000.
         
         Raises:
-            ValueError: If encryption_method is 'fernet' and encryption_key is not provided.
+            ValueError: If encryption_method is 'fernet' and encryption_key is not provided,
+                or if kdf_iterations isn't a positive integer.
         """
         self.encryption_method = encryption_method
         self.encryption_key = encryption_key
@@ -33,16 +80,19 @@ class Encryption:
         if self.encryption_method == 'fernet':
             if not self.encryption_key:
                 raise ValueError("\033[91m#bugs\033[0m Encryption key required for 'fernet'.")
-
-            salt = b"ThisIsASalt"
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=480000,
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(self.encryption_key.encode('utf-8')))
-            self.fernet = Fernet(key)
+            if not isinstance(kdf_iterations, int) or kdf_iterations < 1:
+                raise ValueError("\033[91m#bugs\033[0m kdf_iterations must be a positive integer.")
+        self.kdf_iterations = kdf_iterations
+        self._kdf_salt = os.urandom(16)  # Replaced by the database's own salt when one is loaded
+        self._kdf_adopted = False
+        self._kdf_stale = False  # Set when loaded data was encrypted with another salt or cost
+
+    @property
+    def fernet(self) -> Fernet:
+        """
+        The Fernet instance used to write the database.
+        """
+        return derive_fernet(self.encryption_key, self._kdf_salt, self.kdf_iterations)
 
     def _encrypt(self, data: Dict[str, Any]) -> str:
         """
@@ -94,7 +144,7 @@ class Encryption:
         Returns:
             str: The base64 encoded string.
         """
-        json_data = json.dumps(data).encode('utf-8')
+        json_data = fast_dumps(data).encode('utf-8')
         return base64.b64encode(json_data).decode('utf-8')
 
     def _base64_decrypt(self, encoded_data: str) -> Dict[str, Any]:
@@ -107,8 +157,8 @@ class Encryption:
         Returns:
             Dict[str, Any]: The decrypted data as a dictionary.
         """
-        decoded_data = base64.b64decode(encoded_data.encode('utf-8')).decode('utf-8')
-        return json.loads(decoded_data)
+        decoded_data = base64.b64decode(encoded_data.encode('utf-8'))
+        return fast_loads(decoded_data)
 
     def _fernet_encrypt(self, data: Dict[str, Any]) -> str:
         """
@@ -118,15 +168,23 @@ class Encryption:
             data (Dict[str, Any]): The data to encrypt.
 
         Returns:
-            str: The Fernet encrypted string.
+            str: The Fernet encrypted string, prefixed with the key derivation header.
         """
-        json_data = json.dumps(data).encode('utf-8')
-        return self.fernet.encrypt(json_data).decode('utf-8')
+        json_data = fast_dumps(data).encode('utf-8')
+        token = self.fernet.encrypt(json_data).decode('utf-8')
+        salt = base64.urlsafe_b64encode(self._kdf_salt).decode('ascii')
+        return f"{FERNET_HEADER}{self.kdf_iterations}${salt}${token}"
 
     def _fernet_decrypt(self, encoded_data: str) -> Dict[str, Any]:
         """
         Decrypts the given Fernet encrypted data.
 
+        The salt and cost come from the payload header (payloads without one use the
+        original fixed salt). The first header seen with the configured cost is adopted,
+        so the database keeps its salt; a different cost gets a fresh salt and
+        `_kdf_stale` is set, so the loader drops the cached ciphertexts and the whole
+        database is re-keyed on its next save.
+
         Args:
             encoded_data (str): The Fernet encrypted string.
 
@@ -137,8 +195,17 @@ class Encryption:
             ValueError: If the decryption fails due to an incorrect key or corrupted data.
         """
         try:
-            decoded_data = self.fernet.decrypt(encoded_data.encode('utf-8'))
-            return json.loads(decoded_data)
+            if encoded_data.startswith(FERNET_HEADER):
+                iterations, salt, token = encoded_data[len(FERNET_HEADER):].split('$', 2)
+                iterations, salt = int(iterations), base64.urlsafe_b64decode(salt)
+                if not self._kdf_adopted and iterations == self.kdf_iterations:
+                    self._kdf_salt, self._kdf_adopted = salt, True
+            else:
+                iterations, salt, token = DEFAULT_KDF_ITERATIONS, _LEGACY_SALT, encoded_data
+            if (iterations, salt) != (self.kdf_iterations, self._kdf_salt):
+                self._kdf_stale = True
+            decoded_data = derive_fernet(self.encryption_key, salt, iterations).decrypt(token.encode('utf-8'))
+            return fast_loads(decoded_data)
         except Exception as e:
             print("\033[91m#bugs\033[0m Fernet decryption failed.")
-            raise ValueError("\033[91m#bugs\033[0m Decryption failed: invalid key or data.")
\ No newline at end of file
+            raise ValueError("\033[91m#bugs\033[0m Decryption failed: invalid key or data.")
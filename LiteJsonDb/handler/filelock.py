@@ -0,0 +1,118 @@
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class InterProcessLock:
+    """
+    Exclusive lock shared by every process opening the same database, held on a small
+    ".lock" file next to it (fcntl.flock on POSIX, msvcrt.locking on Windows).
+
+    The lock file also holds a generation counter that each writer increments after
+    saving, so a process taking the lock can tell, without reading the database,
+    whether someone else wrote it since its last load.
+
+    The lock is reentrant: nested acquire() calls only count, and the OS lock is
+    released by the outermost release(). Callers serialize threads themselves
+    (JsonDB only takes it while holding its write lock).
+    """
+    def __init__(self, path: str, timeout: Optional[float] = 10.0):
+        """
+        Initializes the InterProcessLock.
+
+        Args:
+            path (str): The path of the lock file (created if missing).
+            timeout (Optional[float], optional): Seconds to wait for the lock (None waits forever). Defaults to 10.0.
+        """
+        self.path = path
+        self.timeout = timeout
+        self.depth = 0
+        self._file = None
+
+    def acquire(self) -> bool:
+        """
+        Takes the lock, waiting for other processes to release it.
+
+        Returns:
+            bool: True if this call took the OS lock (outermost acquire), False if it was already held.
+
+        Raises:
+            TimeoutError: If the lock couldn't be taken within `timeout` seconds.
+        """
+        if self.depth:
+            self.depth += 1
+            return False
+        file = open(self.path, 'a+b')
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                self._lock(file)
+                break
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    file.close()
+                    raise TimeoutError(f"\033[91m#bugs\033[0m Timed out waiting for the database lock '{self.path}'.")
+                time.sleep(0.005)
+        self._file = file
+        self.depth = 1
+        return True
+
+    def release(self) -> None:
+        """
+        Releases one level of the lock; the OS lock is dropped by the outermost release.
+        """
+        if not self.depth:
+            return
+        self.depth -= 1
+        if self.depth:
+            return
+        file, self._file = self._file, None
+        try:
+            self._unlock(file)
+        finally:
+            file.close()
+
+    @staticmethod
+    def _lock(file) -> None:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    @staticmethod
+    def _unlock(file) -> None:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def generation(self) -> int:
+        """
+        Reads the generation counter (-1 if it can't be read, which forces a reload).
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                text = file.read(32).strip()
+            return int(text) if text else 0
+        except (OSError, ValueError):
+            return -1
+
+    def bump(self) -> int:
+        """
+        Increments the generation counter. Must be called while holding the lock.
+
+        Returns:
+            int: The new generation.
+        """
+        generation = max(self.generation(), 0) + 1
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(str(generation).encode())
+        self._file.flush()
+        return generation
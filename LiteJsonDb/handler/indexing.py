@@ -0,0 +1,696 @@
+import os
+import json
+import math
+import heapq
+import bisect
+import logging
+import datetime
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+from ..utility import convert_to_datetime
+from .method import _shared
+
+_MISSING = object()  # Marks a record that doesn't have the indexed field
+
+def _field_value(record: Any, path: List[str]) -> Any:
+    """
+    Reads a (possibly nested) field from a record, or returns _MISSING.
+    """
+    for k in path:
+        if not isinstance(record, dict) or k not in record:
+            return _MISSING
+        record = record[k]
+    return record
+
+def _index_key(value: Any) -> Optional[Hashable]:
+    """
+    Turns a field value into a hash index key, or None if it can't be indexed.
+
+    Booleans are tagged so True doesn't collide with 1 (JSON keeps them apart).
+    """
+    if isinstance(value, (dict, list)):
+        return None
+    return (isinstance(value, bool), value)
+
+def _same_value(found: Any, value: Any) -> bool:
+    """
+    JSON-style equality: a missing field never matches, and booleans only match booleans.
+    """
+    return found is not _MISSING and found == value and isinstance(found, bool) == isinstance(value, bool)
+
+class HashIndex:
+    """
+    Hash index over one field of the records of a subcollection.
+
+    It maps each field value to the IDs of the records holding it, and keeps the
+    reverse mapping so a record can be re-indexed without knowing its old value.
+    """
+    kind = 'hash'
+
+    def __init__(self, collection: str, field: str):
+        """
+        Initializes the HashIndex.
+
+        Args:
+            collection (str): The subcollection name.
+            field (str): The indexed field (nested fields separated by "/").
+        """
+        self.collection = collection
+        self.field = field
+        self.path = field.split('/')
+        self.built = False
+        self.entries: Dict[Hashable, Set[str]] = {}
+        self.keys: Dict[str, Hashable] = {}
+
+    def build(self, records: Any) -> None:
+        """
+        (Re)builds the index from every record of the subcollection.
+
+        Args:
+            records (Any): The subcollection (item ID -> record).
+        """
+        self.entries = {}
+        self.keys = {}
+        if isinstance(records, dict):
+            for item_id, record in records.items():
+                self.add(item_id, record)
+        self.built = True
+
+    def add(self, item_id: str, record: Any) -> None:
+        """
+        Indexes a record (records without the field, or with a list/dict value, are skipped).
+
+        Args:
+            item_id (str): The record ID.
+            record (Any): The record.
+        """
+        value = _field_value(record, self.path)
+        if value is _MISSING:
+            return
+        key = _index_key(value)
+        if key is None:
+            return
+        self.entries.setdefault(key, set()).add(item_id)
+        self.keys[item_id] = key
+
+    def discard(self, item_id: str) -> None:
+        """
+        Removes a record from the index.
+
+        Args:
+            item_id (str): The record ID.
+        """
+        key = self.keys.pop(item_id, _MISSING)
+        if key is _MISSING:
+            return
+        ids = self.entries[key]
+        ids.discard(item_id)
+        if not ids:
+            del self.entries[key]
+
+    def lookup(self, value: Any) -> Set[str]:
+        """
+        Returns the IDs of the records whose field equals `value`.
+
+        Args:
+            value (Any): The value to look for.
+
+        Returns:
+            Set[str]: The matching record IDs.
+        """
+        key = _index_key(value)
+        if key is None:
+            return set()
+        return self.entries.get(key, set())
+
+def _sort_key(value: Any) -> Optional[Tuple[int, Any]]:
+    """
+    Turns a field value into an ordered index key, or None if it can't be ordered.
+
+    Numbers and dates are orderable (numbers sort first). ISO strings are parsed with
+    convert_to_datetime; timezone-aware dates are compared in UTC. Other strings are skipped,
+    and so are NaN and the infinities (NaN has no place in a sorted list).
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, (dict, list)):
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return (1, value)
+    if isinstance(value, datetime.date):
+        return (1, datetime.datetime(value.year, value.month, value.day))
+    if isinstance(value, str):
+        try:
+            return _sort_key(convert_to_datetime(value))
+        except ValueError:
+            return None
+    return None
+
+class SortedIndex:
+    """
+    Ordered index over one numeric or date field of the records of a subcollection.
+
+    Entries are kept in a sorted list of (key, item ID) pairs, so range scans,
+    ordered reads with a limit and min/max only touch the entries they return.
+    """
+    kind = 'sorted'
+
+    def __init__(self, collection: str, field: str):
+        """
+        Initializes the SortedIndex.
+
+        Args:
+            collection (str): The subcollection name.
+            field (str): The indexed field (nested fields separated by "/").
+        """
+        self.collection = collection
+        self.field = field
+        self.path = field.split('/')
+        self.built = False
+        self.entries: List[Tuple[Tuple[int, Any], str]] = []
+        self.keys: Dict[str, Tuple[int, Any]] = {}
+        self.unordered: Set[str] = set()  # Records holding the field with a value that can't be ordered (None included)
+
+    def build(self, records: Any) -> None:
+        """
+        (Re)builds the index from every record of the subcollection.
+
+        Args:
+            records (Any): The subcollection (item ID -> record).
+        """
+        self.keys = {}
+        self.unordered = set()
+        if isinstance(records, dict):
+            for item_id, record in records.items():
+                value = _field_value(record, self.path)
+                key = _sort_key(value)
+                if key is not None:
+                    self.keys[item_id] = key
+                elif value is not _MISSING:
+                    self.unordered.add(item_id)
+        self.entries = sorted((key, item_id) for item_id, key in self.keys.items())
+        self.built = True
+
+    def add(self, item_id: str, record: Any) -> None:
+        """
+        Indexes a record (records without an orderable value for the field are skipped).
+
+        Args:
+            item_id (str): The record ID.
+            record (Any): The record.
+        """
+        value = _field_value(record, self.path)
+        key = _sort_key(value)
+        if key is None:
+            if value is not _MISSING:
+                self.unordered.add(item_id)
+            return
+        bisect.insort(self.entries, (key, item_id))
+        self.keys[item_id] = key
+
+    def discard(self, item_id: str) -> None:
+        """
+        Removes a record from the index.
+
+        Args:
+            item_id (str): The record ID.
+        """
+        self.unordered.discard(item_id)
+        key = self.keys.pop(item_id, None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self.entries, (key, item_id))
+        if position < len(self.entries) and self.entries[position] == (key, item_id):
+            del self.entries[position]
+
+    def lookup(self, value: Any) -> Set[str]:
+        """
+        Returns the IDs of the records whose field may equal `value`: those with the same
+        key, or every record with an unorderable value if `value` can't be ordered itself.
+        Callers check the actual values.
+
+        Args:
+            value (Any): The value to look for.
+
+        Returns:
+            Set[str]: The candidate record IDs.
+        """
+        if _sort_key(value) is None:
+            return set(self.unordered)
+        return set(self.scan(value, value))
+
+    def scan(self, low: Any = None, high: Any = None, include_low: bool = True,
+             include_high: bool = True, reverse: bool = False) -> Iterator[str]:
+        """
+        Yields the IDs of the records whose field lies between `low` and `high`, in order.
+
+        Args:
+            low (Any, optional): The lower bound (None for no bound). Defaults to None.
+            high (Any, optional): The upper bound (None for no bound). Defaults to None.
+            include_low (bool, optional): Whether the lower bound is inclusive. Defaults to True.
+            include_high (bool, optional): Whether the upper bound is inclusive. Defaults to True.
+            reverse (bool, optional): Yield from the highest to the lowest. Defaults to False.
+
+        Yields:
+            str: The matching record IDs.
+        """
+        start, stop = 0, len(self.entries)
+        if low is not None:
+            low_key = _sort_key(low)
+            if low_key is None:
+                return
+            # Item IDs are strings: "" sorts before any of them, chr(0x10FFFF) after.
+            start = bisect.bisect_left(self.entries, (low_key, "") if include_low else (low_key, chr(0x10FFFF)))
+        if high is not None:
+            high_key = _sort_key(high)
+            if high_key is None:
+                return
+            stop = bisect.bisect_right(self.entries, (high_key, chr(0x10FFFF)) if include_high else (high_key, ""))
+        positions = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+        for position in positions:
+            yield self.entries[position][1]
+
+class ValueIndex:
+    """
+    Inverted index over every leaf value of the database, used by search_data.
+
+    A leaf is any value that isn't a dict (lists included, as search_data treats
+    them). Each leaf path is filed under the value itself and under its string
+    form, so a lookup answers `value in (leaf, str(leaf))` without a scan.
+    """
+    def __init__(self):
+        """
+        Initializes the ValueIndex.
+        """
+        self.by_value: Dict[Hashable, Set[Tuple[str, ...]]] = {}
+        self.by_text: Dict[str, Set[Tuple[str, ...]]] = {}
+        self.unhashable: Dict[Tuple[str, ...], Any] = {}  # Lists can't be dict keys
+
+    @staticmethod
+    def _leaves(path: Tuple[str, ...], node: Any) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        """
+        Yields the (path, value) leaves of a subtree, without recursion.
+        """
+        stack = [(path, node)]
+        while stack:
+            path, node = stack.pop()
+            if isinstance(node, dict):
+                stack.extend((path + (k,), v) for k, v in node.items())
+            else:
+                yield path, node
+
+    def add(self, path: Tuple[str, ...], node: Any) -> None:
+        """
+        Indexes every leaf of a subtree.
+
+        Args:
+            path (Tuple[str, ...]): The path of the subtree.
+            node (Any): The subtree.
+        """
+        for leaf, value in self._leaves(path, node):
+            try:
+                self.by_value.setdefault(value, set()).add(leaf)
+            except TypeError:
+                self.unhashable[leaf] = value
+            self.by_text.setdefault(str(value), set()).add(leaf)
+
+    def discard(self, path: Tuple[str, ...], node: Any) -> None:
+        """
+        Forgets every leaf of a subtree (it must still hold the values it was indexed with).
+
+        Args:
+            path (Tuple[str, ...]): The path of the subtree.
+            node (Any): The subtree.
+        """
+        for leaf, value in self._leaves(path, node):
+            try:
+                self._discard_from(self.by_value, value, leaf)
+            except TypeError:
+                self.unhashable.pop(leaf, None)
+            self._discard_from(self.by_text, str(value), leaf)
+
+    @staticmethod
+    def _discard_from(mapping: Dict[Hashable, Set[Tuple[str, ...]]], key: Hashable, leaf: Tuple[str, ...]) -> None:
+        paths = mapping.get(key)
+        if paths is not None:
+            paths.discard(leaf)
+            if not paths:
+                del mapping[key]
+
+    def lookup(self, value: Any) -> Set[Tuple[str, ...]]:
+        """
+        Returns the paths of the leaves equal to `value` or whose string form equals it.
+
+        Args:
+            value (Any): The searched value.
+
+        Returns:
+            Set[Tuple[str, ...]]: The matching leaf paths.
+        """
+        try:
+            return self.by_value.get(value, set()) | self.by_text.get(value, set())
+        except TypeError:
+            return {leaf for leaf, leaf_value in self.unhashable.items() if leaf_value == value}
+
+    def clear(self) -> None:
+        """
+        Empties the index.
+        """
+        self.by_value.clear()
+        self.by_text.clear()
+        self.unhashable.clear()
+
+class Indexing:
+    """
+    Secondary indexes on subcollection fields.
+
+    Indexes are kept up to date by every mutator (through `_update_indexes`),
+    rebuilt when the database is loaded, and their definitions are saved in a
+    small side file (`<database>.indexes`) so they survive restarts.
+
+    The optional value index covers every leaf of the database and serves search_data.
+    """
+    INDEX_TYPES = {'hash': HashIndex, 'sorted': SortedIndex}
+
+    def __init__(self, value_index: bool = False):
+        """
+        Initializes the Indexing class.
+
+        Args:
+            value_index (bool, optional): Maintain the inverted value index used by search_data. Defaults to False.
+        """
+        self._indexes: Dict[str, Dict[str, Any]] = {}  # collection -> field -> index
+        self.index_filename = self.filename + ".indexes"
+        self._value_index: Optional[ValueIndex] = ValueIndex() if value_index else None
+
+    def _load_index_definitions(self) -> None:
+        """
+        Re-creates the indexes listed in the side file, then builds every index.
+        """
+        definitions = []
+        if os.path.exists(self.index_filename):
+            try:
+                with open(self.index_filename, 'r', encoding='utf-8') as file:
+                    definitions = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"\033[91m#bugs\033[0m Unable to read index definitions: {e}")
+        for definition in definitions:
+            index_type = self.INDEX_TYPES.get(definition.get("kind", "hash"))
+            if index_type is None:
+                continue
+            index = index_type(definition["collection"], definition["field"])
+            self._indexes.setdefault(index.collection, {})[index.field] = index
+        self._rebuild_indexes()
+
+    def _save_index_definitions(self) -> None:
+        """
+        Writes the index definitions to the side file.
+        """
+        definitions = [{"collection": index.collection, "field": index.field, "kind": index.kind}
+                       for fields in self._indexes.values() for index in fields.values()]
+        try:
+            with open(self.index_filename, 'w', encoding='utf-8') as file:
+                json.dump(definitions, file, indent=4)
+        except OSError as e:
+            print(f"\033[91m#bugs\033[0m Unable to save index definitions: {e}")
+
+    def _rebuild_indexes(self) -> None:
+        """
+        Rebuilds every index whose collection is in memory. Indexes on collections
+        that lazy loading hasn't loaded yet are built on first use.
+        """
+        for collection, fields in self._indexes.items():
+            for index in fields.values():
+                index.built = False
+                if collection in self.db:
+                    index.build(self.db[collection])
+        if self._value_index is not None:
+            self._value_index.clear()
+            for name, collection in self.db.items():
+                self._value_index.add((name,), collection)
+
+    def _get_index(self, collection: str, field: str) -> Optional[Any]:
+        """
+        Returns a ready-to-use index, building it first if needed.
+        """
+        index = self._indexes.get(collection, {}).get(field)
+        if index is not None and not index.built:
+            self._ensure_loaded(collection)
+            with self._write_lock:
+                if not index.built:
+                    index.build(self.db.get(collection))
+        return index
+
+    def _update_indexes(self, keys: List[str]) -> None:
+        """
+        Brings the indexes of a collection up to date after the value at `keys` changed.
+
+        Args:
+            keys (List[str]): The path of the value that changed.
+        """
+        self._index_values(keys)
+        fields = self._indexes.get(keys[0])
+        if not fields:
+            return
+        collection = self.db.get(keys[0])
+        for index in fields.values():
+            if len(keys) == 1 or not isinstance(collection, dict):
+                if index.built or collection is not None:
+                    index.build(collection)
+                continue
+            if not index.built:
+                continue
+            item_id = keys[1]
+            index.discard(item_id)
+            if item_id in collection:
+                index.add(item_id, collection[item_id])
+
+    def _index_values(self, keys: List[str]) -> None:
+        """
+        Adds the value now stored at `keys` to the value index.
+        """
+        if self._value_index is not None:
+            node = _field_value(self.db, keys)
+            if node is not _MISSING:
+                self._value_index.add(tuple(keys), node)
+
+    def _unindex_values(self, keys: List[str]) -> None:
+        """
+        Removes the value stored at `keys` from the value index, before it changes.
+        """
+        if self._value_index is not None:
+            node = _field_value(self.db, keys)
+            if node is not _MISSING:
+                self._value_index.discard(tuple(keys), node)
+
+    def _search_value_index(self, value: Any, key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Answers search_data from the value index, in time proportional to the matches.
+
+        Args:
+            value (Any): The value to search for.
+            key (Optional[str], optional): Only search within this top-level key. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: The matching values keyed by their "/"-separated path
+            (relative to `key` when given), as search_data returns them.
+        """
+        results = {}
+        for path in self._value_index.lookup(value):
+            if key:
+                if path[0] != key or len(path) < 2:
+                    continue
+                name = "/".join(path[1:])
+            else:
+                name = "/".join(path)
+            results[name] = _field_value(self.db, path)
+        return results
+
+    def create_index(self, collection: str, field: str, kind: str = 'hash') -> None:
+        """
+        Creates an index on a field of a subcollection's records.
+
+        Args:
+            collection (str): The subcollection name (e.g. "users").
+            field (str): The field to index (nested fields separated by "/", e.g. "address/city").
+            kind (str, optional): The index type: 'hash' for equality lookups, 'sorted' for
+                range scans, ordering and min/max on numbers and dates. Defaults to 'hash'.
+
+        Raises:
+            ValueError: If the index type is unknown.
+        """
+        if kind not in self.INDEX_TYPES:
+            raise ValueError(f"\033[91m#bugs\033[0m Unknown index type: '{kind}'.")
+        existing = self._indexes.get(collection, {}).get(field)
+        if existing is not None and existing.kind == kind:
+            print(f"\033[90m#info\033[0m Index on '{collection}/{field}' already exists.")
+            return
+        self._ensure_loaded(collection)
+        with self._write_lock:
+            index = self.INDEX_TYPES[kind](collection, field)
+            index.build(self.db.get(collection))
+            self._indexes.setdefault(collection, {})[field] = index
+            self._save_index_definitions()
+        if self.enable_log:
+            logging.info(f"Index created on {collection}/{field} ({kind})")
+
+    def drop_index(self, collection: str, field: str) -> None:
+        """
+        Removes an index.
+
+        Args:
+            collection (str): The subcollection name.
+            field (str): The indexed field.
+        """
+        with self._write_lock:
+            fields = self._indexes.get(collection, {})
+            if field not in fields:
+                print(f"\033[91m#bugs\033[0m No index on '{collection}/{field}'.")
+                return
+            del fields[field]
+            if not fields:
+                del self._indexes[collection]
+            self._save_index_definitions()
+
+    def list_indexes(self) -> List[Dict[str, str]]:
+        """
+        Lists the existing indexes.
+
+        Returns:
+            List[Dict[str, str]]: One {"collection", "field", "kind"} entry per index.
+        """
+        return [{"collection": index.collection, "field": index.field, "kind": index.kind}
+                for fields in self._indexes.values() for index in fields.values()]
+
+    def rebuild_indexes(self) -> None:
+        """
+        Rebuilds every index from scratch (useful after changing data in place
+        through a reference returned by get_data).
+        """
+        with self._write_lock:
+            self._rebuild_indexes()
+
+    @_shared
+    def find_by(self, collection: str, field: str, value: Any) -> Dict[str, Any]:
+        """
+        Finds the records of a subcollection whose field equals `value`.
+
+        Uses the index on that field when there is one (O(1)), otherwise scans the collection.
+
+        Args:
+            collection (str): The subcollection name.
+            field (str): The field to match (nested fields separated by "/").
+            value (Any): The value to look for.
+
+        Returns:
+            Dict[str, Any]: The matching records, keyed by item ID.
+        """
+        self._ensure_loaded(collection)
+        records = self.db.get(collection)
+        if not isinstance(records, dict):
+            return {}
+        index = self._get_index(collection, field)
+        path = field.split('/')
+        if index is not None:
+            # A sorted index matches by key ("2024-01-01" == "2024-01-01T00:00"), so double-check.
+            return {item_id: records[item_id] for item_id in index.lookup(value)
+                    if item_id in records and _same_value(_field_value(records[item_id], path), value)}
+        return {item_id: record for item_id, record in records.items()
+                if _same_value(_field_value(record, path), value)}
+
+    @_shared
+    def range_by(self, collection: str, field: str, low: Any = None, high: Any = None,
+                 include_low: bool = True, include_high: bool = True, reverse: bool = False,
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Finds the records of a subcollection whose field lies between `low` and `high`,
+        ordered by that field. Numbers and ISO dates are supported.
+
+        Uses the sorted index on that field when there is one (only the returned entries
+        are read), otherwise scans and sorts the collection.
+
+        Args:
+            collection (str): The subcollection name.
+            field (str): The field to filter and order on (nested fields separated by "/").
+            low (Any, optional): The lower bound (None for no bound). Defaults to None.
+            high (Any, optional): The upper bound (None for no bound). Defaults to None.
+            include_low (bool, optional): Whether the lower bound is inclusive. Defaults to True.
+            include_high (bool, optional): Whether the upper bound is inclusive. Defaults to True.
+            reverse (bool, optional): Order from the highest to the lowest. Defaults to False.
+            limit (Optional[int], optional): The maximum number of records to return. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: The matching records keyed by item ID, in order.
+        """
+        self._ensure_loaded(collection)
+        records = self.db.get(collection)
+        if not isinstance(records, dict):
+            return {}
+        index = self._get_index(collection, field)
+        if index is not None and index.kind == 'sorted':
+            ids = index.scan(low, high, include_low, include_high, reverse)
+        else:
+            ids = self._scan_sorted(records, field, low, high, include_low, include_high, reverse, limit)
+        results = {}
+        for item_id in ids:
+            if limit is not None and len(results) >= limit:
+                break
+            results[item_id] = records[item_id]
+        return results
+
+    def order_by(self, collection: str, field: str, reverse: bool = False, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Returns the records of a subcollection ordered by a field (e.g. the top 100 scores
+        with reverse=True, limit=100). Records without an orderable value are left out.
+
+        Args:
+            collection (str): The subcollection name.
+            field (str): The field to order on.
+            reverse (bool, optional): Order from the highest to the lowest. Defaults to False.
+            limit (Optional[int], optional): The maximum number of records to return. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: The records keyed by item ID, in order.
+        """
+        return self.range_by(collection, field, reverse=reverse, limit=limit)
+
+    def min_by(self, collection: str, field: str) -> Dict[str, Any]:
+        """
+        Returns the record with the lowest value for a field ({} if there is none).
+        """
+        return self.range_by(collection, field, limit=1)
+
+    def max_by(self, collection: str, field: str) -> Dict[str, Any]:
+        """
+        Returns the record with the highest value for a field ({} if there is none).
+        """
+        return self.range_by(collection, field, reverse=True, limit=1)
+
+    @staticmethod
+    def _scan_sorted(records: Dict[str, Any], field: str, low: Any, high: Any, include_low: bool,
+                     include_high: bool, reverse: bool, limit: Optional[int]) -> List[str]:
+        """
+        Helper method doing what range_by does without an index: a full scan, then a
+        sort (or a partial heap selection when there is a limit).
+        """
+        path = field.split('/')
+        low_key = _sort_key(low) if low is not None else None
+        high_key = _sort_key(high) if high is not None else None
+        entries = []
+        for item_id, record in records.items():
+            key = _sort_key(_field_value(record, path))
+            if key is None:
+                continue
+            if low_key is not None and (key < low_key or (key == low_key and not include_low)):
+                continue
+            if high_key is not None and (key > high_key or (key == high_key and not include_high)):
+                continue
+            entries.append((key, item_id))
+        if limit is not None:
+            entries = heapq.nlargest(limit, entries) if reverse else heapq.nsmallest(limit, entries)
+        else:
+            entries.sort(reverse=reverse)
+        return [item_id for _, item_id in entries]
@@ -1,4 +1,37 @@
-from typing import Any, Dict, Optional, Union
+import copy
+from functools import wraps
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .views import read_only
+from .observers import ObserverDispatcher
+from .rwlock import ReadWriteLock
+
+_MISSING = object()  # Marks a path that didn't exist before a change (for batch rollback)
+_ALLOWED_TYPES = (str, int, float, list, dict, bool, type(None))  # What a JSON value can hold
+_EXACT_TYPES = frozenset(_ALLOWED_TYPES)  # Fast path for validate_rows (subclasses go through isinstance)
+
+def _synchronized(method):
+    """
+    Decorator running a mutator under the database write lock, so readers and
+    background flushes never see a half-applied change (and under the inter-process
+    lock when the database is shared with other processes).
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._mutating():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _shared(method):
+    """
+    Decorator running a read under the database read lock: reads run in parallel
+    with each other, but never in the middle of a mutation.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._read_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class DataManipulation:
     """
@@ -6,13 +39,29 @@ class DataManipulation:
 
     The database (db) is treated as an instance variable of this class.
     """
-    def __init__(self):
+    def __init__(self, observer_delivery: str = 'sync', observer_coalesce: float = 0.0, observer_loop: Optional[Any] = None):
         """
-        Initialization method.  No specific initialization is done.
+        Initialization method.
+
+        Args:
+            observer_delivery (str, optional): How observers are called: 'sync', 'thread' or 'asyncio'. Defaults to 'sync'.
+            observer_coalesce (float, optional): Window (seconds) merging repeated changes of a key ('thread'/'asyncio' only). Defaults to 0.0.
+            observer_loop (Optional[asyncio.AbstractEventLoop], optional): Event loop of the 'asyncio' delivery. Defaults to None.
         """
         self.db = {}  # Initialize the database
-        self.observers = {}  # Initialize observers
-        self.crypted = False # Initialize crypted flag
+        self.observers = {}  # Initialize observers (key -> functions, kept for introspection)
+        self._dispatcher = ObserverDispatcher(observer_delivery, observer_coalesce, observer_loop)  # Trie lookup and delivery
+        self.crypted = getattr(self, 'crypted', False)  # Keep the flag JsonDB already set
+        self.read_only_views = getattr(self, 'read_only_views', False)  # Default of the getters' `view` option
+        self._batch_depth = 0  # How many batch() blocks we are currently nested in
+        self._batch_dirty = False  # Whether anything changed inside the current batch
+        self._batch_undo = []  # (keys, previous value) pairs, replayed backwards on rollback
+        self._batch_notifications = []  # Observer calls deferred until the batch commits
+        self._rw_lock = ReadWriteLock()  # Concurrent reads, one writer at a time
+        self._write_lock = self._rw_lock.write  # Serializes mutations and saves
+        self._read_lock = self._rw_lock.read
+        self._save_due = False  # A committed change waits for the save at the end of the mutation
+        self._dirty_shards = set()  # Top-level collections changed since the last save
         # self._load_db()  # Load the database (commented out)
         # self._load_config() # Load config (commented out)
 
@@ -36,10 +85,37 @@ class DataManipulation:
                     print(f"\033[91m#bugs\033[0m Conflicting types for key '{key}'.")
                     return False
                 types[key] = type(value)
-            return all(isinstance(value, (str, int, float, list, dict, bool, None)) for value in data.values())
+            return all(isinstance(value, _ALLOWED_TYPES) for value in data.values())
         print(f"\033[91m#bugs\033[0m Data must be a dictionary.")
         return False
 
+    @staticmethod
+    def validate_rows(rows: Iterable[Any]) -> Tuple[List[int], List[Tuple[int, str]]]:
+        """
+        Validates many records at once, with the same rules as validate_data but
+        without printing anything: the whole batch is checked in one pass and the
+        reason each bad record was refused is returned instead.
+
+        Args:
+            rows (Iterable[Any]): The records to validate.
+
+        Returns:
+            Tuple[List[int], List[Tuple[int, str]]]: The positions of the valid records, and
+            (position, reason) pairs for the rejected ones.
+        """
+        valid, rejected = [], []
+        for position, row in enumerate(rows):
+            if type(row) is not dict and not isinstance(row, dict):
+                rejected.append((position, "not a dictionary"))
+            elif not all(type(key) is str for key in row) and not all(isinstance(key, str) for key in row):
+                rejected.append((position, "keys must be strings"))
+            elif not {type(value) for value in row.values()} <= _EXACT_TYPES \
+                    and not all(isinstance(value, _ALLOWED_TYPES) for value in row.values()):
+                rejected.append((position, "unsupported value type"))
+            else:
+                valid.append(position)
+        return valid, rejected
+
     def _set_child(self, parent: Dict[str, Any], child_key: str, value: Any) -> None:
         """
         Helper method to set data in a nested dictionary.
@@ -54,6 +130,32 @@ class DataManipulation:
             parent = parent.setdefault(key, {})
         parent[keys[-1]] = value
 
+    def _output(self, value: Any, view: Optional[bool], copy: bool) -> Any:
+        """
+        Helper method shaping what the getters return: a detached copy, a read-only
+        view (the default when read_only_views is on) or the stored value itself.
+
+        Args:
+            value (Any): The stored value.
+            view (Optional[bool]): Return a read-only view (None uses read_only_views).
+            copy (bool): Return a detached copy.
+        """
+        if copy:
+            return self._detached(value)
+        if view if view is not None else self.read_only_views:
+            return read_only(value)
+        return value
+
+    @staticmethod
+    def _detached(value: Any) -> Any:
+        """
+        Helper method returning a deep copy of a stored value, equal to it in every case
+        (a JSON round trip would turn NaN into null and could turn big integers into floats).
+        """
+        if not isinstance(value, (dict, list)):
+            return value
+        return copy.deepcopy(value)
+
     def _merge_dicts(self, dict1, dict2):
         """
         Helper method to merge dict2 into dict1.
@@ -72,6 +174,152 @@ class DataManipulation:
                 dict1[key] = value
         return dict1
 
+    def _before_change(self, keys: List[str]) -> None:
+        """
+        Helper method called right before a mutation touches `keys`.
+
+        It takes the old value out of the value index, and inside a batch it
+        remembers the previous value (or the first missing parent) so the batch
+        can be rolled back in memory.
+
+        Args:
+            keys (List[str]): The path of the value about to change.
+        """
+        self._unindex_values(keys)
+        if self._batch_depth:
+            data = self.db
+            for i, k in enumerate(keys):
+                if not isinstance(data, dict) or k not in data:
+                    self._batch_undo.append((keys[:i + 1], _MISSING))
+                    return
+                data = data[k]
+            self._batch_undo.append((keys, copy.deepcopy(data)))
+
+    def _commit_change(self, keys: List[str]) -> None:
+        """
+        Helper method to persist a mutation: records it, backs up, then saves.
+        Inside a batch, backup and save are deferred until the batch commits.
+
+        Args:
+            keys (List[str]): The path of the value that changed.
+        """
+        self._dirty_shards.add(keys[0])
+        self._chunks.invalidate(keys)
+        self._record_change(keys)
+        self._update_indexes(keys)
+        if self._batch_depth:
+            self._batch_dirty = True
+            return
+        self._persist()
+
+    @contextmanager
+    def _mutating(self) -> Iterator[None]:
+        """
+        Holds the write lock for a mutation, then saves it with the lock downgraded.
+
+        Once the change is applied, the outermost mutation turns its write hold into
+        a read hold for the backup and save: other writers still wait, but readers
+        don't have to wait for the disk.
+        """
+        downgraded = False
+        self._write_lock.acquire()
+        try:
+            with self._exclusive():
+                try:
+                    yield
+                finally:
+                    self._saving = self._save_due  # Set before the downgrade lets readers in
+                    if self._save_due and self._rw_lock.downgrade():
+                        downgraded = True
+                        self._save_due = False
+                        self._backup_db()
+                        self._save_db()
+                        self._flush_feed()
+        finally:
+            self._saving = False
+            if downgraded:
+                self._read_lock.release()
+            else:
+                self._write_lock.release()
+
+    # ==================================================
+    #             BATCHES & TRANSACTIONS
+    # --------------------------------------------------
+    # ==================================================
+
+    @contextmanager
+    def batch(self) -> Iterator["DataManipulation"]:
+        """
+        Groups several mutations so they are backed up and saved only once.
+
+        Changes stay in memory until the outermost batch exits, then a single
+        backup and save happen and deferred observer notifications are delivered.
+        If an exception escapes a batch, every change made inside it is rolled
+        back in memory (an inner batch only rolls back its own changes).
+
+        Example:
+            with db.batch():
+                for i, user in enumerate(users):
+                    db.set_subcollection("users", str(i), user)
+
+        Yields:
+            DataManipulation: The database itself.
+        """
+        with self._mutating():
+            undo_mark = len(self._batch_undo)
+            notify_mark = len(self._batch_notifications)
+            pending_mark = len(self._pending_changes)
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                self._rollback_batch(undo_mark)
+                del self._batch_notifications[notify_mark:]
+                del self._pending_changes[pending_mark:]
+                if not self._batch_depth:
+                    self._batch_dirty = False
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth:
+                return
+            self._batch_undo = []
+            notifications, self._batch_notifications = self._batch_notifications, []
+            if self._feed is not None:
+                # Before the save, so a backup generation taken with it is tagged past the batch.
+                for action, key, value in notifications:
+                    self._feed.append(action, key, value)
+            if self._batch_dirty:
+                self._batch_dirty = False
+                self._persist()
+        for action, key, value in notifications:
+            self._dispatcher.dispatch(action, key, value)
+        if notifications and self.durability == 'sync':
+            self._flush_feed()
+
+    transaction = batch
+
+    def _rollback_batch(self, undo_mark: int) -> None:
+        """
+        Helper method to undo the batch changes recorded after `undo_mark`.
+
+        Args:
+            undo_mark (int): The undo log length when the batch started.
+        """
+        while len(self._batch_undo) > undo_mark:
+            keys, previous = self._batch_undo.pop()
+            self._unindex_values(keys)
+            parent = self.db
+            for k in keys[:-1]:
+                parent = parent[k]
+            if previous is _MISSING:
+                parent.pop(keys[-1], None)
+            else:
+                parent[keys[-1]] = previous
+            self._chunks.invalidate(keys)
+            self._update_indexes(keys)
+
+    @_shared
     def key_exists(self, key: str) -> bool:
         """
         Checks if a key exists in the database.
@@ -83,6 +331,7 @@ class DataManipulation:
             bool: True if the key exists, False otherwise.
         """
         keys = key.split('/')
+        self._ensure_loaded(keys[0])
         data = self.db
         for k in keys:
             if k in data:
@@ -91,17 +340,22 @@ class DataManipulation:
                 return False
         return True
 
-    def get_data(self, key: str) -> Optional[Any]:
+    @_shared
+    def get_data(self, key: str, view: Optional[bool] = None, copy: bool = False) -> Optional[Any]:
         """
         Gets data from the database by key.
 
         Args:
             key (str): The key to get (path separated by "/").
+            view (Optional[bool], optional): Return a read-only view instead of the stored value
+                (O(1), nothing is copied). Defaults to None (the database's read_only_views setting).
+            copy (bool, optional): Return a detached copy you can change freely. Defaults to False.
 
         Returns:
             Optional[Any]: The data if it exists, None otherwise.
         """
         keys = key.split('/')
+        self._ensure_loaded(keys[0])
         data = self.db
         for k in keys:
             if k in data:
@@ -109,8 +363,9 @@ class DataManipulation:
             else:
                 print(f"\033[91m#bugs\033[0m No data found at key '{key}'. Double-check the key or try a different path.")
                 return None
-        return data
+        return self._output(data, view, copy)
 
+    @_synchronized
     def set_data(self, key: str, value: Optional[Any] = None) -> None:
         """
         Sets data in the database.  Raises an error if the key already exists.
@@ -130,11 +385,12 @@ class DataManipulation:
             print(f"\033[91m#bugs\033[0m Key '{key}' already exists.  Use db.edit_data('{key}', new_value) to update or add new data.")
             return
 
+        self._before_change(key.split('/'))
         self._set_child(self.db, key, value)
         self.notify_observers("set_data", key, value)
-        self._backup_db()  # Backup (mock implementation)
-        self._save_db()  # Save (mock implementation)
+        self._commit_change(key.split('/'))
 
+    @_synchronized
     def edit_data(self, key: str, value: Any) -> None:
         """
         Edits data in the database.  Raises an error if the key doesn't exist.
@@ -152,6 +408,7 @@ class DataManipulation:
             return
 
         keys = key.split('/')
+        self._before_change(keys)
         data = self.db
         for k in keys[:-1]:
             data = data.setdefault(k, {})
@@ -166,20 +423,23 @@ class DataManipulation:
                             current_data[field] += increment_value
                         else:
                             print(f"\033[91m#bugs\033[0m Increment value for '{field}' is not a number. Provide a numeric value for incrementing (e.g., db.edit_data('users/1', {{'increment': {{'score': 5}}}})).")
+                            self._update_indexes(keys)  # Earlier increments already happened
                             return
                     else:
                         print(f"\033[91m#bugs\033[0m Field '{field}' is not a number. Ensure the field exists and is a number before incrementing.")
+                        self._update_indexes(keys)
                         return
                 else:
                     print(f"\033[91m#bugs\033[0m Field '{field}' doesn't exist. Make sure the field exists in the data structure; use db.edit_data to set initial values.")
+                    self._update_indexes(keys)
                     return
         else:
             if isinstance(current_data, dict):
                 value = self._merge_dicts(current_data, value)
             data[keys[-1]] = value
 
-        self._backup_db()
-        self._save_db()
+        self.notify_observers("edit_data", key, data.get(keys[-1]))
+        self._commit_change(keys)
 
     # ==================================================
     #                DATA OBSERVERS
@@ -190,13 +450,18 @@ class DataManipulation:
         """
         Adds an observer for a specific key.
 
+        The observer is called as `observer_func(action, key, value)` for every change
+        of the key and of the paths below it ("users" sees "users/1/name"); an empty key observes everything.
+
         Args:
             key (str): The key to observe (path separated by "/").
             observer_func: The observer function.
         """
+        key = key.strip('/')
         if key not in self.observers:
             self.observers[key] = []
         self.observers[key].append(observer_func)
+        self._dispatcher.trie.add(key, observer_func)
 
     def remove_observer(self, key: str, observer_func) -> None:
         """
@@ -206,25 +471,34 @@ class DataManipulation:
             key (str): The key being observed (path separated by "/").
             observer_func: The observer function to remove.
         """
-        if key in self.observers:
+        key = key.strip('/')
+        if key in self.observers and self._dispatcher.trie.remove(key, observer_func):
             self.observers[key].remove(observer_func)
             if not self.observers[key]:
                 del self.observers[key]
 
     def notify_observers(self, action: str, key: str, value: Any) -> None:
         """
-        Notifies all observers about a change.
+        Notifies the observers of a key and of its parent paths about a change,
+        and adds it to the change feed when there is one.
+
+        Observers are found in a path trie, so the cost depends on the depth of the
+        key, not on how many observers are registered. Depending on `observer_delivery`
+        they run right away or from a background queue.
 
         Args:
             action (str): The type of action ("set_data", "edit_data", etc.).
             key (str): The key that was changed (path separated by "/").
-            value (Any): The new value.
+            value (Any): The new value (None when it was removed).
         """
-        for observer_key, observers in self.observers.items():
-            if key.startswith(observer_key):
-                for observer in observers:
-                    observer(action, key, value)
+        if self._batch_depth:
+            self._batch_notifications.append((action, key, value))
+            return
+        if self._feed is not None:
+            self._feed.append(action, key, value)
+        self._dispatcher.dispatch(action, key, value)
 
+    @_synchronized
     def remove_data(self, key: str) -> None:
         """
         Removes data from the database by key.
@@ -233,6 +507,7 @@ class DataManipulation:
             key (str): The key to remove (path separated by "/").
         """
         keys = key.split('/')
+        self._ensure_loaded(keys[0])
         data = self.db
         for k in keys[:-1]:
             if k in data:
@@ -241,9 +516,10 @@ class DataManipulation:
                 print(f"\033[91m#bugs\033[0m Key '{key}' doesn't exist, cannot remove. Make sure the key path is correct.")
                 return
         if keys[-1] in data:
+            self._before_change(keys)
             del data[keys[-1]]
-            self._backup_db()
-            self._save_db()
+            self.notify_observers("remove_data", key, None)
+            self._commit_change(keys)
         else:
             print(f"\033[91m#bugs\033[0m Key '{key}' doesn't exist, cannot remove. Make sure the key path is correct.")
 
@@ -252,47 +528,59 @@ class DataManipulation:
     # --------------------------------------------------
     # ==================================================
 
-    def get_db(self, raw: bool = False) -> Union[Dict[str, Any], str]:
+    @_shared
+    def get_db(self, raw: bool = False, view: Optional[bool] = None, copy: bool = False) -> Union[Dict[str, Any], str]:
         """
         Gets the entire database, optionally in raw format.
 
         Args:
             raw (bool, optional):  Whether to get the raw data. Defaults to False.
+            view (Optional[bool], optional): Return a read-only view instead of the stored data
+                (O(1), nothing is copied). Defaults to None (the database's read_only_views setting).
+            copy (bool, optional): Return a detached copy you can change freely. An encrypted
+                database returns a copy unless a view is asked for. Defaults to False.
 
         Returns:
             Union[Dict[str, Any], str]: The entire database.
         """
+        self._load_all()
         if raw:
             return self.db
-        if self.crypted:
-            return self._decrypt(self._encrypt(self.db))
-        return self.db
+        if self.crypted and view is None and not self.read_only_views:
+            copy = True
+        return self._output(self.db, view, copy)
 
     # ==================================================
     #            SUBCOLLECTION VALIDATION
     # --------------------------------------------------
     # ==================================================
 
-    def get_subcollection(self, collection_name: str, item_id: Optional[str] = None) -> Optional[Any]:
+    @_shared
+    def get_subcollection(self, collection_name: str, item_id: Optional[str] = None,
+                          view: Optional[bool] = None, copy: bool = False) -> Optional[Any]:
         """
         Gets a specific subcollection, or an item within a subcollection.
 
         Args:
             collection_name (str): The subcollection name.
             item_id (Optional[str], optional): The item ID. Defaults to None.
+            view (Optional[bool], optional): Return a read-only view (see get_data). Defaults to None.
+            copy (bool, optional): Return a detached copy. Defaults to False.
 
         Returns:
             Optional[Any]: The subcollection, or the item. None if it doesn't exist.
         """
+        self._ensure_loaded(collection_name)
         collection = self.db.get(collection_name, {})
         if item_id is not None:
             if item_id in collection:
-                return collection[item_id]
+                return self._output(collection[item_id], view, copy)
             else:
                 print(f"\033[91m#bugs\033[0m ID '{item_id}' not found in collection '{collection_name}'. Check if the ID is correct; use get_subcollection('{collection_name}') to see all items.")
                 return None
-        return collection
+        return self._output(collection, view, copy)
 
+    @_synchronized
     def set_subcollection(self, collection_name: str, item_id: str, value: Any) -> None:
         """
         Sets an item in a specific subcollection.
@@ -302,21 +590,22 @@ class DataManipulation:
             item_id (str): The item ID.
             value (Any): The value to set.
         """
+        self._ensure_loaded(collection_name)
         if not self.validate_data(value):
             print(f"\033[91m#bugs\033[0m Invalid data format.  Your data should look like this: {{'name': 'Aliou', 'age': 30}}.")
             return
 
-        if collection_name not in self.db:
-            self.db[collection_name] = {}
-
-        if item_id in self.db[collection_name]:
+        if item_id in self.db.get(collection_name, {}):
             print(f"\033[91m#bugs\033[0m ID '{item_id}' already exists in collection '{collection_name}'. Use db.edit_subcollection('{collection_name}', '{item_id}', new_value) to update or add new data.")
             return
 
+        self._before_change([collection_name, item_id])
+        self.db.setdefault(collection_name, {})
         self.db[collection_name][item_id] = value
-        self._backup_db()
-        self._save_db()
+        self.notify_observers("set_subcollection", f"{collection_name}/{item_id}", value)
+        self._commit_change([collection_name, item_id])
 
+    @_synchronized
     def edit_subcollection(self, collection_name: str, item_id: str, value: Any) -> None:
         """
         Edits an item in a specific subcollection.
@@ -326,20 +615,23 @@ class DataManipulation:
             item_id (str): The item ID.
             value (Any): The new value.
         """
+        self._ensure_loaded(collection_name)
         if not self.validate_data(value):
             print(f"\033[91m#bugs\033[0m Invalid data format. Your data should look like this: {{'name': 'Aliou', 'age': 30}}.")
             return
 
         if collection_name in self.db and item_id in self.db[collection_name]:
+            self._before_change([collection_name, item_id])
             current_data = self.db[collection_name][item_id]
             if isinstance(current_data, dict):
                 value = self._merge_dicts(current_data, value)
             self.db[collection_name][item_id] = value
-            self._backup_db()
-            self._save_db()
+            self.notify_observers("edit_subcollection", f"{collection_name}/{item_id}", value)
+            self._commit_change([collection_name, item_id])
         else:
             print(f"\033[91m#bugs\033[0m ID '{item_id}' not found in collection '{collection_name}', cannot edit. Use 'set_subcollection' to create a new item.")
 
+    @_synchronized
     def remove_subcollection(self, collection_name: str, item_id: Optional[str] = None) -> None:
         """
         Removes a subcollection or an item within it.
@@ -348,19 +640,22 @@ class DataManipulation:
             collection_name (str): The subcollection name.
             item_id (Optional[str], optional): The item ID. Defaults to None.
         """
+        self._ensure_loaded(collection_name)
         if item_id is None:
             if collection_name in self.db:
+                self._before_change([collection_name])
                 del self.db[collection_name]
-                self._backup_db()
-                self._save_db()
+                self.notify_observers("remove_subcollection", collection_name, None)
+                self._commit_change([collection_name])
             else:
                 print(f"\033[91m#bugs\033[0m Collection '{collection_name}' not found, cannot remove. Make sure the collection name is correct.")
                 return
         else:
             if collection_name in self.db and item_id in self.db[collection_name]:
+                self._before_change([collection_name, item_id])
                 del self.db[collection_name][item_id]
-                self._backup_db()
-                self._save_db()
+                self.notify_observers("remove_subcollection", f"{collection_name}/{item_id}", None)
+                self._commit_change([collection_name, item_id])
             else:
                 print(f"\033[91m#bugs\033[0m ID '{item_id}' not found in collection '{collection_name}', cannot remove. Check the ID and collection name; use get_subcollection('{collection_name}') to see all items.")
                 return
\ No newline at end of file
@@ -0,0 +1,215 @@
+import time
+import queue
+import inspect
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Event = Tuple[str, str, Any]  # (action, key, value)
+_STOP = object()  # Tells the delivery thread to exit
+
+class ObserverTrie:
+    """
+    Observer registrations stored in a trie keyed by path segments, so finding
+    the observers of a key costs O(path depth) whatever the number of observers.
+
+    An observer registered on "users" receives the changes of "users" and of every
+    path below it ("users/1", "users/1/name", ...); one registered on "" receives everything.
+    """
+    def __init__(self):
+        """
+        Initializes the ObserverTrie.
+        """
+        self.root: Dict[str, Any] = {"observers": [], "children": {}}
+        self.count = 0
+
+    @staticmethod
+    def _parts(key: str) -> List[str]:
+        return key.split('/') if key else []
+
+    def add(self, key: str, observer: Callable) -> None:
+        """
+        Registers an observer on a path.
+
+        Args:
+            key (str): The observed path (separated by "/").
+            observer (Callable): The observer function.
+        """
+        node = self.root
+        for part in self._parts(key):
+            node = node["children"].setdefault(part, {"observers": [], "children": {}})
+        node["observers"].append(observer)
+        self.count += 1
+
+    def remove(self, key: str, observer: Callable) -> bool:
+        """
+        Unregisters an observer, pruning the branches left empty.
+
+        Args:
+            key (str): The observed path.
+            observer (Callable): The observer function.
+
+        Returns:
+            bool: True if the observer was registered.
+        """
+        trail = [self.root]
+        for part in self._parts(key):
+            node = trail[-1]["children"].get(part)
+            if node is None:
+                return False
+            trail.append(node)
+        if observer not in trail[-1]["observers"]:
+            return False
+        trail[-1]["observers"].remove(observer)
+        self.count -= 1
+        for parent, part, node in reversed(list(zip(trail, self._parts(key), trail[1:]))):
+            if node["observers"] or node["children"]:
+                break
+            del parent["children"][part]
+        return True
+
+    def match(self, key: str) -> List[Callable]:
+        """
+        Returns the observers of a path: those registered on it and on each of its ancestors.
+
+        Args:
+            key (str): The changed path.
+
+        Returns:
+            List[Callable]: The observers, from the shallowest registration to the deepest.
+        """
+        node = self.root
+        found = list(node["observers"])
+        for part in self._parts(key):
+            node = node["children"].get(part)
+            if node is None:
+                break
+            found.extend(node["observers"])
+        return found
+
+class ObserverDispatcher:
+    """
+    Delivers change events to the observers registered in an ObserverTrie.
+
+    Three delivery modes are available:
+    - 'sync': observers run in the writing thread, right after the change (the classic behavior).
+    - 'thread': events go to a queue drained by a background thread, so writers never wait for observers.
+    - 'asyncio': events are handed to an event loop; observers run in it and may be coroutines.
+
+    In the 'thread' and 'asyncio' modes, events received within `coalesce` seconds
+    are merged per key: observers only see the latest change of each key.
+    """
+    MODES = ('sync', 'thread', 'asyncio')
+
+    def __init__(self, delivery: str = 'sync', coalesce: float = 0.0, loop: Optional[Any] = None):
+        """
+        Initializes the ObserverDispatcher.
+
+        Args:
+            delivery (str, optional): The delivery mode ('sync', 'thread' or 'asyncio'). Defaults to 'sync'.
+            coalesce (float, optional): Coalescing window in seconds (queued modes only). Defaults to 0.0.
+            loop (Optional[asyncio.AbstractEventLoop], optional): The event loop of the 'asyncio' mode.
+        """
+        self.delivery = delivery
+        self.coalesce = coalesce
+        self.loop = loop
+        self.trie = ObserverTrie()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._async_pending: Dict[str, Event] = {}
+        self._async_handle = None
+
+    def dispatch(self, action: str, key: str, value: Any) -> None:
+        """
+        Sends a change event to the observers of `key`.
+
+        Args:
+            action (str): The mutator that made the change ("set_data", "edit_data", ...).
+            key (str): The changed path.
+            value (Any): The new value (None for removals).
+        """
+        if not self.trie.count:
+            return
+        if self.delivery == 'sync':
+            for observer in self.trie.match(key):
+                observer(action, key, value)
+        elif self.delivery == 'thread':
+            self._ensure_worker()
+            self._queue.put((action, key, value))
+        else:
+            self.loop.call_soon_threadsafe(self._enqueue_async, (action, key, value))
+
+    def _deliver(self, event: Event) -> None:
+        """
+        Runs the observers of one event; a failing observer doesn't stop the others.
+        """
+        action, key, value = event
+        for observer in self.trie.match(key):
+            try:
+                result = observer(action, key, value)
+                if inspect.isawaitable(result) and self.delivery == 'asyncio':
+                    self.loop.create_task(result)
+            except Exception as e:
+                print(f"\033[91m#bugs\033[0m Observer of '{key}' failed: {e}")
+
+    # ---------------- thread delivery ----------------
+
+    def _ensure_worker(self) -> None:
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run_worker, name="LiteJsonDb-observers", daemon=True)
+                self._worker.start()
+
+    def _run_worker(self) -> None:
+        stopping = False
+        while not stopping:
+            event = self._queue.get()
+            if event is _STOP:
+                return
+            pending = {event[1]: event}
+            if self.coalesce > 0:
+                # Collect what arrives until the window closes (it opens with the first event,
+                # so steady writes can't hold delivery back); a key keeps its latest event.
+                deadline = time.monotonic() + self.coalesce
+                while not stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        event = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if event is _STOP:
+                        stopping = True
+                        break
+                    pending.pop(event[1], None)
+                    pending[event[1]] = event
+            for event in pending.values():
+                self._deliver(event)
+
+    # ---------------- asyncio delivery ----------------
+
+    def _enqueue_async(self, event: Event) -> None:
+        if self.coalesce <= 0:
+            self._deliver(event)
+            return
+        self._async_pending.pop(event[1], None)
+        self._async_pending[event[1]] = event
+        if self._async_handle is None:
+            self._async_handle = self.loop.call_later(self.coalesce, self._flush_async)
+
+    def _flush_async(self) -> None:
+        pending, self._async_pending = self._async_pending, {}
+        self._async_handle = None
+        for event in pending.values():
+            self._deliver(event)
+
+    def close(self) -> None:
+        """
+        Delivers the queued events and stops the delivery thread ('thread' mode).
+        """
+        with self._worker_lock:
+            worker, self._worker = self._worker, None
+        if worker is not None and worker.is_alive():
+            self._queue.put(_STOP)
+            worker.join()
@@ -0,0 +1,354 @@
+import heapq
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .indexing import _MISSING, _field_value, _same_value, _sort_key
+
+OPERATORS = ('eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'in', 'nin', 'contains', 'startswith', 'exists')
+RANGE_OPERATORS = ('gt', 'gte', 'lt', 'lte')
+
+def _compare(found: Any, value: Any) -> Optional[int]:
+    """
+    Orders two field values: numbers with numbers, dates (ISO strings included) with
+    dates, strings with strings. Returns -1, 0 or 1, or None if they can't be compared.
+    """
+    found_key, value_key = _sort_key(found), _sort_key(value)
+    if found_key is not None and value_key is not None:
+        if found_key[0] != value_key[0]:
+            return None
+        found, value = found_key[1], value_key[1]
+    elif not (isinstance(found, str) and isinstance(value, str)):
+        return None
+    return (found > value) - (found < value)
+
+def _matches(found: Any, op: str, value: Any) -> bool:
+    """
+    Evaluates one predicate against a field value (_MISSING if the record lacks the field).
+    """
+    if op == 'exists':
+        return (found is not _MISSING) == bool(value)
+    if op == 'ne':
+        return not _same_value(found, value)
+    if op == 'nin':
+        return not any(_same_value(found, v) for v in value)
+    if found is _MISSING:
+        return False
+    if op == 'eq':
+        return _same_value(found, value)
+    if op == 'in':
+        return any(_same_value(found, v) for v in value)
+    if op == 'contains':
+        if isinstance(found, str) and isinstance(value, str):
+            return value in found
+        return isinstance(found, list) and any(_same_value(item, value) for item in found)
+    if op == 'startswith':
+        return isinstance(found, str) and isinstance(value, str) and found.startswith(value)
+    order = _compare(found, value)
+    if order is None:
+        return False
+    return {'gt': order > 0, 'gte': order >= 0, 'lt': order < 0, 'lte': order <= 0}[op]
+
+def _order_key(value: Any) -> Tuple[int, Any]:
+    """
+    Sort key used by order_by: numbers, then dates, then strings, then booleans, then
+    everything else (None, lists, dicts).
+    Numbers and dates use the same keys as sorted indexes, so both plans agree.
+    """
+    key = _sort_key(value)
+    if key is not None:
+        return key
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, bool):
+        return (3, value)
+    return (4, 0)
+
+class Query:
+    """
+    Declarative, lazily evaluated query over the records of a subcollection.
+
+    Built with chained calls and run when iterated:
+
+        db.query("users").where(age__gte=18, country="SN").order_by("-score").limit(50).fields("name", "score")
+
+    A small planner picks the cheapest access path: an index lookup for equality
+    predicates, a sorted index range scan for comparisons, an index-ordered scan
+    when ordering on an indexed field (so a limit stops the scan early), or a full
+    scan. `explain()` shows the chosen plan.
+
+    Results are detached copies, so editing them doesn't touch the database; `views()`
+    returns read-only views instead (nothing is copied).
+    """
+    def __init__(self, db: Any, collection: str):
+        """
+        Initializes the Query.
+
+        Args:
+            db (Any): The JsonDB instance to query.
+            collection (str): The subcollection name.
+        """
+        self.db = db
+        self.collection = collection
+        self.predicates: List[Tuple[str, str, Any]] = []
+        self.ordering: List[Tuple[str, bool]] = []
+        self.max_results: Optional[int] = None
+        self.projection: Optional[List[str]] = None
+        self.as_views = False
+
+    def where(self, *conditions: Dict[str, Any], **kwargs: Any) -> "Query":
+        """
+        Adds predicates, all of which must match. Each key is a field name, optionally
+        followed by `__<operator>` (eq, ne, gt, gte, lt, lte, in, nin, contains, startswith,
+        exists). Nested fields use "/" and can be passed in a dict: where({"address/city": "Dakar"}).
+
+        Returns:
+            Query: The query itself, for chaining.
+        """
+        for condition in conditions + (kwargs,):
+            for key, value in condition.items():
+                field, separator, op = key.rpartition('__')
+                if not separator or op not in OPERATORS:
+                    field, op = key, 'eq'
+                self.predicates.append((field, op, value))
+        return self
+
+    def order_by(self, *fields: str) -> "Query":
+        """
+        Orders the results by one or more fields; prefix a field with "-" for descending order.
+        Records without the field come last.
+
+        Returns:
+            Query: The query itself, for chaining.
+        """
+        self.ordering = [(field[1:], True) if field.startswith('-') else (field, False) for field in fields]
+        return self
+
+    def limit(self, count: int) -> "Query":
+        """
+        Caps the number of results.
+
+        Returns:
+            Query: The query itself, for chaining.
+        """
+        self.max_results = count
+        return self
+
+    def fields(self, *names: str) -> "Query":
+        """
+        Only returns these fields of each record.
+
+        Returns:
+            Query: The query itself, for chaining.
+        """
+        self.projection = list(names)
+        return self
+
+    def views(self) -> "Query":
+        """
+        Returns read-only views of the stored records instead of copies.
+
+        Returns:
+            Query: The query itself, for chaining.
+        """
+        self.as_views = True
+        return self
+
+    # ==================================================
+    #                    PLANNER
+    # --------------------------------------------------
+    # ==================================================
+
+    def _plan(self) -> Dict[str, Any]:
+        """
+        Picks the access path and tells whether its output is already in the requested order.
+        """
+        indexes = self.db._indexes.get(self.collection, {})
+        order_field = self.ordering[0][0] if len(self.ordering) == 1 else None
+
+        best = None
+        for field, op, value in self.predicates:
+            if op not in ('eq', 'in') or field not in indexes:
+                continue
+            index = self.db._get_index(self.collection, field)
+            values = [value] if op == 'eq' else list(value)
+            size = sum(len(index.lookup(v)) for v in values)
+            if best is None or size < best["estimate"]:
+                best = {"access": "index lookup", "index": index, "field": field, "values": values, "estimate": size}
+        if best is not None:
+            best["ordered"] = False
+            return best
+
+        ranges = [(field, op, value) for field, op, value in self.predicates
+                  if op in RANGE_OPERATORS and field in indexes and indexes[field].kind == 'sorted']
+        if ranges:
+            field = order_field if any(f == order_field for f, _, _ in ranges) else ranges[0][0]
+            bounds = {"low": None, "high": None, "include_low": True, "include_high": True}
+            for f, op, value in ranges:
+                if f != field:
+                    continue
+                if op in ('gt', 'gte'):
+                    bounds["low"], bounds["include_low"] = value, op == 'gte'
+                else:
+                    bounds["high"], bounds["include_high"] = value, op == 'lte'
+            return {"access": "sorted index range", "index": self.db._get_index(self.collection, field),
+                    "field": field, "bounds": bounds, "ordered": field == order_field}
+
+        if order_field is not None and order_field in indexes and indexes[order_field].kind == 'sorted':
+            return {"access": "sorted index scan", "index": self.db._get_index(self.collection, order_field),
+                    "field": order_field, "ordered": True}
+
+        return {"access": "full scan", "ordered": False}
+
+    def explain(self) -> Dict[str, Any]:
+        """
+        Describes how the query will run, without running it.
+
+        Returns:
+            Dict[str, Any]: The access path, the index used, the predicates evaluated per
+            record, how the results are ordered and whether the limit stops the scan early.
+        """
+        self.db._ensure_loaded(self.collection)
+        plan = self._plan()
+        explanation = {"collection": self.collection, "access": plan["access"]}
+        if "field" in plan:
+            explanation["index"] = f"{plan['index'].kind} index on '{plan['field']}'"
+        if "estimate" in plan:
+            explanation["candidates"] = plan["estimate"]
+        explanation["filter"] = [f"{field} {op} {value!r}" for field, op, value in self.predicates]
+        if not self.ordering:
+            explanation["order"] = "none"
+        elif plan["ordered"]:
+            explanation["order"] = "index order (no sort)"
+        elif self.max_results is not None:
+            explanation["order"] = f"top-{self.max_results} heap selection"
+        else:
+            explanation["order"] = "full sort"
+        explanation["limit"] = self.max_results
+        explanation["early_stop"] = self.max_results is not None and (plan["ordered"] or not self.ordering)
+        return explanation
+
+    # ==================================================
+    #                    EXECUTION
+    # --------------------------------------------------
+    # ==================================================
+
+    def _candidates(self, plan: Dict[str, Any], records: Dict[str, Any]) -> Iterable[str]:
+        """
+        Yields the candidate record IDs produced by the access path.
+        """
+        if plan["access"] == "index lookup":
+            seen = set()
+            for value in plan["values"]:
+                for item_id in plan["index"].lookup(value):
+                    if item_id not in seen:
+                        seen.add(item_id)
+                        yield item_id
+            return
+        if plan["access"] == "full scan":
+            yield from list(records)
+            return
+
+        index = plan["index"]
+        descending = plan["ordered"] and self.ordering[0][1]
+        unordered = sorted(index.unordered, key=lambda i: _order_key(_field_value(records.get(i), index.path)), reverse=descending)
+        if plan["access"] == "sorted index range":
+            ids = index.scan(reverse=descending, **plan["bounds"])
+            # Strings compared with strings aren't in the index; they are checked by the predicates.
+            yield from (list(ids) + unordered) if not descending else (unordered + list(ids))
+            return
+        # Index-ordered scan: ordered values, then unorderable ones, then records without the field.
+        if descending:
+            yield from unordered
+        yield from index.scan(reverse=descending)
+        if not descending:
+            yield from unordered
+        yield from (item_id for item_id in list(records) if item_id not in index.keys and item_id not in index.unordered)
+
+    def _sorted(self, items: List[Tuple[str, Any]]) -> List[Tuple[str, Any]]:
+        """
+        Sorts matching records on every order_by field (stable sorts, last field first).
+        """
+        for field, descending in reversed(self.ordering):
+            path = field.split('/')
+            present = [(item_id, record) for item_id, record in items if _field_value(record, path) is not _MISSING]
+            missing = [(item_id, record) for item_id, record in items if _field_value(record, path) is _MISSING]
+            present.sort(key=lambda item: _order_key(_field_value(item[1], path)), reverse=descending)
+            items = present + missing
+        return items
+
+    def _project(self, record: Any) -> Any:
+        """
+        Keeps only the requested fields of a record.
+        """
+        if self.projection is None or not isinstance(record, dict):
+            return record
+        projected = {}
+        for name in self.projection:
+            value = _field_value(record, name.split('/'))
+            if value is not _MISSING:
+                projected[name] = value
+        return projected
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Runs the query lazily. Iterating doesn't hold the database's read lock: when
+        other threads write, use all(), first() or count(), which do.
+
+        Yields:
+            Tuple[str, Any]: (item ID, record) pairs.
+        """
+        for item_id, record in self._run():
+            yield item_id, self.db._output(record, view=self.as_views, copy=not self.as_views)
+
+    def _run(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Yields the (item ID, stored record) pairs of the results, projected but not copied.
+        """
+        self.db._ensure_loaded(self.collection)
+        records = self.db.db.get(self.collection)
+        if not isinstance(records, dict) or self.max_results == 0:
+            return
+        plan = self._plan()
+        predicates = [(field.split('/'), op, value) for field, op, value in self.predicates]
+        matches = ((item_id, records[item_id]) for item_id in self._candidates(plan, records)
+                   if item_id in records and all(_matches(_field_value(records[item_id], path), op, value)
+                                                 for path, op, value in predicates))
+        if self.ordering and not plan["ordered"]:
+            if self.max_results is not None and len(self.ordering) == 1:
+                field, descending = self.ordering[0]
+                path = field.split('/')
+                items = list(matches)
+                present = [item for item in items if _field_value(item[1], path) is not _MISSING]
+                select = heapq.nlargest if descending else heapq.nsmallest
+                top = select(self.max_results, present, key=lambda item: _order_key(_field_value(item[1], path)))
+                if len(top) < self.max_results:
+                    top += [item for item in items if _field_value(item[1], path) is _MISSING][:self.max_results - len(top)]
+                matches = iter(top)
+            else:
+                matches = iter(self._sorted(list(matches)))
+        for count, (item_id, record) in enumerate(matches):
+            if self.max_results is not None and count >= self.max_results:
+                return
+            yield item_id, self._project(record)
+
+    def all(self) -> Dict[str, Any]:
+        """
+        Runs the query and returns every result.
+
+        Returns:
+            Dict[str, Any]: The matching records keyed by item ID, in order.
+        """
+        with self.db._read_lock:
+            return dict(self)
+
+    def first(self) -> Optional[Tuple[str, Any]]:
+        """
+        Runs the query and returns the first (item ID, record) pair, or None.
+        """
+        with self.db._read_lock:
+            return next(iter(self), None)
+
+    def count(self) -> int:
+        """
+        Runs the query and counts the results.
+        """
+        with self.db._read_lock:
+            return sum(1 for _ in self._run())
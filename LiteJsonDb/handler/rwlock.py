@@ -0,0 +1,153 @@
+import threading
+
+class ReadWriteLock:
+    """
+    Reader-writer lock: any number of threads can read at the same time, while a
+    writer has the data to itself.
+
+    - Both sides are reentrant, and the writing thread can also read.
+    - Writers are preferred: once a writer waits, new readers wait behind it, so
+      a steady flow of reads can't starve writes.
+    - A reading thread that needs to write (e.g. to load a lazy collection) gives
+      up its read hold while it writes and gets it back afterwards, instead of deadlocking.
+    - The writer can downgrade() to a reader once its change is applied, so the save
+      that follows runs alongside reads while other writers keep waiting.
+
+    `lock.read` and `lock.write` are the two sides; both work with `with` and have
+    acquire()/release(), so `lock.write` can stand in for a threading.RLock.
+    """
+    def __init__(self):
+        """
+        Initializes the ReadWriteLock.
+        """
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0  # Threads holding the read side (the writer reading doesn't count)
+        self._writer = None  # Ident of the writing thread
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._suspended_reads = 0  # Read depth the writer gave up to write, restored on release
+        self._local = threading.local()  # Per-thread read depth
+        self.read = _Side(self.acquire_read, self.release_read)
+        self.write = _Side(self.acquire_write, self.release_write)
+
+    def _read_depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    def acquire_read(self) -> None:
+        """
+        Takes the read side, waiting while a writer holds or waits for the lock.
+        """
+        depth = self._read_depth()
+        if depth:
+            self._local.depth = depth + 1
+            return
+        with self._cond:
+            if self._writer == threading.get_ident():
+                self._local.counted = False
+            else:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+                self._readers += 1
+                self._local.counted = True
+        self._local.depth = 1
+
+    def release_read(self) -> None:
+        """
+        Releases one level of the read side.
+        """
+        depth = self._read_depth() - 1
+        self._local.depth = depth
+        if depth or not self._local.counted:
+            return
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+        Takes the write side, waiting for the readers and the current writer to finish.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            suspended = self._read_depth()
+            if suspended:
+                # Upgrading in place would deadlock with another upgrading reader: step out first.
+                self._local.depth = 0
+                if self._local.counted:
+                    self._readers -= 1
+                    self._cond.notify_all()
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+            self._suspended_reads = suspended
+
+    def release_write(self) -> None:
+        """
+        Releases one level of the write side (the outermost release lets readers and writers in).
+        """
+        with self._cond:
+            self._write_depth -= 1
+            if self._write_depth:
+                return
+            self._writer = None
+            suspended, self._suspended_reads = self._suspended_reads, 0
+            self._cond.notify_all()
+            if suspended:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+                self._readers += 1
+                self._local.counted = True
+                self._local.depth = suspended
+
+    def downgrade(self) -> bool:
+        """
+        Turns the outermost write hold of the current thread into a read hold, atomically.
+        Release it with release_read() afterwards.
+
+        Returns:
+            bool: True if the lock was downgraded, False if the write side is held more than once
+                (an outer caller is still writing) and nothing changed.
+        """
+        with self._cond:
+            if self._writer != threading.get_ident() or self._write_depth != 1 or self._read_depth():
+                return False
+            self._writer = None
+            self._write_depth = 0
+            self._readers += 1
+            self._local.counted = True
+            self._local.depth = 1 + self._suspended_reads
+            self._suspended_reads = 0
+            self._cond.notify_all()
+            return True
+
+    @property
+    def write_depth(self) -> int:
+        """
+        How many times the write side is held (by whichever thread holds it).
+        """
+        return self._write_depth
+
+class _Side:
+    """
+    One side of a ReadWriteLock, usable like a lock object.
+    """
+    __slots__ = ('acquire', 'release')
+
+    def __init__(self, acquire, release):
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self) -> None:
+        self.acquire()
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,189 @@
+import re
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional binary format
+    msgpack = None
+
+# Binary formats start with this header so they can be told apart from plain JSON on load.
+# JSON-based formats are written without a header, so every JSON reader can open them.
+HEADER_PREFIX = b"#LJDB:"
+
+SERIALIZERS = ('json', 'compact', 'orjson', 'msgpack')
+
+# orjson isn't lossless for every JSON document: it reads integers beyond 64 bits as floats,
+# rejects NaN/Infinity, and writes NaN/Infinity as null. A run of 19+ digits may be such an
+# integer and sends the document through the stdlib instead (a false alarm only costs speed);
+# a null in orjson's output only does so if the data really holds a NaN or an infinity.
+_LONG_DIGITS = re.compile(r"\d{19}")
+_LONG_DIGITS_BYTES = re.compile(rb"\d{19}")
+
+def _has_non_finite(data: Any) -> bool:
+    """
+    Tells whether a document holds a NaN or an infinity, without recursion.
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        for value in (node.values() if isinstance(node, dict) else node):
+            kind = type(value)
+            if kind is float:
+                if value - value:  # nan for NaN and the infinities, 0.0 otherwise
+                    return True
+            elif kind is dict or kind is list:
+                stack.append(value)
+    return False
+
+def _orjson_lossless(data: Any) -> Optional[bytes]:
+    """
+    Serializes data with orjson, or returns None when its output wouldn't be lossless
+    (huge ints, NaN or Infinity written as null).
+    """
+    try:
+        payload = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return None  # Something orjson can't handle (e.g. huge ints); the stdlib can.
+    if b"null" in payload and _has_non_finite([data]):
+        return None
+    return payload
+
+def fast_dumps(data: Any) -> str:
+    """
+    Serializes data to compact JSON text, using orjson when it is installed and the
+    result is known to be lossless.
+
+    Args:
+        data (Any): The data to serialize.
+
+    Returns:
+        str: The JSON text.
+    """
+    if orjson is not None:
+        payload = _orjson_lossless(data)
+        if payload is not None:
+            return payload.decode('utf-8')
+    return json.dumps(data, separators=(',', ':'))
+
+def fast_loads(text: Any) -> Any:
+    """
+    Parses JSON text or bytes, using orjson when it is installed and can read the
+    document without loss (no integer beyond 64 bits, no NaN/Infinity).
+
+    Args:
+        text (Union[str, bytes]): The JSON document.
+
+    Returns:
+        Any: The parsed data.
+    """
+    if orjson is not None:
+        pattern = _LONG_DIGITS_BYTES if isinstance(text, (bytes, bytearray, memoryview)) else _LONG_DIGITS
+        if not pattern.search(text):
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass  # NaN/Infinity, which the stdlib reads
+    return json.loads(text)
+
+def _json_dumps(data: Any) -> bytes:
+    return json.dumps(data, indent=4).encode('utf-8')
+
+def _compact_dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def _orjson_dumps(data: Any) -> bytes:
+    payload = _orjson_lossless(data)
+    return payload if payload is not None else _compact_dumps(data)  # Huge ints, NaN or Infinity
+
+def _msgpack_dumps(data: Any) -> bytes:
+    try:
+        return HEADER_PREFIX + b"msgpack\n" + msgpack.packb(data, use_bin_type=True)
+    except OverflowError:
+        return _compact_dumps(data)  # Integers beyond 64 bits, which msgpack can't hold
+
+def _msgpack_loads(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+_DUMPERS: Dict[str, Callable[[Any], bytes]] = {
+    'json': _json_dumps,
+    'compact': _compact_dumps,
+    'orjson': _orjson_dumps,
+    'msgpack': _msgpack_dumps,
+}
+
+def resolve_serializer(name: str) -> str:
+    """
+    Checks a serializer name and falls back to compact stdlib JSON when the
+    optional library it needs isn't installed.
+
+    Args:
+        name (str): The requested serializer.
+
+    Returns:
+        str: The serializer that will actually be used.
+
+    Raises:
+        ValueError: If the serializer is unknown.
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"\033[90m#bugs\033[0m Unknown serializer: '{name}'!")
+    if (name == 'orjson' and orjson is None) or (name == 'msgpack' and msgpack is None):
+        print(f"\033[90m#info\033[0m '{name}' isn't installed, falling back to compact JSON. Tip: pip install {name}")
+        return 'compact'
+    return name
+
+def encode_payload(serializer: str, data: Any) -> bytes:
+    """
+    Serializes data into the bytes stored on disk, header included.
+
+    Args:
+        serializer (str): A serializer returned by resolve_serializer.
+        data (Any): The data to serialize.
+
+    Returns:
+        bytes: The file content.
+    """
+    return _DUMPERS[serializer](data)
+
+def detect_format(raw: bytes) -> Tuple[str, bytes]:
+    """
+    Detects the format of a stored payload from its header.
+
+    Args:
+        raw (bytes): The file content.
+
+    Returns:
+        Tuple[str, bytes]: The format name ('json' for anything without a header) and the payload body.
+    """
+    if raw.startswith(HEADER_PREFIX):
+        header, _, body = raw.partition(b"\n")
+        return header[len(HEADER_PREFIX):].decode('ascii'), body
+    return 'json', raw
+
+def decode_payload(raw: bytes) -> Any:
+    """
+    Parses the bytes stored on disk, whatever serializer wrote them.
+
+    Args:
+        raw (bytes): The file content.
+
+    Returns:
+        Any: The stored data.
+
+    Raises:
+        ValueError: If the payload is corrupted or needs a library that isn't installed.
+    """
+    name, body = detect_format(raw)
+    if name == 'json':
+        return fast_loads(body)
+    if name == 'msgpack':
+        if msgpack is None:
+            raise ValueError("\033[91m#bugs\033[0m This database was saved with msgpack. Tip: pip install msgpack")
+        return _msgpack_loads(body)
+    raise ValueError(f"\033[91m#bugs\033[0m Unknown database format: '{name}'.")
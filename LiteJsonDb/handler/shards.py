@@ -0,0 +1,131 @@
+import os
+import json
+import shutil
+from urllib.parse import quote
+from typing import Dict, Iterable
+from .compression import write_compressed, read_compressed
+
+class ShardStore:
+    """
+    Stores each top-level collection of the database in its own file.
+
+    The directory holds one file per collection plus a `manifest.json` listing
+    the collections and the file each one lives in, so a write only has to
+    touch the collections that actually changed. Shards are compressed if the
+    store is; the manifest stays plain JSON.
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str, compression: str = 'none'):
+        """
+        Initializes the ShardStore.
+
+        Args:
+            directory (str): The directory holding the shard files.
+            compression (str, optional): The codec shards are written with (see compression.py). Defaults to 'none'.
+        """
+        self.directory = directory
+        self.compression = compression
+        self.manifest_path = os.path.join(directory, self.MANIFEST)
+
+    def exists(self) -> bool:
+        """
+        Checks whether a manifest has been written in the directory.
+        """
+        return os.path.exists(self.manifest_path)
+
+    @staticmethod
+    def shard_filename(name: str) -> str:
+        """
+        Builds a safe file name for a collection (any character the filesystem
+        might not like, dots included, is percent-encoded).
+
+        Args:
+            name (str): The collection name.
+
+        Returns:
+            str: The shard file name.
+        """
+        return quote(name, safe='').replace('.', '%2E') + ".json"
+
+    def read_manifest(self) -> Dict[str, str]:
+        """
+        Reads the manifest.
+
+        Returns:
+            Dict[str, str]: The collection names mapped to their shard file names.
+        """
+        with open(self.manifest_path, 'r', encoding='utf-8') as file:
+            return json.load(file)["collections"]
+
+    def write_manifest(self, collections: Dict[str, str], fsync: bool = False) -> None:
+        """
+        Atomically writes the manifest.
+
+        Args:
+            collections (Dict[str, str]): The collection names mapped to their shard file names.
+            fsync (bool, optional): Force the manifest to stable storage. Defaults to False.
+        """
+        payload = json.dumps({"format": 1, "collections": collections}, indent=4).encode('utf-8')
+        self._write(self.manifest_path, payload, fsync)
+
+    def read(self, filename: str) -> bytes:
+        """
+        Reads the raw content of a shard, decompressed.
+
+        Args:
+            filename (str): The shard file name.
+
+        Returns:
+            bytes: The shard content.
+        """
+        with open(os.path.join(self.directory, filename), 'rb') as file:
+            return read_compressed(file)
+
+    def write(self, filename: str, payload: bytes, fsync: bool = False) -> None:
+        """
+        Atomically writes a shard.
+
+        Args:
+            filename (str): The shard file name.
+            payload (bytes): The serialized collection.
+            fsync (bool, optional): Force the shard to stable storage. Defaults to False.
+        """
+        self._write(os.path.join(self.directory, filename), payload, fsync, self.compression)
+
+    def remove(self, filename: str) -> None:
+        """
+        Removes a shard file if it exists.
+
+        Args:
+            filename (str): The shard file name.
+        """
+        path = os.path.join(self.directory, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def copy_to(self, other: "ShardStore", filenames: Iterable[str]) -> None:
+        """
+        Copies some shards and the manifest into another store.
+
+        Args:
+            other (ShardStore): The destination store.
+            filenames (Iterable[str]): The shard file names to copy (missing ones are skipped).
+        """
+        os.makedirs(other.directory, exist_ok=True)
+        for filename in filenames:
+            path = os.path.join(self.directory, filename)
+            if os.path.exists(path):
+                shutil.copy(path, os.path.join(other.directory, filename))
+        if self.exists():
+            shutil.copy(self.manifest_path, other.manifest_path)
+
+    def _write(self, path: str, payload: bytes, fsync: bool, compression: str = 'none') -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as file:
+            write_compressed(file, payload, compression)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
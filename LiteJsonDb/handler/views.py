@@ -0,0 +1,94 @@
+import copy
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List
+
+def read_only(value: Any) -> Any:
+    """
+    Wraps a stored value in a read-only view (dicts and lists); other values are
+    immutable already and returned as they are.
+
+    Args:
+        value (Any): The stored value.
+
+    Returns:
+        Any: A ReadOnlyDict, a ReadOnlyList or the value itself.
+    """
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+class ReadOnlyDict(Mapping):
+    """
+    Read-only view of a stored dict, in the spirit of types.MappingProxyType.
+
+    Creating a view is O(1): nothing is copied, and nested dicts and lists are
+    wrapped only when they are accessed. The view is live, so it shows later
+    changes made through the database API, but it can't be used to change the data.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getitem__(self, key: str) -> Any:
+        return read_only(self._data[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ReadOnlyDict, ReadOnlyList)):
+            other = other._data
+        return self._data == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyDict({self._data!r})"
+
+    def copy(self) -> Dict[str, Any]:
+        """
+        Returns a detached, mutable deep copy of the data.
+        """
+        return copy.deepcopy(self._data)
+
+class ReadOnlyList(Sequence):
+    """
+    Read-only view of a stored list (see ReadOnlyDict).
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data: List[Any]):
+        self._data = data
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return ReadOnlyList(self._data[index])
+        return read_only(self._data[index])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ReadOnlyDict, ReadOnlyList)):
+            other = other._data
+        return self._data == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyList({self._data!r})"
+
+    def copy(self) -> List[Any]:
+        """
+        Returns a detached, mutable deep copy of the data.
+        """
+        return copy.deepcopy(self._data)
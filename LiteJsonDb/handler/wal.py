@@ -0,0 +1,109 @@
+import os
+import logging
+from typing import Any, Callable, Dict, Iterator, List
+
+class WriteAheadLog:
+    """
+    Append-only mutation log stored next to the database snapshot.
+
+    Each line of the log is one encoded record describing a single mutation
+    (``{"op": "set", "path": [...], "value": ...}`` or ``{"op": "del", "path": [...]}``).
+    Records are absolute assignments, so replaying the log on top of the last
+    snapshot rebuilds the current state of the database.
+    """
+    def __init__(self, path: str, encode: Callable[[Dict[str, Any]], str], decode: Callable[[str], Dict[str, Any]]):
+        """
+        Initializes the WriteAheadLog.
+
+        Args:
+            path (str): The path of the log file.
+            encode (Callable): Turns a record into a single line of text (no newlines).
+            decode (Callable): Turns a line of text back into a record.
+        """
+        self.path = path
+        self.compacting_path = path + ".compacting"
+        self.encode = encode
+        self.decode = decode
+
+    def append(self, lines: List[str], fsync: bool = False) -> None:
+        """
+        Appends already encoded records to the log.
+
+        Args:
+            lines (List[str]): The encoded records to append.
+            fsync (bool, optional): Force the records to stable storage. Defaults to False.
+        """
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write("".join(line + "\n" for line in lines))
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+
+    def size(self) -> int:
+        """
+        Returns the size of the active log in bytes (0 if it doesn't exist yet).
+        """
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def read(self, path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the records stored in a log file, in order.
+
+        A torn last line (crash in the middle of an append) is skipped with a warning.
+
+        Args:
+            path (str): The log file to read.
+
+        Yields:
+            Dict[str, Any]: The decoded records.
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
+            for line_number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = self.decode(line)
+                except Exception as e:
+                    print(f"\033[91m#bugs\033[0m Skipping unreadable log record at line {line_number} of '{path}': {e}")
+                    logging.warning(f"Skipping unreadable log record at line {line_number} of {path}: {e}")
+                    continue
+                yield record
+
+    def rotate(self) -> None:
+        """
+        Moves the active log aside so a compaction can run while new records
+        keep being appended to a fresh log.
+
+        If a previous compaction left its log behind (it failed or was interrupted),
+        the active log is appended to it so no record is ever lost.
+        """
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.compacting_path):
+            with open(self.path, 'r', encoding='utf-8') as src, open(self.compacting_path, 'a', encoding='utf-8') as dst:
+                for line in src:
+                    dst.write(line)
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.compacting_path)
+
+    def discard_compacted(self) -> None:
+        """
+        Removes the log that has been folded into a fresh snapshot.
+        """
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
+
+    def clear(self) -> None:
+        """
+        Removes both the active log and any leftover compaction log.
+        """
+        for path in (self.path, self.compacting_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -1,3 +1,3 @@
-from .csv import CSVExporter
-from .search import search_data
+from .csv import CSVExporter, read_rows
+from .search import search_data, iter_search
 from .tgbot import BackupToTelegram
@@ -1,6 +1,13 @@
 import csv
 import os
-from typing import Dict, Any, Union
+import re
+import gzip
+import json
+from itertools import islice
+from typing import Dict, Any, IO, Iterator, List, Optional, Union
+from ..utility import flatten_json, unflatten_json
+
+_NUMBER = re.compile(r"-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?")
 
 class CSVExporter:
     """
@@ -8,6 +15,8 @@ class CSVExporter:
 
     This class provides functionality to export JSON-like data (dictionaries or lists of dictionaries)
     to CSV files. It supports writing either a single collection or an entire database.
+    Rows are streamed from the data and written in chunks, so memory use doesn't grow
+    with the size of the collection. NDJSON (one JSON document per line) and gzip are supported too.
     """
     def __init__(self, database_dir: str):
         """
@@ -18,7 +27,9 @@ class CSVExporter:
         """
         self.database_dir = database_dir
 
-    def export(self, data: Union[Dict[str, Any], Any], filename: str = "export.csv") -> str:
+    def export(self, data: Union[Dict[str, Any], Any], filename: str = "export.csv", flatten: bool = True,
+               discover_headers: bool = True, compress: bool = False, chunk_size: int = 1000,
+               id_field: Optional[str] = None, typed: bool = False) -> str:
         """
         Exports JSON data to a CSV file. Supports either a single collection or an entire database.
 
@@ -26,21 +37,191 @@ class CSVExporter:
             data (Union[Dict[str, Any], Any]): The data to export. This can be a dictionary,
                 a list of dictionaries, or any other data structure that can be written to CSV.
             filename (str, optional): The name of the CSV file to create. Defaults to "export.csv".
+            flatten (bool, optional): Turn nested dicts into dotted columns ("address.city") with
+                flatten_json. Defaults to True.
+            discover_headers (bool, optional): Read every row once before writing to collect all the
+                columns. If False, the columns of the first row are used and extra fields are dropped.
+                Defaults to True.
+            compress (bool, optional): Write a gzip file (".gz" is appended to the name). Defaults to False.
+            chunk_size (int, optional): Number of rows written at once. Defaults to 1000.
+            id_field (Optional[str], optional): When exporting a dictionary, also write each key in this column.
+                Defaults to None.
+            typed (bool, optional): Write cells so read_rows gives back their exact types: numbers, booleans
+                and null as JSON, and strings that would read as something else ("12345", "true") JSON-quoted.
+                If False, strings are written as they are. Defaults to False.
 
         Returns:
             str: The path to the created CSV file, or an empty string if the export failed.
         """
-        filepath = os.path.join(self.database_dir, filename)
+        filepath = self._filepath(filename, compress)
         try:
-            with open(filepath, mode="w", newline='', encoding="utf-8") as csv_file:
-                if isinstance(data, dict):
-                    data = [data[key] for key in data.keys()]
-                if data:
-                    headers = data[0].keys() if isinstance(data, list) else data.keys()
-                    writer = csv.DictWriter(csv_file, fieldnames=headers)
+            with self._open(filepath, compress) as csv_file:
+                headers = self._headers(data, flatten, id_field, discover_headers)
+                if headers:
+                    writer = csv.DictWriter(csv_file, fieldnames=headers, extrasaction='ignore')
                     writer.writeheader()
-                    writer.writerows(data if isinstance(data, list) else [data])
+                    rows = self._rows(data, flatten, id_field)
+                    format_cell = _format_typed_cell if typed else _format_cell
+                    for chunk in self._chunks(rows, chunk_size):
+                        writer.writerows({key: format_cell(value) for key, value in row.items()} for row in chunk)
             return filepath
         except Exception as e:
             print(f"\033[91m#bugs\033[0m CSV export error: {e}")
-            return ""
\ No newline at end of file
+            return ""
+
+    def export_ndjson(self, data: Union[Dict[str, Any], Any], filename: str = "export.ndjson",
+                      compress: bool = False, chunk_size: int = 1000, id_field: Optional[str] = None) -> str:
+        """
+        Exports JSON data to an NDJSON file: one JSON document per line, nesting kept as is.
+
+        Args:
+            data (Union[Dict[str, Any], Any]): The data to export (a dictionary or a list).
+            filename (str, optional): The name of the NDJSON file to create. Defaults to "export.ndjson".
+            compress (bool, optional): Write a gzip file (".gz" is appended to the name). Defaults to False.
+            chunk_size (int, optional): Number of lines written at once. Defaults to 1000.
+            id_field (Optional[str], optional): When exporting a dictionary, also store each key in this field.
+                Defaults to None.
+
+        Returns:
+            str: The path to the created NDJSON file, or an empty string if the export failed.
+        """
+        filepath = self._filepath(filename, compress)
+        try:
+            with self._open(filepath, compress) as ndjson_file:
+                lines = (json.dumps(row, ensure_ascii=False, default=str) for row in self._rows(data, False, id_field))
+                for chunk in self._chunks(lines, chunk_size):
+                    ndjson_file.write("\n".join(chunk) + "\n")
+            return filepath
+        except Exception as e:
+            print(f"\033[91m#bugs\033[0m NDJSON export error: {e}")
+            return ""
+
+    def _filepath(self, filename: str, compress: bool) -> str:
+        if compress and not filename.endswith(".gz"):
+            filename += ".gz"
+        return os.path.join(self.database_dir, filename)
+
+    @staticmethod
+    def _open(filepath: str, compress: bool) -> IO[str]:
+        if compress:
+            return gzip.open(filepath, mode="wt", newline='', encoding="utf-8")
+        return open(filepath, mode="w", newline='', encoding="utf-8")
+
+    @staticmethod
+    def _rows(data: Any, flatten: bool, id_field: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the rows to write, straight from the data (nothing is copied up front).
+        Values that aren't dictionaries are written in a "value" column.
+        """
+        if isinstance(data, dict):
+            items = data.items()
+        elif isinstance(data, list):
+            items = ((None, item) for item in data)
+        else:
+            items = iter([(None, data)])
+        for key, item in items:
+            row = item if isinstance(item, dict) else {"value": item}
+            if flatten:
+                row = flatten_json(row)
+            if id_field is not None and key is not None:
+                row = {id_field: key, **row}
+            yield row
+
+    def _headers(self, data: Any, flatten: bool, id_field: Optional[str], discover: bool) -> List[str]:
+        """
+        Collects the CSV columns, in order of first appearance.
+        """
+        headers: Dict[str, None] = {}
+        for row in self._rows(data, flatten, id_field):
+            headers.update(dict.fromkeys(row))
+            if not discover:
+                break
+        return list(headers)
+
+    @staticmethod
+    def _chunks(rows: Iterator[Any], size: int) -> Iterator[List[Any]]:
+        rows = iter(rows)
+        chunk = list(islice(rows, max(size, 1)))
+        while chunk:
+            yield chunk
+            chunk = list(islice(rows, max(size, 1)))
+
+def _format_cell(value: Any) -> Any:
+    """
+    Writes a value as a plain cell: strings as they are, null as an empty cell,
+    lists and dicts as JSON, anything else as its text.
+    """
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+def _format_typed_cell(value: Any) -> Any:
+    """
+    Writes a value so _parse_cell reads it back as it was: JSON values (numbers, booleans,
+    null, lists, dicts) as JSON, and strings as they are unless they would be read back
+    as something else ("12345", "true", "", ...), in which case they are JSON-quoted.
+    """
+    if isinstance(value, str):
+        parsed = _parse_cell(value) if value else None
+        return value if isinstance(parsed, str) and parsed == value else json.dumps(value, ensure_ascii=False)
+    if value is None or isinstance(value, (bool, int, float, list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+def _parse_cell(text: str) -> Any:
+    """
+    Restores the type of a CSV cell written by CSVExporter: JSON values (numbers, booleans,
+    null, lists, dicts and quoted strings) come back as such, anything else stays a string.
+    """
+    if _NUMBER.fullmatch(text) or text in ("true", "false", "null", "NaN", "Infinity", "-Infinity"):
+        return json.loads(text)
+    if text == "True":  # Exports from older versions wrote Python booleans
+        return True
+    if text == "False":
+        return False
+    if text[:1] in ("[", "{", '"'):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streams the records of a CSV or NDJSON file (optionally gzipped), the inverse of CSVExporter.
+
+    CSV cells get their type back (see _parse_cell), empty cells are left out and
+    dotted columns ("address.city") become nested dicts again. Files written by
+    export_to_csv(typed=True) come back as they were, except empty nested dicts and keys
+    holding a dot; NDJSON keeps every record exactly.
+
+    Args:
+        path (str): A .csv, .ndjson or .jsonl file, with an optional .gz suffix.
+
+    Yields:
+        Dict[str, Any]: One record per row or line (NDJSON lines that aren't valid JSON are yielded as None).
+
+    Raises:
+        ValueError: If the file extension isn't supported.
+    """
+    compressed = path.endswith(".gz")
+    name = path[:-3] if compressed else path
+    opener = gzip.open if compressed else open
+    if name.endswith(".csv"):
+        with opener(path, mode="rt", newline='', encoding="utf-8") as csv_file:
+            for row in csv.DictReader(csv_file):
+                yield unflatten_json({k: _parse_cell(v) for k, v in row.items() if k is not None and v not in ("", None)})
+    elif name.endswith((".ndjson", ".jsonl")):
+        with opener(path, mode="rt", encoding="utf-8") as ndjson_file:
+            for line in ndjson_file:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None
+    else:
+        raise ValueError(f"\033[91m#bugs\033[0m Unsupported import file: '{path}' (use .csv, .ndjson or .jsonl, optionally .gz).")
@@ -6,7 +6,7 @@
 ██████╔╝███████╗██║░░██║██║░░██║╚█████╔╝██║░░██║██╗██║░░░░░░░░██║░░░
 ╚═════╝░╚══════╝╚═╝░░╚═╝╚═╝░░╚═╝░╚════╝░╚═╝░░╚═╝╚═╝╚═╝░░░░░░░░╚═╝░░░
 """
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
 def search_data(data: Dict[str, Any], search_value: Any, key: Optional[str] = None) -> Dict[str, Any]:
     """
@@ -53,4 +53,61 @@ def search_data(data: Dict[str, Any], search_value: Any, key: Optional[str] = No
     if not results:
          print(f"\033[90m#info\033[0m Value '{search_value}' not found.")
 
-    return results
\ No newline at end of file
+    return results
+
+def iter_search(data: Dict[str, Any], search_value: Any, key: Optional[str] = None,
+                limit: Optional[int] = None, predicate: Optional[Callable[[Any], bool]] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Lazily searches for a value in a nested dictionary or within a specific key.
+
+    Values match as in search_data (`value == search_value` or `str(value) == search_value`).
+    The traversal is iterative, so deeply nested documents can't hit the recursion
+    limit, path strings are only built for matches, and dicts inside lists are searched
+    too (their list index becomes part of the path).
+
+    Args:
+        data (Dict[str, Any]): The dictionary to search within.
+        search_value (Any): The value to search for.
+        key (Optional[str]): If provided, search within this specific key.
+        limit (Optional[int]): Stop after this many matches.
+        predicate (Optional[Callable[[Any], bool]]): An extra test the matching values must pass.
+
+    Yields:
+        Tuple[str, Any]: (path, value) pairs, in document order.
+    """
+    if key:
+        if key not in data:
+            print(f"\033[91m#bugs\033[0m Key '{key}' not found for search.")
+            return
+        data = data[key]
+    if limit is not None and limit <= 0:
+        return
+
+    def children(node: Any) -> Iterator[Tuple[Any, Any]]:
+        return iter(node.items()) if isinstance(node, dict) else enumerate(node)
+
+    if not isinstance(data, (dict, list)):
+        return
+    found = 0
+    path = []  # Keys leading to the container at the top of the stack
+    stack = [(children(data), isinstance(data, dict))]
+    while stack:
+        items, in_dict = stack[-1]
+        for k, v in items:
+            if isinstance(v, dict) or (isinstance(v, list) and not in_dict):
+                path.append(k)
+                stack.append((children(v), isinstance(v, dict)))
+                break
+            if in_dict and search_value in (v, str(v)) and (predicate is None or predicate(v)):
+                yield "/".join(map(str, path + [k])), v
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+            if isinstance(v, list) and any(isinstance(item, (dict, list)) for item in v):
+                path.append(k)
+                stack.append((children(v), False))
+                break
+        else:
+            stack.pop()
+            if path:
+                path.pop()
@@ -1,7 +1,10 @@
 import requests
 import os
+import time
 from datetime import datetime
 import platform
+from typing import Optional
+from ..handler.compression import resolve_compression, detect_compression, compress
 
 class BackupToTelegram:
     """
@@ -10,8 +13,17 @@ class BackupToTelegram:
     This class provides a simple way to send backups of your database files
     to a Telegram chat for safekeeping. It handles connection to the Telegram
     API, file handling, and error reporting.
+
+    Backups are compressed before upload and split into numbered parts when they
+    are bigger than what the Bot API accepts. One HTTP session is reused for every
+    upload, and failed uploads (network errors, rate limits, server errors) are
+    retried with exponential backoff.
     """
-    def __init__(self, token: str, chat_id: str):
+    EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst', 'lz4': '.lz4'}
+
+    def __init__(self, token: str, chat_id: str, api_base: str = "https://api.telegram.org",
+                 compression: Optional[str] = 'gzip', part_size: int = 49 * 1024 * 1024,
+                 retries: int = 3, backoff: float = 1.0, timeout: float = 60.0):
         """
         Initializes the BackupToTelegram class with necessary credentials.
 
@@ -22,90 +34,165 @@ class BackupToTelegram:
             chat_id (str): The Telegram chat ID where the backup file will be sent.
                           This can be the ID of a group, channel, or individual chat.
                           To find the chat ID, you can use a bot that retrieves chat information.
+            api_base (str, optional): The Bot API server, e.g. a local Bot API server or a test stub.
+                          Defaults to "https://api.telegram.org".
+            compression (Optional[str], optional): The codec backups are compressed with before upload
+                          ('gzip', 'zstd', 'lz4', or None to send them as they are). Files that are already
+                          compressed are sent as they are. Defaults to 'gzip'.
+            part_size (int, optional): Backups bigger than this many bytes are sent as several numbered parts.
+                          Defaults to 49 MB (the Bot API takes up to 50 MB per file).
+            retries (int, optional): How many times a failed upload is retried. Defaults to 3.
+            backoff (float, optional): Seconds to wait before the first retry, doubled at each retry
+                          (Telegram's retry_after wins when it is longer). Defaults to 1.0.
+            timeout (float, optional): Seconds to wait for the API to answer an upload. Defaults to 60.0.
         """
         self.token = token
         self.chat_id = chat_id
-        self.api_url = f"https://api.telegram.org/bot{self.token}/sendDocument"
+        self.api_url = f"{api_base.rstrip('/')}/bot{self.token}/sendDocument"
+        self.compression = resolve_compression(compression)
+        self.part_size = part_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def close(self) -> None:
+        """
+        Closes the HTTP session.
+        """
+        self.session.close()
 
     def _send_request(self, files, caption: str) -> bool:
         """
         Internal helper function to send the backup file to the Telegram chat.
 
         This function handles the actual sending of the file to Telegram, including
-        setting the chat ID, caption, and parse mode.
+        setting the chat ID, caption, and parse mode. Network errors, rate limits (429)
+        and server errors (5xx) are retried with exponential backoff; other errors are not.
 
         Args:
             files (dict): A dictionary containing the file to be sent, in the format
-                          expected by the `requests` library (i.e., `{'document': ('filename', file_object)}`).
+                          expected by the `requests` library (i.e., `{'document': ('filename', content)}`).
+                          The content must be bytes so it can be sent again on retry.
             caption (str): A message to accompany the file, in HTML format. This can include
                            information about the backup, such as the filename and creation date.
 
         Returns:
             bool: True if the file was successfully sent, False otherwise.
         """
-        try:
-            response = requests.post(self.api_url, data={'chat_id': self.chat_id, 'caption': caption, 'parse_mode': 'HTML'}, files=files)
-            response_data = response.json()
+        error = "Unknown"
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.session.post(self.api_url, data={'chat_id': self.chat_id, 'caption': caption, 'parse_mode': 'HTML'},
+                                             files=files, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                error = f"Could not connect to Telegram API: {e}."
+            else:
+                try:
+                    response_data = response.json()
+                except ValueError:
+                    response_data = {}
+
+                if response.status_code == 401:
+                    print(f"\033[91m#bugs\033[0m Invalid Telegram token.")
+                    return False
+                elif response_data.get("error_code") == 400 and "chat not found" in response_data.get("description", "").lower():
+                    print(f"\033[91m#bugs\033[0m Invalid chat ID: '{self.chat_id}'.")
+                    return False
+                elif response_data.get("ok"):
+                    return True
+
+                error = f"Telegram API error: {response_data.get('description', f'HTTP {response.status_code}')}."
+                if response.status_code == 429:
+                    delay = max(delay, response_data.get("parameters", {}).get("retry_after", 0))
+                elif response.status_code < 500:
+                    break  # Retrying won't fix a bad request
+            if attempt < self.retries:
+                print(f"\033[90m#info\033[0m {error} Retrying in {delay:g}s ({attempt + 1}/{self.retries}).")
+                time.sleep(delay)
+        print(f"\033[91m#bugs\033[0m {error}")
+        return False
+
+    def send_backup(self, payload: bytes, filename: str) -> bool:
+        """
+        Compresses a backup, splits it into parts if needed and sends it to the Telegram chat.
 
-            if response.status_code == 401:
-                print(f"\033[91m#bugs\033[0m Invalid Telegram token.")
-                return False
-            elif response_data.get("error_code") == 400 and "chat not found" in response_data.get("description", "").lower():
-                print(f"\033[91m#bugs\033[0m Invalid chat ID: '{self.chat_id}'.")
+        Parts are named `<filename>.001`, `<filename>.002`... and are joined back in
+        order to get the backup file.
+
+        Args:
+            payload (bytes): The content of the backup file.
+            filename (str): The name of the backup file (an extension is added when it gets compressed).
+
+        Returns:
+            bool: True if the backup (every part of it) was sent, False otherwise.
+        """
+        compression = detect_compression(payload[:4])
+        if compression == 'none' and self.compression != 'none':
+            payload = compress(payload, self.compression)
+            compression = self.compression
+        filename += self.EXTENSIONS.get(compression, "")
+        total = max(-(-len(payload) // self.part_size), 1)
+        date_str = datetime.now().strftime("%-d/%-m/%Y at %H:%M")
+        try:
+            os_info = platform.system() + " " + platform.release()
+        except Exception:
+            os_info = "Unknown"
+
+        if total > 1:
+            how_to = (f"How to restore 🤷‍♂️? Download the {total} parts and join them in order "
+                      f"(<code>cat {filename}.0* &gt; db.json</code>, or <code>copy /b</code> on Windows), "
+                      "then put the result in your project as <code>database/db.json</code>.")
+        elif compression != 'none':
+            how_to = ("How to restore 🤷‍♂️? Put this file in your project as <code>database/db.json</code>: "
+                      "LiteJsonDb reads compressed databases as they are.")
+        else:
+            how_to = ("How to restore 🤷‍♂️? Open this file in a text editor, copy its content, and paste it "
+                      "into your project inside the <code>database/db.json</code> file.")
+
+        view = memoryview(payload)
+        for part in range(1, total + 1):
+            content = bytes(view[(part - 1) * self.part_size:part * self.part_size])
+            part_name = filename if total == 1 else f"{filename}.{part:03d}"
+            file_size = len(content) / 1024  # File size in KB
+            caption = (f"<b>🔄 Backup created on {date_str}</b>\n"
+                       f"<b>Filename:</b> {part_name}\n"
+                       + (f"<b>Part:</b> {part} of {total}\n" if total > 1 else "")
+                       + f"<b>File size:</b> {file_size:.2f} KB\n"
+                       f"<b>System:</b> {os_info}\n\n"
+                       f"<blockquote>{how_to}</blockquote>")
+            if not self._send_request({'document': (part_name, content)}, caption):
+                print(f"\033[91m#bugs\033[0m Sending backup to Telegram failed" + (f" at part {part} of {total}." if total > 1 else "."))
                 return False
-            elif not response_data.get("ok"):
-                 print(f"\033[91m#bugs\033[0m Telegram API error: {response_data.get('description', 'Unknown')}.")
-                 return False
 
-            return True
-        except requests.exceptions.RequestException as e:
-            print(f"\033[91m#bugs\033[0m Could not connect to Telegram API: {e}.")
-            return False
+        size = len(payload) / 1024
+        parts = f" in {total} parts" if total > 1 else ""
+        print(f"🎉 \033[92mHooray! Backup file '{filename}' (Size: {size:.2f} KB) was successfully beamed to Telegram{parts}! System: {os_info}. All systems go!\033[0m")
+        return True
 
-    def backup_to_telegram(self, backup_filepath: str) -> None:
+    def backup_to_telegram(self, backup_filepath: str) -> bool:
         """
         Backs up a file by sending it to a Telegram chat.
 
-        This function takes the path to a file, checks if it exists and is within
-        the size limits for Telegram, then sends it to the specified chat.
+        This function takes the path to a file, checks if it exists, then sends it
+        to the specified chat, compressed and split into parts if needed.
 
         Args:
             backup_filepath (str): The path to the backup file you want to send.
                                   This should be a valid path to a file on your system.
+
+        Returns:
+            bool: True if the file was sent, False otherwise.
         """
         if not os.path.exists(backup_filepath):
             print(f"\033[91m#bugs\033[0m Backup file '{backup_filepath}' not found.")
-            return
-
-        file_size_mb = os.path.getsize(backup_filepath) / (1024 * 1024)  # File size in MB
-        if file_size_mb > 50:
-            print(f"\033[91m#bugs\033[0m File size ({file_size_mb:.2f} MB) exceeds Telegram limit.")
-            return
+            return False
 
         try:
             with open(backup_filepath, 'rb') as backup_file:
-                filename = os.path.basename(backup_filepath)
-                file_size = os.path.getsize(backup_filepath) / 1024  # File size in KB
-                date_str = datetime.now().strftime("%-d/%-m/%Y at %H:%M")
-                
-                try:
-                    os_info = platform.system() + " " + platform.release()
-                except Exception:
-                    os_info = "Unknown"
-            
-                caption = (f"<b>🔄 Backup created on {date_str}</b>\n"
-                           f"<b>Filename:</b> {filename}\n"
-                           f"<b>File size:</b> {file_size:.2f} KB\n"
-                           f"<b>System:</b> {os_info}\n\n"
-                           "<blockquote>How to restore 🤷‍♂️? Open this file in a text editor, copy its content, and paste it into your project inside the <code>database/db.json</code> file.</blockquote>")
-
-                files = {'document': (filename, backup_file)}
-                success = self._send_request(files, caption)
-
-                if success:
-                     print(f"🎉 \033[92mHooray! Backup file '{filename}' (Size: {file_size:.2f} KB) was successfully beamed to Telegram! System: {os_info}. All systems go!\033[0m")
-                else:
-                     print(f"\033[91m#bugs\033[0m Sending backup to Telegram failed.")
-        
+                payload = backup_file.read()
+            return self.send_backup(payload, os.path.basename(backup_filepath))
         except Exception as e:
-            print(f"\033[91m#bugs\033[0m Unexpected error occurred: {e}.")
\ No newline at end of file
+            print(f"\033[91m#bugs\033[0m Unexpected error occurred: {e}.")
+            return False
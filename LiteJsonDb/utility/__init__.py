@@ -1,5 +1,5 @@
 from .utils import (
     convert_to_datetime, get_or_default, key_exists_or_add, normalize_keys,
-    flatten_json, filter_data, sort_data, hash_password, check_password,
+    flatten_json, unflatten_json, filter_data, sort_data, hash_password, check_password,
     sanitize_output, pretty_print
 )
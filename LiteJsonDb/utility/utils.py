@@ -47,6 +47,20 @@ def flatten_json(data: Dict[str, Any], parent_key: str = '', sep: str = '.') ->
             items.append((new_key, v))
     return dict(items)
 
+def unflatten_json(data: Dict[str, Any], sep: str = '.') -> Dict[str, Any]:
+    """Turn the JSON pancake back into a stack: dotted keys become nested dicts again. 🥞➡️📚"""
+    result: Dict[str, Any] = {}
+    for key, value in data.items():
+        parts = key.split(sep)
+        target = result
+        for part in parts[:-1]:
+            child = target.get(part)
+            if not isinstance(child, dict):
+                child = target[part] = {}
+            target = child
+        target[parts[-1]] = value
+    return result
+
 def filter_data(data: List[Dict[str, Any]], condition: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
     """Filter out the riffraff based on a condition. Only the finest data shall pass!"""
     return [item for item in data if condition(item)]
@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+import pytest
+
+# LiteJsonDb creates its 'database' folder in the working directory when it is imported:
+# import it from a scratch directory so running the tests leaves the checkout clean.
+_cwd = os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix="litejsondb-tests-"))
+try:
+    import LiteJsonDb  # noqa: F401
+finally:
+    os.chdir(_cwd)
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs every test in its own directory, with an empty 'database' folder.
+    """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("database")
+    return tmp_path
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from LiteJsonDb import AsyncJsonDB, JsonDB
+
+def stored():
+    with open("database/db.json", encoding="utf-8") as file:
+        return json.load(file)
+
+def test_a_burst_of_writes_is_saved_in_a_few_rounds(monkeypatch):
+    saves = []
+    original = JsonDB._save_db
+    monkeypatch.setattr(JsonDB, "_save_db", lambda self: saves.append(1) or original(self))
+
+    async def scenario():
+        async with await AsyncJsonDB.open() as db:
+            await db.set_data("users", {})
+            saves.clear()
+            await asyncio.gather(*(db.set_subcollection("users", str(i), {"n": i}) for i in range(100)))
+            assert len(db.get_data("users")) == 100  # Read straight from memory
+    asyncio.run(scenario())
+
+    assert 1 <= len(saves) < 10
+    assert len(stored()["users"]) == 100
+
+def test_writes_keep_their_order_and_run_off_the_loop():
+    async def scenario():
+        db = await AsyncJsonDB.open()
+        loop_thread = threading.current_thread()
+        await asyncio.gather(db.set_data("k", {"v": 1}), db.edit_data("k", {"v": 2}), db.edit_data("k", {"v": 3}))
+        writer_thread = await db.run(lambda sync: threading.current_thread())
+        await db.close()
+        return db.get_data("k"), writer_thread is not loop_thread
+    assert asyncio.run(scenario()) == ({"v": 3}, True)
+    assert stored() == {"k": {"v": 3}}
+
+def test_non_durable_writes_are_saved_by_flush():
+    async def scenario():
+        db = await AsyncJsonDB.open(durable=False)
+        await db.set_data("k", {"v": 1})
+        assert db.get_data("k") == {"v": 1}
+        await db.flush()
+        assert stored() == {"k": {"v": 1}}
+        await db.remove_data("k")
+        await db.close()
+    asyncio.run(scenario())
+    assert stored() == {}
+
+def test_durability_is_managed_by_the_wrapper():
+    with pytest.raises(ValueError):
+        AsyncJsonDB(durability="sync")
@@ -0,0 +1,74 @@
+import json
+import os
+import time
+
+import pytest
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler.backups import BackupGenerations
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency
+    msgpack = None
+
+RECORDS = {f"u{i}": {"name": f"user{i}", "age": i % 90, "tags": ["a", "b"]} for i in range(20000)}
+
+ENCODERS = {
+    "pretty": lambda data: json.dumps(data, indent=4).encode(),
+    "compact": lambda data: json.dumps(data, separators=(",", ":")).encode(),
+    "msgpack": msgpack.packb if msgpack is not None else None,
+}
+
+@pytest.mark.parametrize("name", list(ENCODERS))
+def test_a_small_edit_only_writes_a_few_chunks(name):
+    encode = ENCODERS[name]
+    if encode is None:
+        pytest.skip(f"{name} isn't installed")
+    store = BackupGenerations("database/backups", keep=5, delta=True)
+    store.add(encode(RECORDS), 1)
+    chunks = set(os.listdir("database/backups/chunks"))
+
+    edited = dict(RECORDS)
+    edited["u100"] = {"name": "changed"}
+    del edited["u15000"]
+    payload = encode(edited)
+    store.add(payload, 2)
+
+    new = set(os.listdir("database/backups/chunks")) - chunks
+    assert 0 < len(new) <= 4
+    assert store.read(store.find()) == payload
+
+def test_chunks_join_back_into_the_payload():
+    store = BackupGenerations("database/backups", delta=True)
+    payload = json.dumps(RECORDS, separators=(",", ":")).encode()
+    chunks = store._split(payload)
+    assert b"".join(chunks) == payload
+    assert all(len(chunk) <= store.CHUNK_MAX for chunk in chunks)
+    assert all(len(chunk) >= store.CHUNK_MIN for chunk in chunks[:-1])
+
+@pytest.mark.parametrize("storage", ["wal", "sharded"])
+def test_generations_follow_an_interval_outside_file_storage(storage):
+    db = JsonDB(storage=storage, auto_backup=True, backup_generations=10)
+    for i in range(5):
+        db.set_data(str(i), {"v": i})
+    assert len(db.list_backups()) == 1
+    db.close()
+    assert len(db.list_backups()) == 2
+
+    db = JsonDB(storage=storage, auto_backup=True, backup_generations=10)
+    db.restore_backup()
+    assert db.get_db() == {str(i): {"v": i} for i in range(5)}
+
+def test_generations_leave_lazy_collections_unloaded():
+    db = JsonDB(storage="sharded", auto_backup=True, backup_generations=5, backup_interval=0.001)
+    for i in range(4):
+        db.set_data(f"c{i}", {"v": i})
+    db.close()
+
+    db = JsonDB(storage="sharded", lazy=True, auto_backup=True, backup_generations=5, backup_interval=0.001)
+    time.sleep(0.01)
+    db.edit_data("c0", {"v": 10})
+    assert db._unloaded == {"c1", "c2", "c3"}
+    db.restore_backup()
+    assert db.get_data("c0") == {"v": 10} and db.get_data("c3") == {"v": 3}
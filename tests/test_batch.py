@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from LiteJsonDb import JsonDB
+
+def stored():
+    with open("database/db.json", encoding="utf-8") as file:
+        return json.load(file)
+
+def test_saves_once_at_the_end():
+    db = JsonDB()
+    saves = []
+    save = db._save_db
+    db._save_db = lambda: (saves.append(1), save())
+    with db.batch():
+        for i in range(10):
+            db.set_subcollection("items", str(i), {"n": i})
+        assert not saves
+    assert len(saves) == 1
+    assert len(stored()["items"]) == 10
+
+def test_rolls_back_every_change_on_error():
+    db = JsonDB()
+    db.set_data("users", {"1": {"name": "Ann", "age": 30}})
+    with pytest.raises(RuntimeError):
+        with db.batch():
+            db.edit_data("users/1", {"age": 31})
+            db.set_subcollection("users", "2", {"name": "Bob"})
+            db.remove_data("users/1/name")
+            raise RuntimeError("boom")
+    assert db.get_db() == {"users": {"1": {"name": "Ann", "age": 30}}}
+    assert stored() == {"users": {"1": {"name": "Ann", "age": 30}}}
+
+def test_inner_batch_only_rolls_back_its_own_changes():
+    db = JsonDB()
+    with db.batch():
+        db.set_data("kept", {"v": 1})
+        with pytest.raises(ValueError):
+            with db.batch():
+                db.set_data("dropped", {"v": 2})
+                raise ValueError
+        db.edit_data("kept", {"w": 3})
+    assert db.get_db() == {"kept": {"v": 1, "w": 3}}
+    assert stored() == {"kept": {"v": 1, "w": 3}}
+
+def test_rolled_back_changes_notify_no_one():
+    db = JsonDB(change_feed=True)
+    seen = []
+    db.add_observer("", lambda action, key, value: seen.append(key))
+    db.set_data("a", {"v": 1})
+    with pytest.raises(RuntimeError):
+        with db.batch():
+            db.set_data("b", {"v": 2})
+            raise RuntimeError
+    assert seen == ["a"]
+    assert [change["path"] for change in db.changes()] == ["a"]
@@ -0,0 +1,48 @@
+import json
+import time
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler.changefeed import ChangeFeed
+
+def test_reads_only_what_changed_since_a_seq():
+    db = JsonDB(change_feed=True)
+    for i in range(600):
+        db.set_subcollection("items", str(i), {"n": i})
+    assert [change["seq"] for change in db.changes(since=595)] == [596, 597, 598, 599, 600]
+    assert [change["seq"] for change in db.changes(since=100, limit=3)] == [101, 102, 103]
+    assert JsonDB(change_feed=True).last_seq() == 600
+
+def test_skips_old_entries_without_decoding_them():
+    decoded = []
+    def decode(line):
+        decoded.append(line)
+        return json.loads(line)
+    feed = ChangeFeed("database/f.changes", json.dumps, decode)
+    for i in range(1000):
+        feed.append("set_data", str(i), i)
+    feed.flush()
+
+    decoded.clear()
+    assert [entry["seq"] for entry in feed.read(995)] == [996, 997, 998, 999, 1000]
+    assert len(decoded) == 5
+
+def test_reads_feeds_written_without_sequence_prefixes():
+    with open("database/f.changes", "w", encoding="utf-8") as file:
+        file.write(json.dumps({"format": "ljdb-changes", "next_seq": 1}) + "\n")
+        for seq in range(1, 11):
+            file.write(json.dumps({"seq": seq, "time": time.time(), "action": "set_data", "path": str(seq), "value": seq}) + "\n")
+    feed = ChangeFeed("database/f.changes", json.dumps, json.loads, retention=5)
+    assert feed.next_seq == 11
+    feed.append("set_data", "11", 11)
+    feed.flush()
+    feed.trim()
+    assert [entry["seq"] for entry in feed.read(7)] == [8, 9, 10, 11]
+
+def test_sees_entries_appended_by_another_process():
+    feed = ChangeFeed("database/f.changes", json.dumps, json.loads)
+    feed.append("set_data", "a", 1)
+    feed.flush()
+    other = ChangeFeed("database/f.changes", json.dumps, json.loads)
+    other.append("set_data", "b", 2)
+    other.flush()
+    assert [entry["path"] for entry in feed.read(0)] == ["a", "b"]
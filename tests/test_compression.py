@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler import compression as compression_module
+from LiteJsonDb.handler.compression import compress, decompress, detect_compression, resolve_compression
+
+AVAILABLE = ["none", "gzip"] + [name for name, module in (("zstd", compression_module.zstandard),
+                                                          ("lz4", compression_module.lz4_frame)) if module is not None]
+
+def head(path):
+    with open(path, "rb") as file:
+        return file.read(4)
+
+@pytest.mark.parametrize("name", AVAILABLE)
+def test_payload_round_trip(name):
+    payload = json.dumps([{"n": i} for i in range(200000)]).encode()  # Several blocks
+    packed = compress(payload, name)
+    assert detect_compression(packed[:4]) == name
+    assert decompress(packed) == payload
+    if name == "gzip":
+        assert compress(payload, name) == packed  # Reproducible, so identical backups deduplicate
+
+def test_detects_uncompressed_payloads():
+    for raw in (b'{"k": 1}', b"#LJDB:msgpack\n\x81", b"", b"\x1f"):
+        assert detect_compression(raw) == "none"
+        assert decompress(raw) == raw
+
+def test_resolve_compression(monkeypatch):
+    assert resolve_compression(None) == "none"
+    with pytest.raises(ValueError):
+        resolve_compression("brotli")
+    monkeypatch.setattr(compression_module, "zstandard", None)
+    assert resolve_compression("zstd") == "gzip"
+
+def test_database_file_and_backups_are_compressed():
+    db = JsonDB(compression="gzip", auto_backup=True)
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.edit_data("users", {"2": {"name": "Bob"}})
+    assert detect_compression(head("database/db.json")) == "gzip"
+    assert detect_compression(head("database/db_backup.json")) == "gzip"
+
+    plain = JsonDB()  # Files are recognized by their magic bytes, whatever the setting
+    assert plain.get_data("users") == {"1": {"name": "Ann"}, "2": {"name": "Bob"}}
+    plain.edit_data("users", {"3": {"name": "Eve"}})
+    with open("database/db.json", encoding="utf-8") as file:
+        assert len(json.load(file)["users"]) == 3
+
+def test_shards_are_compressed_but_not_the_manifest():
+    db = JsonDB(storage="sharded", compression="gzip")
+    db.set_data("users", {"1": {"name": "Ann"}})
+    assert detect_compression(head("database/db/users.json")) == "gzip"
+    with open("database/db/manifest.json", encoding="utf-8") as file:
+        assert json.load(file)["collections"] == {"users": "users.json"}
+    assert JsonDB(storage="sharded").get_data("users/1") == {"name": "Ann"}
@@ -0,0 +1,37 @@
+from unittest import mock
+
+import pytest
+
+from LiteJsonDb import JsonDB
+
+def test_manual_mode_saves_on_flush():
+    db = JsonDB(durability="manual")
+    db.set_data("k", {"v": 1})
+    assert JsonDB("db.json").get_db() == {}
+    db.flush()
+    assert JsonDB("db.json").get_db() == {"k": {"v": 1}}
+
+def test_interval_mode_flushes_after_flush_every_changes():
+    db = JsonDB(durability="interval", flush_interval=100000, flush_every=3)
+    db.set_data("a", {"v": 1})
+    db.set_data("b", {"v": 2})
+    assert JsonDB("db.json").get_db() == {}
+    db.set_data("c", {"v": 3})
+    assert set(JsonDB("db.json").get_db()) == {"a", "b", "c"}
+    db.close()
+
+def test_failed_flush_keeps_the_changes_for_the_next_one():
+    db = JsonDB(durability="manual")
+    db.set_data("k", {"v": 1})
+    with mock.patch.object(db, "_write_snapshot", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            db.flush()
+    assert db._unsaved_changes == 1
+    db.close()
+    assert JsonDB("db.json").get_db() == {"k": {"v": 1}}
+
+def test_close_flushes_pending_changes():
+    db = JsonDB(durability="interval", flush_interval=100000, flush_every=0)
+    db.set_data("k", {"v": 1})
+    db.close()
+    assert JsonDB("db.json").get_db() == {"k": {"v": 1}}
@@ -0,0 +1,83 @@
+import re
+import json
+
+import pytest
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler.chunks import EncryptedChunks
+
+def open_db(iterations):
+    return JsonDB(crypted=True, encryption_method="fernet", encryption_key="secret",
+                  kdf_iterations=iterations, chunk_records=10)
+
+def stored_costs():
+    with open("database/db.json", encoding="utf-8") as file:
+        return set(re.findall(r"(\d+)\$", file.read()))
+
+def test_round_trip():
+    db = open_db(1000)
+    db.set_data("users", {str(i): {"n": i} for i in range(25)})
+    assert open_db(1000).get_data("users/7") == {"n": 7}
+
+def test_wrong_key_fails():
+    open_db(1000).set_data("k", {"v": 1})
+    with pytest.raises(ValueError):
+        JsonDB(crypted=True, encryption_method="fernet", encryption_key="other", kdf_iterations=1000)
+
+def test_changing_the_cost_re_encrypts_every_chunk():
+    db = open_db(1000)
+    db.set_data("users", {str(i): {"n": i} for i in range(25)})
+    db.set_data("other", {"v": 1})
+    assert stored_costs() == {"1000"}
+
+    db = open_db(2000)
+    db.edit_data("other", {"v": 2})
+    assert stored_costs() == {"2000"}
+    assert open_db(2000).get_data("users/24") == {"n": 24}
+
+def stored_chunks():
+    with open("database/db.json", encoding="utf-8") as file:
+        return json.load(file)["chunks"]
+
+def test_an_edit_only_re_encrypts_its_chunk():
+    db = open_db(1000)
+    db.set_data("users", {str(i): {"n": i} for i in range(25)})
+    db.set_data("other", {"v": 1})
+    before = stored_chunks()
+    assert len(before) == 4  # Three chunks of up to 10 users, then "other"
+
+    db = open_db(1000)  # The cache is rebuilt from the stored chunks
+    db.edit_subcollection("users", "12", {"n": -1})
+    after = stored_chunks()
+    assert [a == b for a, b in zip(before, after)] == [True, False, True, True]
+
+def test_inserts_and_removals_keep_the_chunks_consistent():
+    db = open_db(1000)
+    db.set_data("users", {str(i): {"n": i} for i in range(25)})
+    for i in range(0, 25, 3):
+        db.remove_subcollection("users", str(i))
+    for i in range(100, 110):
+        db.set_subcollection("users", str(i), {"n": i})
+    expected = db.get_data("users")
+
+    assert open_db(1000).get_data("users") == expected
+    with open("database/db.json", encoding="utf-8") as file:
+        assert "users" not in file.read()  # Names only appear inside the encrypted chunks
+
+def test_chunk_cache_encrypts_only_stale_chunks():
+    encrypted = []
+    def encrypt(value):
+        encrypted.append(value)
+        return json.dumps(value)
+    chunks = EncryptedChunks(encrypt, json.loads, chunk_records=2)
+    db = {"users": {"a": 1, "b": 2, "c": 3}, "other": {"v": 1}}
+    container = chunks.encode(db)
+    assert len(encrypted) == 3
+
+    encrypted.clear()
+    db["users"]["c"] = 4
+    chunks.invalidate(["users", "c"])
+    edited = chunks.encode(db)
+    assert encrypted == [{"c": "users", "r": {"c": 4}}]
+    assert [a == b for a, b in zip(container["chunks"], edited["chunks"])] == [True, False, True]
+    assert EncryptedChunks(encrypt, json.loads).decode(edited) == db
@@ -0,0 +1,102 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from LiteJsonDb import JsonDB
+
+USERS = {
+    "1": {"name": "Aliou", "zip": "01234", "flag": "true", "empty": "", "none": None, "quoted": '"x"',
+          "age": 30, "score": 1.5, "big": 2 ** 70, "ok": True, "tags": ["a", "b"],
+          "address": {"city": "Dakar", "geo": {"lat": 14.7}}},
+    "2": {"name": "Ndeye", "zip": "12345", "tags": [], "age": 25, "ok": False, "bracket": "[not json"},
+}
+
+@pytest.mark.parametrize("extension, export", [("csv", "export_to_csv"), ("ndjson", "export_to_ndjson")])
+@pytest.mark.parametrize("compress", [False, True])
+def test_export_then_import_round_trip(extension, export, compress):
+    db = JsonDB()
+    db.set_data("users", USERS)
+    options = {"typed": True} if extension == "csv" else {}
+    getattr(db, export)("users", id_field="id", compress=compress, **options)
+
+    copy = JsonDB("copy.json")
+    path = f"database/users_export.{extension}" + (".gz" if compress else "")
+    report = copy.bulk_import("users", path, id_field="id")
+    assert report["imported"] == 2
+    assert copy.get_data("users") == USERS
+
+def test_plain_csv_export_writes_cells_as_they_are():
+    db = JsonDB()
+    db.set_data("users", USERS)
+    db.export_to_csv("users", id_field="id")
+
+    with open("database/users_export.csv", newline="", encoding="utf-8") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert rows[0]["zip"] == "01234" and rows[0]["flag"] == "true" and rows[0]["quoted"] == '"x"'
+    assert rows[0]["none"] == "" and rows[0]["ok"] == "True" and rows[0]["tags"] == '["a", "b"]'
+    assert rows[1]["zip"] == "12345" and rows[1]["bracket"] == "[not json"
+
+def test_import_conflicts():
+    db = JsonDB()
+    db.set_data("users", {"1": {"name": "Old", "age": 1}})
+    rows = [{"id": "1", "name": "New"}, {"id": "2", "name": "Bob"}]
+
+    db.bulk_import("users", rows, id_field="id", on_conflict="skip")
+    assert db.get_data("users/1") == {"name": "Old", "age": 1}
+    db.bulk_import("users", rows, id_field="id", on_conflict="merge")
+    assert db.get_data("users/1") == {"name": "New", "age": 1}
+    db.bulk_import("users", rows, id_field="id", on_conflict="replace")
+    assert db.get_data("users/1") == {"name": "New"}
+    assert db.get_data("users/2") == {"name": "Bob"}
+
+def test_import_without_valid_rows_still_creates_the_collection():
+    db = JsonDB()
+    report = db.bulk_import("users", [None, "not a record"])
+    assert report["imported"] == 0 and len(report["rejected"]) == 2
+    assert JsonDB().get_data("users") == {}
+
+def test_unreadable_csv_is_reported(capsys):
+    with open("database/broken.csv", "w", encoding="utf-8") as csv_file:
+        csv_file.write("name\n" + "x" * (csv.field_size_limit() + 1) + "\n")
+    db = JsonDB()
+    assert db.bulk_import("users", "database/broken.csv") is None
+    assert "Import into 'users' failed" in capsys.readouterr().out
+    assert db.get_data("users") is None
+
+def read_file(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as file:
+        return file.read()
+
+def test_csv_columns_and_chunks():
+    db = JsonDB()
+    db.set_data("users", {"1": {"name": "Ann"}, "2": {"name": "Bob", "address": {"city": "Dakar"}}, "3": "guest"})
+
+    db.export_to_csv("users", id_field="id", chunk_size=1)
+    assert read_file("database/users_export.csv").splitlines() == \
+        ["id,name,address.city,value", "1,Ann,,", "2,Bob,Dakar,", "3,,,guest"]
+    db.export_to_csv("users", id_field="id", compress=True)
+    assert read_file("database/users_export.csv.gz") == read_file("database/users_export.csv")
+
+    db.export_to_csv("users", discover_headers=False, flatten=False)
+    assert read_file("database/users_export.csv").splitlines() == ["name", "Ann", "Bob", '""']
+
+def test_ndjson_export_writes_one_record_per_line():
+    db = JsonDB()
+    db.set_data("users", {str(i): {"n": i, "tags": ["a"]} for i in range(2500)})
+
+    db.export_to_ndjson("users", id_field="id", chunk_size=1000, compress=True)
+    lines = read_file("database/users_export.ndjson.gz").splitlines()
+    assert len(lines) == 2500
+    assert [json.loads(line) for line in lines[:2]] == [{"id": "0", "n": 0, "tags": ["a"]}, {"id": "1", "n": 1, "tags": ["a"]}]
+
+def test_full_database_export():
+    db = JsonDB()
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.set_data("settings", {"theme": "dark"})
+
+    db.export_to_ndjson(id_field="key")
+    assert [json.loads(line) for line in read_file("database/full_database_export.ndjson").splitlines()] == \
+        [{"key": "users", "1": {"name": "Ann"}}, {"key": "settings", "theme": "dark"}]
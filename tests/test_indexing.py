@@ -0,0 +1,89 @@
+import json
+import random
+
+import pytest
+
+from LiteJsonDb import JsonDB
+
+VALUES = [1, 2.5, -3, 10, float("nan"), float("inf"), None, "x", True, [1],
+          "2024-01-02", "2024-03-01T10:00:00+02:00"]
+
+def random_users(seed, count=60):
+    random.seed(seed)
+    return {str(i): {"score": random.choice(VALUES), "country": random.choice(["SN", "FR", 1, True, None])}
+            for i in range(count)}
+
+def shuffle_writes(db, seed):
+    random.seed(seed)
+    for i in random.sample(range(60), 15):
+        db.remove_subcollection("users", str(i))
+    for i in random.sample(range(60), 15):
+        db.set_subcollection("users", str(100 + i), {"score": random.choice(VALUES)})
+    for item_id in random.sample(sorted(db.get_data("users")), 10):
+        db.edit_subcollection("users", item_id, {"score": random.choice(VALUES)})
+
+def scanned(db, method, *args, **kwargs):
+    """
+    Runs an index method again with the index dropped, so it answers with a full scan.
+    """
+    field = args[1]
+    kind = next(index["kind"] for index in db.list_indexes() if index["field"] == field)
+    db.drop_index("users", field)
+    try:
+        return getattr(db, method)(*args, **kwargs)
+    finally:
+        db.create_index("users", field, kind=kind)
+
+@pytest.mark.parametrize("seed", range(8))
+def test_sorted_index_matches_a_full_scan(seed):
+    db = JsonDB()
+    db.set_data("users", random_users(seed))
+    db.create_index("users", "score", kind="sorted")
+    shuffle_writes(db, seed)
+
+    for bounds in [(None, None), (0, 10), (-5, 2.5), ("2024-01-01", "2024-12-31")]:
+        expected = scanned(db, "range_by", "users", "score", *bounds)
+        assert list(db.range_by("users", "score", *bounds)) == list(expected)
+    assert list(db.order_by("users", "score", reverse=True, limit=5)) == \
+        list(scanned(db, "order_by", "users", "score", reverse=True, limit=5))
+
+def test_sorted_index_survives_nan_removals():
+    db = JsonDB()
+    db.set_data("users", {str(i): {"score": float("nan") if i % 3 else i} for i in range(28)})
+    db.create_index("users", "score", kind="sorted")
+    for i in range(0, 28, 2):
+        db.remove_subcollection("users", str(i))
+
+    with open("database/db.json", encoding="utf-8") as file:
+        assert len(json.load(file)["users"]) == len(db.get_data("users")) == 14
+    assert list(db.range_by("users", "score")) == ["3", "9", "15", "21", "27"]
+
+def test_min_and_max():
+    db = JsonDB()
+    db.set_data("users", {"a": {"age": 30}, "b": {"age": 12}, "c": {"age": float("nan")}, "d": {}})
+    db.create_index("users", "age", kind="sorted")
+    assert db.min_by("users", "age") == {"b": {"age": 12}}
+    assert db.max_by("users", "age") == {"a": {"age": 30}}
+
+@pytest.mark.parametrize("seed", range(4))
+def test_hash_index_matches_a_full_scan(seed):
+    db = JsonDB()
+    db.set_data("users", random_users(seed))
+    db.create_index("users", "country")
+    shuffle_writes(db, seed)
+    for item_id in random.sample(sorted(db.get_data("users")), 10):
+        db.edit_subcollection("users", item_id, {"country": random.choice(["SN", "US", 1.0, False])})
+
+    for value in ["SN", "FR", "US", 1, True, False, None]:
+        assert db.find_by("users", "country", value) == scanned(db, "find_by", "users", "country", value)
+    assert set(db.find_by("users", "country", 1)).isdisjoint(db.find_by("users", "country", True))
+
+def test_hash_index_on_a_nested_field_is_kept_across_reopens():
+    db = JsonDB()
+    db.set_data("users", {"1": {"address": {"city": "Dakar"}}, "2": {"address": {"city": "Paris"}}, "3": {}})
+    db.create_index("users", "address/city")
+    db.set_subcollection("users", "4", {"address": {"city": "Dakar"}})
+
+    reopened = JsonDB()
+    assert reopened.list_indexes() == [{"collection": "users", "field": "address/city", "kind": "hash"}]
+    assert sorted(reopened.find_by("users", "address/city", "Dakar")) == ["1", "4"]
@@ -0,0 +1,35 @@
+import multiprocessing
+import os
+
+from LiteJsonDb import JsonDB
+
+WORKERS = 4
+INCREMENTS = 25
+
+def increment(workdir, worker):
+    os.chdir(workdir)
+    db = JsonDB(multiprocess=True)
+    for i in range(INCREMENTS):
+        db.edit_data("counter", {"increment": {"value": 1}})
+        db.set_subcollection("hits", f"{worker}-{i}", {"worker": worker})
+
+def test_no_update_is_lost_across_processes(workdir):
+    db = JsonDB(multiprocess=True)
+    db.set_data("counter", {"value": 0})
+    processes = [multiprocessing.Process(target=increment, args=(str(workdir), worker)) for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    assert db.get_data("counter") == {"value": WORKERS * INCREMENTS}
+    assert len(db.get_subcollection("hits")) == WORKERS * INCREMENTS
+
+def test_reads_see_other_processes_writes():
+    reader = JsonDB(multiprocess=True)
+    writer = JsonDB(multiprocess=True)
+    writer.set_data("k", {"v": 1})
+    assert reader.get_data("k") == {"v": 1}
+    writer.edit_data("k", {"v": 2})
+    assert reader.get_data("k") == {"v": 2}
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler.observers import ObserverTrie
+
+def test_trie_matches_a_path_and_its_ancestors():
+    trie = ObserverTrie()
+    everything, users, user = object(), object(), object()
+    trie.add("", everything)
+    trie.add("users", users)
+    trie.add("users/1", user)
+    assert trie.match("users/1/name") == [everything, users, user]
+    assert trie.match("users/2") == [everything, users]
+    assert trie.match("userstats") == [everything]
+
+    assert trie.remove("users/1", user)
+    assert not trie.remove("users/1", user)
+    assert "1" not in trie.root["children"]["users"]["children"]
+    assert trie.count == 2
+
+def test_sync_delivery_runs_during_the_write():
+    db = JsonDB()
+    seen = []
+    db.add_observer("users", lambda action, key, value: seen.append((action, key, value)))
+    db.set_subcollection("users", "1", {"name": "Ann"})
+    db.set_data("userstats", {"n": 1})
+    db.remove_subcollection("users", "1")
+    assert seen == [("set_subcollection", "users/1", {"name": "Ann"}), ("remove_subcollection", "users/1", None)]
+
+def test_removed_observers_are_not_called():
+    db = JsonDB()
+    seen = []
+    observer = lambda action, key, value: seen.append(key)
+    db.add_observer("", observer)
+    db.set_data("a", {"v": 1})
+    db.remove_observer("", observer)
+    db.set_data("b", {"v": 1})
+    assert seen == ["a"]
+
+def test_thread_delivery_runs_outside_the_writer():
+    db = JsonDB(observer_delivery="thread")
+    threads = []
+    db.add_observer("", lambda action, key, value: threads.append(threading.current_thread()))
+    db.set_data("a", {"v": 1})
+    db.close()
+    assert threads and threads[0] is not threading.current_thread()
+
+def test_thread_delivery_coalesces_without_starving_under_steady_writes():
+    db = JsonDB(observer_delivery="thread", observer_coalesce=0.2, durability="manual")
+    seen = []
+    db.add_observer("counter", lambda action, key, value: seen.append(value["v"]))
+    started = time.monotonic()
+    v = 0
+    while time.monotonic() - started < 1.0:
+        v += 1
+        db.set_data("counter", {"v": v}) if v == 1 else db.edit_data("counter", {"v": v})
+        time.sleep(0.02)
+    delivered_while_writing = len(seen)
+    db.close()
+
+    assert delivered_while_writing >= 2  # One delivery per window, not one at the end
+    assert len(seen) < v  # Changes of a window were merged
+    assert seen[-1] == v
+
+def test_asyncio_delivery_runs_in_the_loop_and_awaits_coroutines():
+    async def scenario():
+        db = JsonDB(observer_delivery="asyncio", observer_coalesce=0.05)
+        seen = []
+        async def observer(action, key, value):
+            seen.append(value)
+        db.add_observer("k", observer)
+        db.set_data("k", {"v": 1})
+        db.edit_data("k", {"v": 2})
+        db.edit_data("k", {"v": 3})
+        await asyncio.sleep(0.2)
+        return seen
+    assert asyncio.run(scenario()) == [{"v": 3}]
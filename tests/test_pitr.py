@@ -0,0 +1,52 @@
+import time
+
+from LiteJsonDb import JsonDB
+
+def open_db():
+    return JsonDB(auto_backup=True, backup_generations=10, change_feed=True)
+
+def test_restores_at_batch_boundaries():
+    db = open_db()
+    db.set_data("k0", {"v": 0})
+    with db.batch():
+        db.set_data("k1", {"v": 1})
+        db.set_data("k2", {"v": 2})
+    db.set_data("k3", {"v": 3})
+    assert [entry["seq"] for entry in db.list_backups()] == [1, 3, 4]
+
+    db.restore(at=1)
+    assert sorted(db.get_db()) == ["k0"]
+    db.restore(at=3)
+    assert sorted(db.get_db()) == ["k0", "k1", "k2"]
+    assert sorted(open_db().get_db()) == ["k0", "k1", "k2"]
+
+def test_restores_inside_a_batch_from_the_previous_generation():
+    db = open_db()
+    db.set_data("k0", {"v": 0})
+    with db.batch():
+        db.set_data("k1", {"v": 1})
+        db.edit_data("k0", {"v": 10})
+
+    db.restore(at=2)
+    assert db.get_db() == {"k0": {"v": 0}, "k1": {"v": 1}}
+
+def test_restores_at_a_time():
+    db = open_db()
+    db.set_data("a", {"v": 1})
+    moment = time.time()
+    time.sleep(0.01)
+    db.remove_data("a")
+    db.set_data("b", {"v": 2})
+
+    db.restore(at=moment)
+    assert db.get_db() == {"a": {"v": 1}}
+
+def test_a_restore_can_be_undone():
+    db = open_db()
+    db.set_data("a", {"v": 1})
+    db.set_data("b", {"v": 2})
+    db.restore(at=1)
+    assert db.changes()[-1]["action"] == "restore"
+
+    db.restore(at=2)
+    assert db.get_db() == {"a": {"v": 1}, "b": {"v": 2}}
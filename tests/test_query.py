@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from LiteJsonDb import JsonDB
+
+QUERIES = [
+    lambda q: q.where(age__gte=18, country="SN").order_by("-score").limit(5),
+    lambda q: q.where(age__gte=18).order_by("age").limit(10),
+    lambda q: q.where(age__lt=30, age__gt=12).order_by("-age"),
+    lambda q: q.order_by("score").limit(7),
+    lambda q: q.where(country__in=["FR", "US"]).order_by("-score", "age"),
+    lambda q: q.where(score=None),
+    lambda q: q.where(country__ne="SN", score__gte=50).order_by("-score").limit(5),
+    lambda q: q.where(tags__contains="b").fields("age"),
+    lambda q: q.where(score__exists=False),
+]
+
+def fill(db, seed):
+    random.seed(seed)
+    with db.batch():
+        for i in range(300):
+            record = {"country": random.choice(["SN", "FR", "US"]), "age": random.randint(1, 60),
+                      "tags": random.sample(["a", "b", "c"], 2)}
+            if random.random() < 0.9:
+                record["score"] = random.choice([None, "x", random.randint(0, 100)])
+            db.set_subcollection("users", f"{i:03d}", record)
+
+def run_all(db):
+    """
+    Runs every query and keeps what any plan must agree on: the IDs when nothing cuts the
+    results, and the order-by values in result order (ties may come in any order).
+    """
+    results = []
+    for make in QUERIES:
+        query = make(db.query("users"))
+        found = query.all()
+        ids = sorted(found) if query.max_results is None else len(found)
+        stored = db.get_data("users")
+        order = [[stored[item_id].get(field, "missing") for field, _ in query.ordering] for item_id in found]
+        results.append((ids, order))
+    return results
+
+@pytest.mark.parametrize("seed", range(3))
+def test_indexed_plans_match_full_scans(seed):
+    db = JsonDB()
+    fill(db, seed)
+    scanned = run_all(db)
+    db.create_index("users", "country")
+    db.create_index("users", "age", kind="sorted")
+    db.create_index("users", "score", kind="sorted")
+    indexed = run_all(db)
+    assert indexed == scanned
+
+def test_indexed_results_follow_edits_and_removals():
+    db = JsonDB()
+    fill(db, 7)
+    db.create_index("users", "country")
+    db.create_index("users", "age", kind="sorted")
+    random.seed(7)
+    for item_id in random.sample(sorted(db.get_data("users")), 60):
+        db.remove_subcollection("users", item_id)
+    for item_id in random.sample(sorted(db.get_data("users")), 60):
+        db.edit_subcollection("users", item_id, {"country": "SN", "age": random.randint(1, 60)})
+
+    query = lambda: db.query("users").where(country="SN", age__gte=30)
+    expected = {item_id: record for item_id, record in db.get_data("users").items()
+                if record["country"] == "SN" and record["age"] >= 30}
+    assert query().all() == expected
+    assert query().count() == len(expected)
+
+def test_explain_names_the_access_path():
+    db = JsonDB()
+    fill(db, 1)
+    assert db.query("users").where(country="SN").explain()["access"] == "full scan"
+    db.create_index("users", "country")
+    db.create_index("users", "age", kind="sorted")
+
+    explained = db.query("users").where(country="SN").explain()
+    assert explained["access"] == "index lookup"
+    assert explained["index"] == "hash index on 'country'"
+    assert db.query("users").where(age__gte=40).explain()["access"] == "sorted index range"
+    ordered = db.query("users").order_by("-age").limit(3).explain()
+    assert ordered["order"] == "index order (no sort)" and ordered["early_stop"]
+    assert db.query("users").order_by("-score").limit(3).explain()["order"] == "top-3 heap selection"
+
+def test_ordering_and_projection():
+    db = JsonDB()
+    db.set_data("users", {"a": {"age": 30, "name": "A"}, "b": {"age": 12, "name": "B"},
+                          "c": {"name": "C"}, "d": {"age": 50, "name": "D"}})
+    db.create_index("users", "age", kind="sorted")
+    assert list(db.query("users").order_by("age").all()) == ["b", "a", "d", "c"]
+    assert db.query("users").order_by("-age").fields("name").first() == ("d", {"name": "D"})
+
+def test_results_are_detached_copies():
+    db = JsonDB()
+    db.set_data("users", {"1": {"name": "Ann", "tags": ["a"]}})
+    _, record = db.query("users").first()
+    record["name"] = "Changed"
+    record["tags"].append("b")
+    assert db.get_data("users/1") == {"name": "Ann", "tags": ["a"]}
+
+    _, view = db.query("users").views().first()
+    assert view["name"] == "Ann"
+    with pytest.raises(TypeError):
+        view["name"] = "Changed"
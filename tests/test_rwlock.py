@@ -0,0 +1,106 @@
+import threading
+import time
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler.rwlock import ReadWriteLock
+
+def start(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+def blocked(event):
+    """
+    Tells whether a thread is still waiting to set `event` a moment later.
+    """
+    return not event.wait(0.1)
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    together = threading.Barrier(3, timeout=2)
+    def reader():
+        with lock.read:
+            together.wait()  # Only passes if every reader holds the lock at once
+    threads = [start(reader) for _ in range(3)]
+    for thread in threads:
+        thread.join(2)
+    assert not together.broken
+
+def test_a_writer_excludes_readers_and_goes_first():
+    lock = ReadWriteLock()
+    order = []
+    lock.acquire_read()
+    writer_done, reader_done = threading.Event(), threading.Event()
+    def writer():
+        with lock.write:
+            order.append("writer")
+        writer_done.set()
+    def reader():
+        with lock.read:
+            order.append("reader")
+        reader_done.set()
+
+    start(writer)
+    assert blocked(writer_done)  # Waits for the current reader
+    start(reader)
+    assert blocked(reader_done)  # Queues behind the waiting writer
+    lock.release_read()
+    assert writer_done.wait(2) and reader_done.wait(2)
+    assert order == ["writer", "reader"]
+
+def test_downgrade_lets_readers_in_but_not_writers():
+    lock = ReadWriteLock()
+    lock.acquire_write()
+    lock.acquire_write()
+    assert not lock.downgrade()  # An outer caller still writes
+    lock.release_write()
+
+    reader_done, writer_done = threading.Event(), threading.Event()
+    start(lambda: (lock.acquire_read(), lock.release_read(), reader_done.set()))
+    assert blocked(reader_done)
+    assert lock.downgrade() and lock.write_depth == 0
+    assert reader_done.wait(2)
+    start(lambda: (lock.acquire_write(), lock.release_write(), writer_done.set()))
+    assert blocked(writer_done)
+    lock.release_read()
+    assert writer_done.wait(2)
+
+def test_readers_can_upgrade_without_deadlocking():
+    lock = ReadWriteLock()
+    upgraded = []
+    both_reading = threading.Barrier(2, timeout=2)
+    def upgrade(name):
+        with lock.read:
+            both_reading.wait()
+            with lock.write:  # Both readers upgrade at once
+                upgraded.append(name)
+            with lock.read:  # The read hold is back after writing
+                pass
+    threads = [start(lambda name=name: upgrade(name)) for name in ("a", "b")]
+    for thread in threads:
+        thread.join(2)
+    assert sorted(upgraded) == ["a", "b"]
+    done = threading.Event()
+    start(lambda: (lock.acquire_write(), lock.release_write(), done.set()))
+    assert done.wait(2)  # No read hold was left behind
+
+def test_concurrent_writes_and_reads_lose_nothing():
+    db = JsonDB()
+    db.set_data("users", {})
+    errors = []
+    def writer(worker):
+        for i in range(50):
+            db.set_subcollection("users", f"{worker}-{i}", {"n": i})
+    def reader():
+        for _ in range(50):
+            users = db.get_data("users", copy=True)
+            if any(record != {"n": int(item_id.split("-")[1])} for item_id, record in users.items()):
+                errors.append(users)
+            time.sleep(0.001)
+    threads = [start(lambda worker=worker: writer(worker)) for worker in range(4)] + [start(reader) for _ in range(2)]
+    for thread in threads:
+        thread.join(30)
+
+    assert not errors
+    assert len(db.get_data("users")) == 200
+    assert len(JsonDB().get_data("users")) == 200
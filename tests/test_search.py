@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.modules import iter_search
+
+SEARCHED = ["Dakar", "Paris", 7, "7", True, None, "None", ["a", "b"], 2.5]
+
+def random_data(seed):
+    random.seed(seed)
+    leaves = ["Dakar", "Paris", 7, "7", True, 1, None, ["a", "b"], 2.5, "x"]
+    return {
+        "users": {str(i): {"city": random.choice(leaves), "profile": {"tag": random.choice(leaves)}}
+                  for i in range(40)},
+        "settings": {"city": random.choice(leaves), "limit": random.choice(leaves)},
+    }
+
+def edit(db, seed):
+    random.seed(seed)
+    for i in random.sample(range(40), 10):
+        db.remove_subcollection("users", str(i))
+    for i in random.sample(range(40), 10):
+        db.set_subcollection("users", str(100 + i), {"city": random.choice(SEARCHED)})
+    db.edit_data("settings", {"city": "Paris", "extra": {"deep": 7}})
+    db.set_data("scalar", "Dakar")
+
+@pytest.mark.parametrize("seed", range(4))
+def test_value_index_matches_a_plain_search(seed):
+    indexed, plain = JsonDB("indexed.json", value_index=True), JsonDB("plain.json")
+    for db in (indexed, plain):
+        db.set_data("users", random_data(seed)["users"])
+        db.set_data("settings", random_data(seed)["settings"])
+        edit(db, seed)
+
+    for value in SEARCHED:
+        assert indexed.search_data(value) == plain.search_data(value)
+        assert indexed.search_data(value, key="users") == plain.search_data(value, key="users")
+    assert JsonDB("indexed.json", value_index=True).search_data("Paris") == plain.search_data("Paris")
+
+def test_iter_search_stops_at_the_limit():
+    db = JsonDB()
+    db.set_data("users", {str(i): {"city": "Dakar"} for i in range(10000)})
+
+    checked = []
+    def predicate(value):
+        checked.append(value)
+        return True
+    assert list(db.iter_search("Dakar", key="users", limit=3, predicate=predicate)) == \
+        [("0/city", "Dakar"), ("1/city", "Dakar"), ("2/city", "Dakar")]
+    assert len(checked) == 3
+
+    checked.clear()
+    matches = db.iter_search("Dakar", predicate=predicate)
+    assert next(matches) == ("users/0/city", "Dakar")
+    assert len(checked) == 1  # Nothing past the first match was visited
+
+def test_iter_search_agrees_with_search_data_and_looks_inside_lists():
+    db = JsonDB()
+    db.set_data("users", random_data(3)["users"])
+    db.set_data("posts", {"p1": {"comments": [{"by": "Dakar"}, {"by": "Paris"}, [{"by": "Dakar"}]]}})
+
+    assert dict(db.iter_search("Paris", key="users")) == db.search_data("Paris", key="users")
+    assert list(db.iter_search("Dakar", key="posts")) == [("p1/comments/0/by", "Dakar"), ("p1/comments/2/0/by", "Dakar")]
+
+def test_iter_search_handles_deep_nesting():
+    node = leaf = {}
+    for _ in range(5000):
+        leaf["child"] = {}
+        leaf = leaf["child"]
+    leaf["name"] = "bottom"
+
+    (path, value), = iter_search({"deep": node}, "bottom", key="deep")
+    assert value == "bottom" and path.count("/") == 5000
@@ -0,0 +1,59 @@
+import json
+import math
+from unittest import mock
+
+import pytest
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler import serializer as serializer_module
+from LiteJsonDb.handler.serializer import decode_payload, encode_payload, fast_loads
+
+SERIALIZERS = ["json", "compact", "orjson", "msgpack"]
+
+SPECIAL = {"nan": float("nan"), "inf": float("inf"), "-inf": float("-inf"),
+           "big": 2 ** 70, "bigger": -(2 ** 80), "int64": 2 ** 63 - 1, "float": 0.1, "text": "é"}
+
+def check_special(data):
+    assert math.isnan(data["nan"])
+    assert data["inf"] == float("inf") and data["-inf"] == float("-inf")
+    for key in ("big", "bigger", "int64"):
+        assert data[key] == SPECIAL[key] and isinstance(data[key], int)
+    assert data["float"] == 0.1 and data["text"] == "é"
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_payload_round_trip(serializer):
+    check_special(decode_payload(encode_payload(serializer, {"m": SPECIAL}))["m"])
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+@pytest.mark.parametrize("storage", ["file", "wal"])
+def test_database_round_trip(serializer, storage):
+    db = JsonDB(serializer=serializer, storage=storage)
+    db.set_data("m", SPECIAL)
+    db.close()
+    check_special(JsonDB(serializer=serializer, storage=storage).get_data("m"))
+
+def test_loads_files_written_by_the_stdlib():
+    with open("database/db.json", "w", encoding="utf-8") as file:
+        json.dump({"m": SPECIAL}, file)
+    for serializer in SERIALIZERS:
+        check_special(JsonDB(serializer=serializer).get_data("m"))
+
+def test_fast_loads_keeps_big_ints_and_nan():
+    assert fast_loads('{"a": 123456789012345678901234567890}')["a"] == 123456789012345678901234567890
+    assert math.isnan(fast_loads(b'{"a": NaN}')["a"])
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_existing_files_load_whatever_the_serializer(serializer):
+    db = JsonDB(serializer=serializer)
+    db.set_data("k", {"v": [1, "two", None, True]})
+    db.close()
+    for other in SERIALIZERS:
+        assert JsonDB(serializer=other).get_data("k") == {"v": [1, "two", None, True]}
+
+def test_orjson_keeps_nulls_without_falling_back(monkeypatch):
+    if serializer_module.orjson is None:
+        pytest.skip("orjson isn't installed")
+    data = {"a": None, "b": "null", "c": [None, 1.5]}
+    monkeypatch.setattr(serializer_module.json, "dumps", mock.Mock(side_effect=AssertionError("stdlib fallback")))
+    assert decode_payload(encode_payload("orjson", data)) == data
+    assert json.loads(serializer_module.fast_dumps(data)) == data
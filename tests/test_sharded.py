@@ -0,0 +1,83 @@
+import json
+import os
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler.shards import ShardStore
+
+def written_shards(monkeypatch):
+    """
+    Records the name of every shard file written from now on.
+    """
+    written = []
+    original = ShardStore.write
+    def write(self, filename, payload, fsync=False):
+        written.append(filename)
+        return original(self, filename, payload, fsync)
+    monkeypatch.setattr(ShardStore, "write", write)
+    return written
+
+def test_writes_only_touch_the_dirty_collection(monkeypatch):
+    db = JsonDB(storage="sharded")
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.set_data("posts", {"p1": {"title": "Hi"}})
+
+    written = written_shards(monkeypatch)
+    db.edit_subcollection("users", "1", {"name": "Bob"})
+    db.set_subcollection("users", "2", {"name": "Eve"})
+    assert written == ["users.json", "users.json"]
+
+def test_collections_survive_a_reopen():
+    db = JsonDB(storage="sharded")
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.set_data("odd name.x", {"v": 1})
+    db.set_data("posts", {"p1": {"title": "Hi"}})
+    db.remove_data("posts")
+
+    assert sorted(os.listdir("database/db")) == ["manifest.json", "odd%20name%2Ex.json", "users.json"]
+    assert JsonDB(storage="sharded").get_db(raw=True) == {"users": {"1": {"name": "Ann"}}, "odd name.x": {"v": 1}}
+
+def test_splits_an_existing_single_file_database():
+    with open("database/db.json", "w", encoding="utf-8") as file:
+        json.dump({"users": {"1": {"name": "Ann"}}, "posts": {}}, file)
+
+    db = JsonDB(storage="sharded")
+    assert db.get_data("users/1") == {"name": "Ann"}
+    with open("database/db/manifest.json", encoding="utf-8") as file:
+        assert json.load(file)["collections"] == {"users": "users.json", "posts": "posts.json"}
+    with open("database/db.json", encoding="utf-8") as file:
+        assert json.load(file)["users"] == {"1": {"name": "Ann"}}  # The original file is left untouched
+
+def test_lazy_mode_loads_collections_on_first_access(monkeypatch):
+    db = JsonDB(storage="sharded")
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.set_data("posts", {"p1": {"title": "Hi"}})
+
+    read = []
+    original = ShardStore.read
+    monkeypatch.setattr(ShardStore, "read", lambda self, filename: read.append(filename) or original(self, filename))
+    lazy = JsonDB(storage="sharded", lazy=True)
+    assert read == [] and lazy._unloaded == {"users", "posts"}
+    assert lazy.get_data("users/1") == {"name": "Ann"}
+    assert read == ["users.json"] and lazy._unloaded == {"posts"}
+    lazy.set_subcollection("posts", "p2", {"title": "New"})
+    assert sorted(read) == ["posts.json", "users.json"]
+    assert lazy.get_data("posts") == {"p1": {"title": "Hi"}, "p2": {"title": "New"}}
+
+def test_unload_saves_then_drops_the_collection():
+    db = JsonDB(storage="sharded", lazy=True, durability="manual")
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.set_subcollection("users", "2", {"name": "Bob"})
+
+    db.unload("users")
+    assert "users" not in db.db and db._unloaded == {"users"}
+    assert db.get_data("users/2") == {"name": "Bob"}  # Read back from its shard
+    assert JsonDB(storage="sharded").get_data("users") == {"1": {"name": "Ann"}, "2": {"name": "Bob"}}
+
+def test_whole_database_reads_load_every_collection():
+    db = JsonDB(storage="sharded")
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.set_data("posts", {"p1": {"title": "Ann"}})
+
+    lazy = JsonDB(storage="sharded", lazy=True)
+    assert lazy.search_data("Ann") == {"users/1/name": "Ann", "posts/p1/title": "Ann"}
+    assert lazy._unloaded == set()
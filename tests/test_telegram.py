@@ -0,0 +1,47 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from LiteJsonDb import JsonDB
+from LiteJsonDb.handler.compression import decompress
+from LiteJsonDb.modules.tgbot import BackupToTelegram
+
+def send_and_capture(db, **options):
+    sent = []
+    def send_backup(bot, payload, filename):
+        sent.append((decompress(payload), filename))
+        return True
+    with mock.patch.object(BackupToTelegram, "send_backup", send_backup):
+        assert db.backup_to_telegram("token", "chat", **options)
+    return sent[0]
+
+def test_sends_unsaved_changes():
+    db = JsonDB(durability="manual")
+    db.set_data("k", {"v": 1})
+    payload, filename = send_and_capture(db)
+    assert json.loads(payload) == {"k": {"v": 1}}
+    assert filename == "db.json"
+
+def test_sends_the_latest_write_while_it_is_being_saved():
+    db = JsonDB()
+    db.set_data("k", {"v": 1})
+    save = db._save_db
+    def slow_save():
+        time.sleep(0.3)
+        save()
+    db._save_db = slow_save
+    writer = threading.Thread(target=db.edit_data, args=("k", {"v": 2}))
+    writer.start()
+    time.sleep(0.1)  # The writer is now saving under a read hold
+    payload, _ = send_and_capture(db)
+    writer.join()
+    assert json.loads(payload) == {"k": {"v": 2}}
+
+def test_splits_big_backups_into_parts():
+    bot = BackupToTelegram("token", "chat", compression=None, part_size=10)
+    parts = []
+    with mock.patch.object(bot, "_send_request", lambda files, caption: parts.append(files["document"]) or True):
+        assert bot.send_backup(b"x" * 25, "db.json")
+    assert [name for name, _ in parts] == ["db.json.001", "db.json.002", "db.json.003"]
+    assert b"".join(content for _, content in parts) == b"x" * 25
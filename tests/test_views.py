@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+from LiteJsonDb import JsonDB
+
+USER = {"name": "Ann", "tags": ["a", {"k": 1}], "address": {"city": "Dakar"}}
+
+def test_views_are_read_only_and_live():
+    db = JsonDB()
+    db.set_data("users", {"1": USER})
+    view = db.get_data("users/1", view=True)
+
+    assert view == USER and view["tags"][1] == {"k": 1} and len(view["tags"][:1]) == 1
+    for change in (lambda: view.__setitem__("name", "Bob"),
+                   lambda: view["address"].__setitem__("city", "Paris"),
+                   lambda: view["tags"].append("b"),
+                   lambda: view["tags"][1].__setitem__("k", 2)):
+        with pytest.raises((TypeError, AttributeError)):
+            change()
+    db.edit_subcollection("users", "1", {"name": "Bob"})
+    assert view["name"] == "Bob"  # Views show the changes made through the API
+    assert db.get_data("users/1") == {**USER, "name": "Bob"}
+
+def test_copies_are_detached():
+    db = JsonDB()
+    db.set_data("users", {"1": {**USER, "score": float("nan"), "big": 2 ** 70}})
+    for copy in (db.get_data("users/1", copy=True), db.get_subcollection("users", "1", copy=True),
+                 db.get_db(copy=True)["users"]["1"], db.get_data("users/1", view=True).copy()):
+        copy["tags"][1]["k"] = 2
+        copy["address"]["city"] = "Paris"
+        assert math.isnan(copy["score"]) and copy["big"] == 2 ** 70
+    assert db.get_data("users/1/tags") == ["a", {"k": 1}]
+    assert db.get_data("users/1/address") == {"city": "Dakar"}
+
+def test_read_only_views_setting_changes_the_default():
+    db = JsonDB(read_only_views=True)
+    db.set_data("users", {"1": USER})
+    with pytest.raises(TypeError):
+        db.get_subcollection("users", "1")["name"] = "Bob"
+    with pytest.raises(TypeError):
+        db.get_db()["users"] = {}
+    db.get_data("users/1", view=False)["name"] = "Bob"  # The stored value itself, as before
+    assert db.get_data("users/1/name") == "Bob"
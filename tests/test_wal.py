@@ -0,0 +1,49 @@
+import os
+
+from LiteJsonDb import JsonDB
+
+def open_wal(**options):
+    return JsonDB("wal.json", storage="wal", background_compaction=False, **options)
+
+def test_replays_the_log_on_top_of_the_snapshot():
+    db = open_wal()
+    db.set_data("users", {"1": {"name": "Ann"}})
+    db.edit_data("users/1", {"age": 30})
+    db.set_data("tmp", {"x": 1})
+    db.remove_data("tmp")
+    assert os.path.exists("database/wal.json.wal")
+
+    # No close(): the next instance only has the snapshot and the log, as after a crash.
+    reopened = open_wal()
+    assert reopened.get_db() == {"users": {"1": {"name": "Ann", "age": 30}}}
+
+def test_skips_a_torn_last_record():
+    db = open_wal()
+    db.set_data("a", {"v": 1})
+    db.set_data("b", {"v": 2})
+    with open("database/wal.json.wal", "a", encoding="utf-8") as log:
+        log.write('{"op": "set", "path": ["c"], "val')  # Crash in the middle of an append
+
+    assert open_wal().get_db() == {"a": {"v": 1}, "b": {"v": 2}}
+
+def test_compaction_folds_the_log_into_the_snapshot():
+    db = open_wal()
+    for i in range(20):
+        db.set_subcollection("items", str(i), {"n": i})
+    db.compact()
+    assert not os.path.exists("database/wal.json.wal")
+
+    db.edit_subcollection("items", "3", {"n": 33})
+    reopened = open_wal()
+    assert reopened.get_subcollection("items", "3") == {"n": 33}
+    assert len(reopened.get_subcollection("items")) == 20
+
+def test_replays_a_log_left_by_an_interrupted_compaction():
+    db = open_wal()
+    db.set_data("a", {"v": 1})
+    os.replace("database/wal.json.wal", "database/wal.json.wal.compacting")
+    db.set_data("b", {"v": 2})
+
+    reopened = open_wal()
+    assert reopened.get_db() == {"a": {"v": 1}, "b": {"v": 2}}
+    assert not os.path.exists("database/wal.json.wal.compacting")